@@ -1,33 +1,48 @@
 from flask import Flask
 from flask_cors import CORS
 from flask_restful import Api
-from services.auth_services.app import api as auth_api
-from services.event_services.app import api as event_api
-from services.user_services.app import api as user_api
-from services.reporting_service.app import api as reporting_api
+from tokens import init_jwt
+from ratelimit import init_rate_limits
+from services.auth_services import app as auth_service
+from services.event_services import app as event_service
+from services.user_services import app as user_service
+from services.reporting_service import app as reporting_service
 
 app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
+CORS(app, expose_headers=["X-Next-Cursor", "ETag", "Retry-After"])  # Enable CORS for all routes
+# One JWT setup (and one verified-token cache) for every mounted service
+jwt = init_jwt(app)
+# Per-client token buckets in front of every /api route; over-budget requests get 429
+limiter = init_rate_limits(app)
 
 # Create main API
 api = Api(app, prefix='/api')
 
-# Add all resources from each service
-for resource in auth_api.resources:
-    api.add_resource(resource.resource, *resource.urls)
 
-for resource in event_api.resources:
-    api.add_resource(resource.resource, *resource.urls)
+def mount(service):
+    """
+    Adds every flask-restful resource of a service module to the gateway API.
+
+    The services attach their Api to their own Flask app, so the resources are
+    read back from that app's URL map (Api.resources is only filled for an Api
+    created without an app).
+    """
+    urls = {}
+    for rule in service.app.url_map.iter_rules():
+        if rule.endpoint in service.api.endpoints:
+            resource = service.app.view_functions[rule.endpoint].view_class
+            urls.setdefault(resource, []).append(rule.rule)
+    for resource, resource_urls in urls.items():
+        api.add_resource(resource, *resource_urls, endpoint=f"{service.__name__}.{resource.__name__}")
 
-for resource in user_api.resources:
-    api.add_resource(resource.resource, *resource.urls)
 
-for resource in reporting_api.resources:
-    api.add_resource(resource.resource, *resource.urls)
+# Add all resources from each service
+for service in (auth_service, event_service, user_service, reporting_service):
+    mount(service)
 
 @app.route('/health')
 def health_check():
     return {'status': 'ok'}, 200
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True) 
\ No newline at end of file
+    app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1 @@
+"""Micro-benchmarks for backend hot paths. Run from app/backend, e.g. `python -m benchmarks.bench_geo_radius`."""
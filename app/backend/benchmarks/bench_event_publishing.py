@@ -0,0 +1,61 @@
+"""
+Request latency of POST /events with inline vs batched EventBridge publishing.
+
+Both modes publish to a LocalEventBridgeClient that sleeps for --latency-ms on
+every PutEvents call, standing in for the network round trip.
+
+Usage: python -m benchmarks.bench_event_publishing [--requests 200] [--latency-ms 20]
+"""
+
+import argparse
+import logging
+import statistics
+import time
+
+import structlog
+from flask_jwt_extended import create_access_token
+
+from services.event_services import app as event_service
+from services.event_services.publisher import LocalEventBridgeClient, make_publisher
+
+PAYLOAD = {
+    "title": "Beach Cleanup",
+    "location": {"latitude": 34.0522, "longitude": -118.2437, "address": "Santa Monica Beach"},
+    "dateTime": "2025-07-15T09:00:00Z",
+    "capacity": 50,
+}
+
+
+def run(mode, requests, latency):
+    client = LocalEventBridgeClient(latency=latency)
+    publisher = make_publisher(mode, client, "bench-bus", "com.bloomrefresh.eventservice")
+    event_service.event_publisher = publisher
+    with event_service.app.app_context():
+        headers = {"Authorization": f"Bearer {create_access_token(identity='bench-organizer')}"}
+
+    timings = []
+    with event_service.app.test_client() as http:
+        for _ in range(requests):
+            start = time.perf_counter()
+            http.post("/events", json=PAYLOAD, headers=headers)
+            timings.append((time.perf_counter() - start) * 1000)
+    publisher.close()
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.99) - 1], len(client.calls), len(client.accepted)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    print(f"{'mode':<8} {'p50_ms':>8} {'p99_ms':>8} {'put_events':>11} {'entries':>8}")
+    for mode in ("inline", "batch"):
+        p50, p99, calls, entries = run(mode, args.requests, args.latency_ms / 1000)
+        print(f"{mode:<8} {p50:>8.2f} {p99:>8.2f} {calls:>11} {entries:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Radius-query cost of the event GeoGridIndex as the table grows.
+
+Two series are printed:
+  1. Fixed number of matching events, growing table size (10k -> 1M).
+     Query time should stay flat.
+  2. Fixed table size, growing radius (and therefore matches).
+     Query time should grow with the match count.
+
+Usage: python -m benchmarks.bench_geo_radius [--max-events 1000000]
+"""
+
+import argparse
+import random
+import time
+
+from services.event_services.geo_index import GeoGridIndex
+
+QUERY_LAT, QUERY_LNG = 34.0195, -118.4912  # Santa Monica
+CLUSTER_SIZE = 500
+QUERIES = 200
+
+
+def _background_point(rng):
+    # Uniform over the globe, minus a box around the query point so the match count stays fixed.
+    while True:
+        lat, lng = rng.uniform(-85, 85), rng.uniform(-180, 180)
+        if abs(lat - QUERY_LAT) > 1.0 or abs(lng - QUERY_LNG) > 1.0:
+            return lat, lng
+
+
+def build_index(total, rng):
+    index = GeoGridIndex()
+    for i in range(CLUSTER_SIZE):
+        index.add(f"near-{i}", QUERY_LAT + rng.uniform(-0.05, 0.05), QUERY_LNG + rng.uniform(-0.05, 0.05))
+    for i in range(total - CLUSTER_SIZE):
+        index.add(f"bg-{i}", *_background_point(rng))
+    return index
+
+
+def time_query(index, radius_km):
+    start = time.perf_counter()
+    for _ in range(QUERIES):
+        matches = index.query_radius(QUERY_LAT, QUERY_LNG, radius_km)
+    elapsed = (time.perf_counter() - start) / QUERIES
+    return elapsed, len(matches)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-events", type=int, default=1_000_000)
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    print("table_size  matches  query_us  (radius 10 km)")
+    sizes = [s for s in (10_000, 100_000, 1_000_000) if s <= args.max_events]
+    index = None
+    for size in sizes:
+        index = build_index(size, rng)
+        elapsed, matches = time_query(index, 10.0)
+        print(f"{size:>10}  {matches:>7}  {elapsed * 1e6:>8.1f}")
+
+    print(f"\nradius_km  matches  query_us  (table size {len(index)})")
+    for radius_km in (1, 5, 10, 50, 200, 1000):
+        elapsed, matches = time_query(index, float(radius_km))
+        print(f"{radius_km:>9}  {matches:>7}  {elapsed * 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
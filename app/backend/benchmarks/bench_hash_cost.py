@@ -0,0 +1,45 @@
+"""
+Calibrates the PBKDF2 work factor for this machine against a per-login latency budget.
+
+Times one password hash across a range of iteration counts, then prints the
+largest count that fits in --budget-ms. Set that as PASSWORD_HASH_ITERATIONS
+for the deployment. Run it on the hardware the auth service will run on:
+the same count costs very different time on a laptop and a Lambda.
+
+"logins_per_core_s" is how many hashes one core can do per second at that
+cost, i.e. the CPU each login spends vs how hard a stolen hash is to crack.
+
+Usage: python -m benchmarks.bench_hash_cost [--budget-ms 250]
+"""
+
+import argparse
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS
+
+from services.auth_services.utils import MIN_HASH_ITERATIONS, calibrate_iterations, time_hash
+
+SERIES = (100_000, 200_000, 400_000, DEFAULT_PBKDF2_ITERATIONS, 1_000_000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=250.0, help="CPU time one login may spend hashing")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'iterations':>11} {'hash_ms':>8} {'logins_per_core_s':>18}")
+    for iterations in sorted(SERIES):
+        seconds = time_hash(iterations, args.repeats)
+        print(f"{iterations:>11,} {seconds * 1000:>8.1f} {1 / seconds:>18.1f}")
+
+    iterations = calibrate_iterations(args.budget_ms, repeats=args.repeats)
+    measured = time_hash(iterations, args.repeats) * 1000
+    print(f"\nbudget {args.budget_ms:.0f} ms -> PASSWORD_HASH_ITERATIONS={iterations} (measured {measured:.1f} ms)")
+    if iterations == MIN_HASH_ITERATIONS and measured > args.budget_ms:
+        print(f"note: the budget is below the cost of the {MIN_HASH_ITERATIONS:,}-iteration floor on this machine")
+    if iterations < DEFAULT_PBKDF2_ITERATIONS:
+        print(f"note: below werkzeug's default of {DEFAULT_PBKDF2_ITERATIONS:,}; consider a larger budget")
+
+
+if __name__ == "__main__":
+    main()
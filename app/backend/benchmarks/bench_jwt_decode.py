@@ -0,0 +1,66 @@
+"""
+Per-request cost of JWT verification, with the stock JWTManager and with the decode cache.
+
+"decode_us" times flask_jwt_extended.decode_token on its own; "request_us" times
+a whole GET to a minimal @jwt_required() route, so the difference between the
+two managers is the verification overhead each request no longer pays.
+
+Usage: python -m benchmarks.bench_jwt_decode [--requests 20000]
+"""
+
+import argparse
+import time
+
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token, decode_token, jwt_required
+
+from tokens import CachingJWTManager
+from tokens.decode_cache import DecodeCache
+
+
+def build_app(manager_class):
+    app = Flask(__name__)
+    app.config["JWT_SECRET_KEY"] = "benchmark-secret-key-of-reasonable-length"
+    app.config["PROPAGATE_EXCEPTIONS"] = True
+    manager_class(app)
+
+    @app.route("/ping")
+    @jwt_required()
+    def ping():
+        return "ok"
+
+    return app
+
+
+def run(label, manager_class, requests):
+    app = build_app(manager_class)
+    with app.app_context():
+        token = create_access_token(identity="bench-user")
+        start = time.perf_counter()
+        for _ in range(requests):
+            decode_token(token)
+        decode_us = (time.perf_counter() - start) / requests * 1e6
+
+    headers = {"Authorization": f"Bearer {token}"}
+    with app.test_client() as client:
+        start = time.perf_counter()
+        for _ in range(requests):
+            client.get("/ping", headers=headers)
+        request_us = (time.perf_counter() - start) / requests * 1e6
+    print(f"{label:<8} {decode_us:>10.1f} {request_us:>11.1f}")
+    return request_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+
+    print(f"{'manager':<8} {'decode_us':>10} {'request_us':>11}")
+    stock = run("stock", JWTManager, args.requests)
+    cached = run("cached", lambda app: CachingJWTManager(app, decode_cache=DecodeCache()), args.requests)
+    print(f"\nsaved per request: {stock - cached:.1f} us ({(stock - cached) / stock:.0%} of the request)")
+
+
+if __name__ == "__main__":
+    main()
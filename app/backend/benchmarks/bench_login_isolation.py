@@ -0,0 +1,122 @@
+"""
+Latency of GET /api/events while a login spike saturates the CPU with PBKDF2.
+
+The auth and event services run behind one threaded HTTP server, mounted under
+/api the way the gateway mounts them. --logins client threads post logins in a
+loop (backing off for Retry-After when shed) while one probe thread times
+GET /api/events. This runs twice: hashing inline on the request threads, then
+in the bounded process pool, which sheds the excess logins with 503.
+
+Usage: python -m benchmarks.bench_login_isolation [--seconds 10] [--logins 16]
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import os
+import statistics
+import threading
+import time
+from collections import Counter
+
+os.environ.setdefault("DATABASE_URL", "memory://")
+
+import structlog
+from flask_jwt_extended import create_access_token
+from werkzeug.serving import make_server
+
+from services.auth_services import app as auth_service
+from services.auth_services.hashing import HashingPool, pool_from_env
+from services.auth_services.utils import hash_password
+from services.event_services import app as event_service
+
+EMAIL, PASSWORD = "bench@example.com", "bench-password"
+
+
+def gateway(environ, start_response):
+    path = environ["PATH_INFO"]
+    if path.startswith("/api/"):
+        environ["PATH_INFO"] = path = path[len("/api"):]
+    target = auth_service.app if path.startswith("/auth/") else event_service.app
+    return target(environ, start_response)
+
+
+def _request(port, method, path, body=None, headers=None):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    try:
+        connection.request(method, path, body=body, headers=headers or {})
+        response = connection.getresponse()
+        response.read()
+        return response.status, response.getheader("Retry-After")
+    finally:
+        connection.close()
+
+
+def run(label, hasher, seconds, logins):
+    auth_service.password_hasher = hasher
+    hasher.warm_up()
+    server = make_server("127.0.0.1", 0, gateway, threaded=True)
+    port = server.server_port
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with event_service.app.app_context():
+        event_headers = {"Authorization": f"Bearer {create_access_token(identity='bench-user')}"}
+    login_body = json.dumps({"email": EMAIL, "password": PASSWORD})
+    stop = threading.Event()
+    outcomes = Counter()
+
+    def login_loop():
+        while not stop.is_set():
+            status, retry_after = _request(port, "POST", "/api/auth/login", login_body, {"Content-Type": "application/json"})
+            outcomes[status] += 1
+            if retry_after:  # Well-behaved clients back off when shed
+                stop.wait(float(retry_after))
+
+    # Baseline with no login load, then the same probe under the spike
+    baseline = [_timed(port, event_headers) for _ in range(50)]
+    clients = [threading.Thread(target=login_loop, daemon=True) for _ in range(logins)]
+    for client in clients:
+        client.start()
+    time.sleep(0.5)
+    timings = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        timings.append(_timed(port, event_headers))
+    stop.set()
+    for client in clients:
+        client.join()
+    server.shutdown()
+    hasher.shutdown()
+
+    timings.sort()
+    print(f"{label:<7} {statistics.median(baseline):>9.1f} {statistics.median(timings):>9.1f} "
+          f"{timings[int(len(timings) * 0.99) - 1]:>9.1f} {len(timings):>7} "
+          f"{outcomes[200]:>9} {outcomes[503]:>9}")
+
+
+def _timed(port, headers):
+    start = time.perf_counter()
+    _request(port, "GET", "/api/events?limit=20", headers=headers)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--logins", type=int, default=16)
+    args = parser.parse_args()
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.ERROR))
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    auth_service.users_db[EMAIL] = {"email": EMAIL, "password_hash": hash_password(PASSWORD),
+                                    "role": "volunteer", "user_id": "bench-user"}
+    pool = pool_from_env()
+    print(f"CPUs: {os.cpu_count()}, pool workers: {pool.workers}, login threads: {args.logins}")
+    print(f"{'mode':<7} {'idle_p50':>9} {'p50_ms':>9} {'p99_ms':>9} {'probes':>7} {'login_200':>9} {'login_503':>9}")
+    run("inline", HashingPool(workers=0, max_queue=0), args.seconds, args.logins)
+    run("pool", pool, args.seconds, args.logins)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Time to process SQS batches in handle_eventbridge_event, serially vs on the thread pool.
+
+SNS is the in-process LocalSNSClient with --latency-ms (+/-50% jitter) per publish.
+Each run pushes --batches batches of 10 NewEventCreated records through the handler.
+Two scenarios:
+
+  clean  every publish succeeds
+  stuck  one record per batch hangs for 3 s; NOTIFICATION_RECORD_TIMEOUT is 0.5 s,
+         so that record is reported in batchItemFailures and the rest still succeed
+
+Usage: python -m benchmarks.bench_notification_batch [--batches 20] [--latency-ms 50]
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import time
+
+os.environ.setdefault("DATABASE_URL", "memory://")
+
+import structlog
+
+from services.notification_service import app as notification_service
+from services.notification_service.dedup import DeliveryLog
+from services.notification_service.sns import LocalSNSClient, jittered
+from storage.memory import MemoryTable
+
+BATCH_SIZE = 10
+STUCK_SECONDS = 3.0
+
+
+def batch(number):
+    records = []
+    for i in range(BATCH_SIZE):
+        title = "stuck" if i == 0 else f"Cleanup {number}-{i}"
+        body = {"detail-type": "NewEventCreated", "detail": {"eventId": f"e{number}-{i}", "title": title, "organizerId": "org"}}
+        records.append({"messageId": f"{number}-{i}", "body": json.dumps(body)})
+    return records
+
+
+def run(workers, batches, latency, stuck):
+    sns = LocalSNSClient(latency=jittered(latency))
+    if stuck:
+        publish = sns.publish
+
+        def publish_or_hang(**kwargs):
+            if kwargs["Subject"].endswith("stuck"):
+                time.sleep(STUCK_SECONDS)
+            return publish(**kwargs)
+
+        sns.publish = publish_or_hang
+    notification_service.sns_client = sns
+    # Every run reuses the same message ids; don't let the previous run's deliveries suppress them
+    notification_service.deliveries = DeliveryLog(MemoryTable("notifications_log", "notificationId", ("userId",)))
+    notification_service.NOTIFICATION_WORKERS = workers
+    notification_service.NOTIFICATION_RECORD_TIMEOUT = 0.5 if stuck else 30.0
+
+    timings, failures = [], 0
+    for number in range(batches):
+        start = time.perf_counter()
+        result = notification_service.handle_eventbridge_event({"Records": batch(number)}, None)
+        timings.append((time.perf_counter() - start) * 1000)
+        failures += len(result["batchItemFailures"])
+    return statistics.median(timings), max(timings), failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batches", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    args = parser.parse_args()
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.CRITICAL))
+
+    print(f"{'scenario':<8} {'workers':>8} {'p50_batch_ms':>13} {'max_batch_ms':>13} {'reported_failed':>16}")
+    for stuck in (False, True):
+        for workers in (1, 10):
+            p50, worst, failures = run(workers, args.batches, args.latency_ms / 1000, stuck)
+            print(f"{'stuck' if stuck else 'clean':<8} {workers:>8} {p50:>13.1f} {worst:>13.1f} {failures:>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Time to notify every attendee of a cancelled event: one publish per user vs PublishBatch fan-out.
+
+SNS is the in-process LocalSNSClient with --latency-ms (+/-50% jitter) per call, for
+publish and publish_batch alike. The fan-out run handles the EventDeleted records the
+event service would publish for --attendees users (CANCELLATION_RECIPIENTS_PER_ENTRY
+each), through handle_eventbridge_event.
+
+Usage: python -m benchmarks.bench_notification_fanout [--attendees 5000] [--latency-ms 50]
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "memory://")
+
+import structlog
+
+from services.notification_service import app as notification_service
+from services.notification_service.sns import LocalSNSClient, jittered
+
+RECIPIENTS_PER_ENTRY = 250
+
+
+def serial(attendees, latency):
+    notification_service.sns_client = sns = LocalSNSClient(latency=jittered(latency))
+    start = time.perf_counter()
+    for user_id in attendees:
+        notification_service.send_notification_via_sns(user_id, "Event Cancelled: Beach Cleanup", "Cancelled", "EventDeleted")
+    return time.perf_counter() - start, sns.calls
+
+
+def fanned_out(attendees, latency):
+    notification_service.sns_client = sns = LocalSNSClient(latency=jittered(latency))
+    parts = [attendees[i:i + RECIPIENTS_PER_ENTRY] for i in range(0, len(attendees), RECIPIENTS_PER_ENTRY)]
+    records = []
+    for number, part in enumerate(parts, 1):
+        detail = {"eventId": "e1", "title": "Beach Cleanup", "attendeeIds": part, "part": number, "parts": len(parts)}
+        records.append({"messageId": str(number), "body": json.dumps({"detail-type": "EventDeleted", "detail": detail})})
+    start = time.perf_counter()
+    for batch in (records[i:i + 10] for i in range(0, len(records), 10)):  # SQS delivers up to 10 per invocation
+        assert not notification_service.handle_eventbridge_event({"Records": batch}, None)["batchItemFailures"]
+    return time.perf_counter() - start, sns.calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--attendees", type=int, default=5000)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--skip-serial", action="store_true", help="the serial run takes attendees x latency")
+    args = parser.parse_args()
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.CRITICAL))
+
+    attendees = [f"user-{i}" for i in range(args.attendees)]
+    print(f"{'mode':<10} {'attendees':>10} {'sns_calls':>10} {'seconds':>9}")
+    runs = [("fan-out", fanned_out)] if args.skip_serial else [("serial", serial), ("fan-out", fanned_out)]
+    for name, run in runs:
+        elapsed, calls = run(attendees, args.latency_ms / 1000)
+        print(f"{name:<10} {args.attendees:>10} {calls:>10} {elapsed:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Cost of a reminder-scheduler tick vs the number of pending reminders.
+
+Schedules --events events (two reminders each) on a simulated clock, then times ticks
+that find 0 and 100 reminders due (send is a no-op), each 30 seconds after the previous
+tick as with the background thread. A tick pulls the reminders that fell due since the
+last one from the table and reads each due one back before sending it. For comparison,
+"scan" is what a tick costs if it has to look at every pending reminder to find the due ones.
+
+Usage: python -m benchmarks.bench_reminder_scheduler [--events 10000 100000]
+"""
+
+import argparse
+import logging
+import os
+import time
+from datetime import datetime, timedelta, UTC
+
+os.environ.setdefault("DATABASE_URL", "memory://")
+
+import structlog
+
+from services.notification_service.reminders import ReminderScheduler
+from storage.memory import MemoryTable
+
+START = datetime(2030, 1, 1, tzinfo=UTC)
+
+
+def build(events):
+    clock = [START.timestamp()]
+    scheduler = ReminderScheduler(MemoryTable("event_reminders", "reminderId", ("eventId", "dueBucket")),
+                                  lambda reminder: None, clock=lambda: clock[0])
+    for i in range(events):
+        starts = START + timedelta(days=2, seconds=i)  # One event a second, so 24h reminders fall due a second apart
+        scheduler.schedule_event(f"e{i}", "Cleanup", starts.isoformat())
+    return scheduler, clock
+
+
+def time_tick(scheduler, clock, due):
+    # The last due reminder is due now; the first one fell due since the previous tick
+    clock[0] = (START + timedelta(days=1, seconds=due - 1)).timestamp() if due else START.timestamp()
+    now, clock[0] = clock[0], clock[0] - max(30, due)
+    scheduler.tick()
+    clock[0] = now
+    start = time.perf_counter()
+    sent = scheduler.tick()
+    return (time.perf_counter() - start) * 1000, sent
+
+
+def time_scan(scheduler, clock):
+    start = time.perf_counter()
+    due = [r for r in scheduler._pending.values() if r["dueAt"] <= clock[0]]
+    return (time.perf_counter() - start) * 1000, len(due)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    print(f"{'events':>8} {'pending':>8} {'due':>5} {'tick_ms':>9} {'scan_ms':>9}")
+    for events in args.events:
+        for due in (0, 100):
+            scheduler, clock = build(events)
+            pending = len(scheduler)
+            tick_ms, sent = time_tick(scheduler, clock, due)
+            scan_ms, _ = time_scan(scheduler, clock)
+            assert sent == due
+            print(f"{events:>8} {pending:>8} {due:>5} {tick_ms:>9.3f} {scan_ms:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
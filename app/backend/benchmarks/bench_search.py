@@ -0,0 +1,62 @@
+"""
+Query latency of the event SearchIndex over a synthetic corpus.
+
+Builds N events from a small vocabulary of cleanup titles, supplies and
+addresses, then reports p50/p99 latency for a mix of single-word, multi-word
+and prefix queries.
+
+Usage: python -m benchmarks.bench_search [--events 500000]
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from services.event_services.search_index import SearchIndex
+
+ACTIVITIES = ["Cleanup", "Litter Pick", "Tree Planting", "Restoration", "Recycling Drive", "Mural Repaint"]
+PLACES = ["Beach", "River", "Park", "Creek", "Lake", "Trail", "Harbor", "Canal", "Meadow", "Forest", "Dunes", "Marsh"]
+ADJECTIVES = ["Saturday", "Sunrise", "Community", "Neighborhood", "Family", "Volunteer", "Spring", "Autumn"]
+SUPPLIES = ["Gloves and bags provided", "Bring water", "Grabbers provided", "Wear boots", "Buckets and rakes", "Bring your own if possible."]
+STREETS = ["Main St", "Ocean Ave", "Riverside Dr", "Park Blvd", "Harbor Way", "Lakeview Rd", "Forest Ln"]
+CITIES = ["Santa Monica", "Portland", "Austin", "Boston", "Denver", "Seattle", "Miami", "Chicago"]
+
+QUERIES = ["beach", "river cleanup", "riv", "sunrise tree planting", "harbor gloves", "oce", "community marsh restoration", "zebra"]
+
+
+def synthetic_event(rng, i):
+    # Every event also carries a unique code word, so the vocabulary grows with the corpus
+    title = f"{rng.choice(ADJECTIVES)} {rng.choice(PLACES)} {rng.choice(ACTIVITIES)} {i:x}"
+    address = f"{rng.randint(1, 9999)} {rng.choice(STREETS)}, {rng.choice(CITIES)}"
+    return {"title": title, "address": address, "supplies": rng.choice(SUPPLIES)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    rng = random.Random(7)
+
+    index = SearchIndex()
+    start = time.perf_counter()
+    for i in range(args.events):
+        index.add(f"event-{i}", synthetic_event(rng, i))
+    print(f"indexed {len(index)} events in {time.perf_counter() - start:.1f}s\n")
+
+    print(f"{'query':<30} {'hits':>8} {'p50_ms':>8} {'p99_ms':>8}")
+    for query in QUERIES:
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            results = index.search(query, limit=20)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        hits = len(results)
+        print(f"{query:<30} {hits:>8} {statistics.median(timings):>8.2f} {p99:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Throughput of the storage backends for the event service's access patterns.
+
+Single-process series: point writes, batched writes (put_many), point reads and
+batched reads (get_many of a page of ids), for the memory and SQLite backends.
+
+With --processes N, N worker processes write disjoint events into one SQLite
+file at the same time, the way several gunicorn workers would, and every event
+is then read back through a fresh connection to check none were lost.
+
+Usage: python -m benchmarks.bench_storage [--events 20000] [--processes 4]
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from storage.memory import MemoryTable
+from storage.sqlite import ConnectionPool, SQLiteTable
+
+PAGE_SIZE = 50
+
+
+def _event(i, prefix="event"):
+    return {
+        "eventId": f"{prefix}-{i}",
+        "organizerId": f"org-{i % 100}",
+        "title": f"Beach Cleanup {i}",
+        "location": {"latitude": 34.0, "longitude": -118.4, "address": "Santa Monica Beach"},
+        "dateTime": "2025-07-15T09:00:00Z",
+        "capacity": 50,
+    }
+
+
+def _rate(count, started):
+    return count / (time.perf_counter() - started)
+
+
+def run_series(label, table, count, rng):
+    events = [_event(i) for i in range(count)]
+
+    started = time.perf_counter()
+    for event in events[: count // 10]:
+        table[event["eventId"]] = event
+    point_writes = _rate(count // 10, started)
+
+    started = time.perf_counter()
+    for start in range(0, count, 100):
+        table.put_many(events[start:start + 100])
+    batch_writes = _rate(count, started)
+
+    ids = [event["eventId"] for event in events]
+    started = time.perf_counter()
+    for _ in range(count // 10):
+        table.get(rng.choice(ids))
+    point_reads = _rate(count // 10, started)
+
+    pages = count // PAGE_SIZE
+    started = time.perf_counter()
+    for _ in range(pages):
+        table.get_many(rng.sample(ids, PAGE_SIZE))
+    page_reads = _rate(pages * PAGE_SIZE, started)
+
+    print(f"{label:<8} {point_writes:>12,.0f} {batch_writes:>12,.0f} {point_reads:>12,.0f} {page_reads:>12,.0f}")
+
+
+def _writer(path, worker, count):
+    pool = ConnectionPool(path, size=1)
+    table = SQLiteTable(pool, "events", "eventId", indexes=("organizerId",))
+    for start in range(0, count, 50):
+        table.put_many(_event(i, prefix=f"worker{worker}") for i in range(start, min(start + 50, count)))
+    pool.close()
+
+
+def run_multiprocess(path, processes, count):
+    per_worker = count // processes
+    SQLiteTable(ConnectionPool(path, size=1), "events", "eventId", indexes=("organizerId",)).clear()
+    started = time.perf_counter()
+    workers = [multiprocessing.Process(target=_writer, args=(path, w, per_worker)) for w in range(processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    table = SQLiteTable(ConnectionPool(path, size=1), "events", "eventId")
+    expected = per_worker * processes
+    print(f"\n{processes} processes wrote {expected:,} events in {elapsed:.2f}s "
+          f"({expected / elapsed:,.0f} writes/s); read back {len(table):,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=20_000)
+    parser.add_argument("--processes", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        print(f"ops/s     {'put':>12} {'put_many':>12} {'get':>12} {'get_many':>12}")
+        run_series("memory", MemoryTable("events", "eventId"), args.events, rng)
+        pool = ConnectionPool(path)
+        run_series("sqlite", SQLiteTable(pool, "events", "eventId", indexes=("organizerId",)), args.events, rng)
+        pool.close()
+        if args.processes:
+            run_multiprocess(path, args.processes, args.events)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+POST /auth/refresh throughput as the user table grows, with and without the user_id index.
+
+Refresh has to confirm that the token's user still exists. "scan" resolves the
+user id by walking every user (the previous behaviour); "indexed" uses the
+user_id index on the users table.
+
+Usage: python -m benchmarks.bench_token_refresh [--max-users 1000000]
+"""
+
+import argparse
+import logging
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "memory://")
+
+import structlog
+from flask_jwt_extended import create_refresh_token
+
+from services.auth_services import app as auth_service
+from storage.memory import MemoryTable
+
+MIN_SECONDS = 2.0
+
+
+def build_tables(count):
+    indexed = MemoryTable("users", "email", indexes=("user_id",))
+    scanned = MemoryTable("users", "email")
+    for i in range(count):
+        email = f"user{i}@example.com"
+        user = {"email": email, "user_id": f"mem_{email}", "role": "volunteer", "password_hash": "x"}
+        indexed[email] = user
+        scanned[email] = user
+    return indexed, scanned
+
+
+def refreshes_per_second(table, headers):
+    auth_service.users_db = table
+    done = 0
+    start = time.perf_counter()
+    with auth_service.app.test_client() as http:
+        while time.perf_counter() - start < MIN_SECONDS:
+            assert http.post("/auth/refresh", headers=headers).status_code == 200
+            done += 1
+    return done / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-users", type=int, default=1_000_000)
+    args = parser.parse_args()
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    print(f"{'users':>9} {'scan_rps':>10} {'indexed_rps':>12}")
+    for count in (s for s in (1_000, 100_000, 1_000_000) if s <= args.max_users):
+        indexed, scanned = build_tables(count)
+        # The last user, so the scan has to walk the whole table
+        with auth_service.app.app_context():
+            token = create_refresh_token(identity=f"mem_user{count - 1}@example.com")
+        headers = {"Authorization": f"Bearer {token}"}
+        print(f"{count:>9} {refreshes_per_second(scanned, headers):>10.1f} {refreshes_per_second(indexed, headers):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,8 @@ load_dotenv()
 
 class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "default-secret-key")
-    DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///default.db")
+    # In-process unless configured, so tests and scripts don't leave a database file in the working directory
+    DATABASE_URL = os.getenv("DATABASE_URL", "memory://")
     DEBUG = os.getenv("DEBUG", "False").lower() in ("true", "1", "t")
 
 config = Config()
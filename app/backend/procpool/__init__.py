@@ -0,0 +1,91 @@
+"""
+CPU-bound work off the request thread, in a bounded process pool that sheds load when saturated.
+
+Shared by the auth service (password hashing) and the user service (avatar
+thumbnails): both would rather answer 503 at once than queue requests behind
+seconds of work.
+"""
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import structlog
+
+logger = structlog.get_logger()
+
+
+class PoolBusy(Exception):
+    """Raised when the pool is saturated (or too slow) and the request should get a 503."""
+
+
+class BoundedProcessPool:
+    """
+    Runs functions in ``workers`` separate processes, admitting at most ``workers + max_queue`` calls at once.
+
+    Beyond that, ``run`` fails immediately with ``busy`` (a PoolBusy subclass)
+    rather than queueing behind work that would take seconds to drain. An
+    admitted call that still hasn't finished after ``timeout`` seconds raises it
+    too, as does one whose worker died; the pool is then restarted for the next
+    caller. ``initializer(*initargs)`` runs in each worker as it starts. Log
+    events are named ``<log_name>.shed`` and so on.
+
+    With ``workers=0`` calls run inline on the caller's thread (no pool).
+    """
+
+    busy = PoolBusy
+    log_name = "procpool"
+    description = "Worker pool"
+
+    def __init__(self, workers, max_queue, timeout, initializer=None, initargs=()):
+        self.workers = workers
+        self.timeout = timeout
+        self._initializer = initializer
+        self._initargs = initargs
+        self._slots = threading.BoundedSemaphore(workers + max_queue) if workers else None
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self):
+        # Started lazily and with "spawn", so importing the app neither forks nor inherits its threads
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=self._initializer,
+                    initargs=self._initargs,
+                )
+            return self._executor
+
+    def run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            logger.warn(f"{self.log_name}.shed", operation=fn.__name__)
+            raise self.busy(f"{self.description} is saturated")
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is held until the work actually finishes, even if this caller gives up waiting
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            logger.warn(f"{self.log_name}.timeout", operation=fn.__name__, timeout=self.timeout)
+            raise self.busy(f"{self.description} timed out") from None
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); start a fresh pool for the next caller
+            logger.error(f"{self.log_name}.pool_broken")
+            with self._executor_lock:
+                self._executor = None
+            raise self.busy(f"{self.description} pool restarted") from None
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
@@ -0,0 +1,39 @@
+"""Tests for the bounded process pool."""
+
+import threading
+import time
+
+import pytest
+
+from procpool import BoundedProcessPool, PoolBusy
+
+
+class _Busy(PoolBusy):
+    pass
+
+
+class _Pool(BoundedProcessPool):
+    busy = _Busy
+    log_name = "test.pool"
+    description = "Test work"
+
+
+def test_inline_pool_runs_on_the_callers_thread():
+    pool = _Pool(workers=0, max_queue=0, timeout=1.0)
+    assert pool.run(threading.get_ident) == threading.get_ident()
+
+
+def test_slow_calls_time_out_and_saturated_pools_shed():
+    pool = _Pool(workers=1, max_queue=0, timeout=0.2)
+    try:
+        with pytest.raises(_Busy, match="Test work timed out"):
+            pool.run(time.sleep, 1.0)
+        # The slot stays taken until the sleep actually ends, so the next call is shed at once
+        with pytest.raises(_Busy, match="Test work is saturated"):
+            pool.run(time.sleep, 0)
+        deadline = time.monotonic() + 10
+        while not pool._slots._value and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert pool.run(abs, -3) == 3
+    finally:
+        pool.shutdown()
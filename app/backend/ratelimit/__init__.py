@@ -0,0 +1,161 @@
+"""
+Per-client rate limiting for the gateway.
+
+``init_rate_limits(app)`` gives every client a token bucket per route budget:
+the bucket holds ``burst`` requests and refills at ``per_minute`` requests a
+minute. Clients are told apart by the identity in their JWT when they send a
+valid one, and by IP address otherwise. A request that finds its bucket empty
+gets 429 with ``Retry-After`` and never reaches the service.
+
+Budgets are matched by method and path, exactly (``GET /api/events`` doesn't
+cover ``/api/events/<id>``) or by prefix when they end in ``/*``, and can be
+overridden with ``RATE_LIMITS`` (JSON, e.g. ``{"POST /api/auth/login": [10, 5]}``).
+Buckets live in the process by default; with ``RATE_LIMIT_STORE=sqlite:///ratelimit.db``
+all workers on the host share them.
+"""
+
+import json
+import math
+import os
+
+import structlog
+from flask import request
+from flask_jwt_extended import decode_token
+
+from storage import sqlite_path
+from storage.sqlite import pool_for
+from .buckets import MemoryBucketStore, SQLiteBucketStore
+
+logger = structlog.get_logger()
+
+
+class Limit:
+    """``per_minute`` sustained requests, with bursts of up to ``burst`` (default: ``per_minute``)."""
+
+    def __init__(self, per_minute, burst=None):
+        burst = per_minute if burst is None else burst
+        # A zero rate would divide by zero when a bucket works out its refill; a zero burst admits nothing
+        if not per_minute > 0 or not burst > 0:
+            raise ValueError(f"Rate limits must be positive, got {per_minute} per minute with bursts of {burst}")
+        self.per_minute = per_minute
+        self.rate = per_minute / 60.0
+        self.burst = burst
+
+    def __repr__(self):
+        return f"Limit({self.per_minute}, burst={self.burst})"
+
+
+# PBKDF2-heavy and full-table routes get tight budgets; everything else under /api (event details
+# included) shares the default
+DEFAULT_LIMITS = {
+    "POST /api/auth/login": Limit(10, burst=5),
+    "POST /api/auth/signup": Limit(5, burst=3),
+    "POST /api/auth/refresh": Limit(30, burst=10),
+    "GET /api/events": Limit(60, burst=20),
+    "/api/*": Limit(300, burst=100),
+}
+
+
+class RateLimiter:
+    """
+    Picks the budget for a request, finds the client's bucket in ``store`` and spends from it.
+
+    ``limits`` maps ``"METHOD /path"`` or ``"/path"`` to a Limit. A path covers
+    only itself, unless it ends in ``/*``: then it is a prefix, covering the path
+    and everything below it. An exact path beats any prefix. Requests matching no
+    budget are not limited. ``trusted_proxies`` is the number of proxies in front of the
+    app that append to X-Forwarded-For; with 0 the socket address is the client.
+    """
+
+    def __init__(self, store, limits, trusted_proxies=0):
+        self.store = store
+        self.trusted_proxies = trusted_proxies
+        self.limited = 0
+        self._exact = {}  # (method or None, path) -> (name, limit)
+        rules = []
+        for name, limit in limits.items():
+            method, _, path = name.rpartition(" ")
+            method = method.upper() or None
+            if path.endswith("/*"):
+                rules.append((path[:-2].rstrip("/") or "/", method, name, limit))
+            else:
+                self._exact[(method, path.rstrip("/") or "/")] = (name, limit)
+        # Longest prefix first; at equal length a method-specific budget beats an any-method one
+        self._rules = sorted(rules, key=lambda rule: (-len(rule[0]), rule[1] is None))
+
+    def limit_for(self, method, path):
+        path = path.rstrip("/") or "/"
+        exact = self._exact.get((method, path)) or self._exact.get((None, path))
+        if exact:
+            return exact
+        for prefix, rule_method, name, limit in self._rules:
+            if rule_method not in (None, method):
+                continue
+            if prefix == "/" or path == prefix or path.startswith(prefix + "/"):
+                return name, limit
+        return None, None
+
+    def client_ip(self):
+        if self.trusted_proxies:
+            forwarded = [hop.strip() for hop in request.headers.get("X-Forwarded-For", "").split(",") if hop.strip()]
+            if len(forwarded) >= self.trusted_proxies:
+                return forwarded[-self.trusted_proxies]
+        return request.remote_addr or "unknown"
+
+    def client_key(self):
+        auth = request.headers.get("Authorization", "")
+        if auth.startswith("Bearer "):
+            try:
+                # Verified, not just parsed, so a forged token can't spend someone else's budget.
+                # The decode cache makes the service's own check of the same token free.
+                return f"user:{decode_token(auth[len('Bearer '):])['sub']}"
+            except Exception:
+                pass  # Invalid tokens are rejected by the route itself; limit them by IP
+        return f"ip:{self.client_ip()}"
+
+    def check(self):
+        """A ``before_request`` hook: returns a 429 response when the client is over budget."""
+        if request.method == "OPTIONS":
+            return None  # CORS preflights carry no credentials and do no work
+        name, limit = self.limit_for(request.method, request.path)
+        if limit is None:
+            return None
+        client = self.client_key()
+        wait = self.store.take(f"{name}|{client}", limit.rate, limit.burst)
+        if not wait:
+            return None
+        self.limited += 1
+        retry_after = max(1, math.ceil(wait))
+        logger.warn("gateway.rate_limited", route=name, client=client, retry_after=retry_after)
+        return {"message": "Too many requests, please retry shortly"}, 429, {"Retry-After": str(retry_after)}
+
+
+def limits_from_env():
+    limits = dict(DEFAULT_LIMITS)
+    for name, value in json.loads(os.environ.get("RATE_LIMITS", "{}")).items():
+        per_minute, burst = value if isinstance(value, list) else (value, None)
+        limits[name] = Limit(per_minute, burst)
+    return limits
+
+
+def store_from_env():
+    url = os.environ.get("RATE_LIMIT_STORE", "memory://")
+    if url.startswith("memory:"):
+        return MemoryBucketStore(max_buckets=int(os.environ.get("RATE_LIMIT_MAX_BUCKETS", "100000")))
+    if url.startswith("sqlite:"):
+        return SQLiteBucketStore(pool_for(sqlite_path(url), size=int(os.getenv("DATABASE_POOL_SIZE", "8"))))
+    raise ValueError(f"Unsupported RATE_LIMIT_STORE scheme: {url}")
+
+
+def init_rate_limits(app, limiter=None):
+    """Installs the limiter (by default configured from the environment) in front of every route of ``app``."""
+    if limiter is None:
+        if os.environ.get("RATE_LIMIT_ENABLED", "true").lower() not in ("true", "1", "t"):
+            return None
+        limiter = RateLimiter(
+            store_from_env(),
+            limits_from_env(),
+            trusted_proxies=int(os.environ.get("RATE_LIMIT_TRUSTED_PROXIES", "0")),
+        )
+    app.before_request(limiter.check)
+    return limiter
@@ -0,0 +1,115 @@
+"""Token-bucket state: in-process (bounded, idle buckets evicted) or in a SQLite file shared by workers."""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+def _refill(tokens, updated_at, now, rate, burst):
+    return min(burst, tokens + max(0.0, now - updated_at) * rate)
+
+
+class MemoryBucketStore:
+    """
+    Buckets in an LRU-ordered dict, holding at most ``max_buckets`` of them.
+
+    A bucket that has refilled completely is indistinguishable from one that was
+    never created, so buckets are dropped as soon as they are full again (checked
+    from the least recently used end on every take). If ``max_buckets`` is still
+    exceeded, the least recently used bucket goes even if it isn't full; that
+    client's debt is forgiven, which is the price of the memory bound.
+    """
+
+    def __init__(self, max_buckets=100_000, clock=time.monotonic):
+        self.max_buckets = max_buckets
+        self.clock = clock
+        self.evicted_early = 0  # Buckets dropped before they had refilled
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at, full_at)
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, cost=1.0):
+        """Spends ``cost`` tokens from the bucket; returns 0 if admitted, else seconds until it would be."""
+        now = self.clock()
+        with self._lock:
+            bucket = self._buckets.pop(key, None)
+            tokens = burst if bucket is None else _refill(bucket[0], bucket[1], now, rate, burst)
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / rate
+            self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+            self._evict(now)
+        return wait
+
+    def _evict(self, now):
+        buckets = self._buckets
+        while buckets:
+            full_at = buckets[next(iter(buckets))][2]
+            if full_at > now:
+                if len(buckets) <= self.max_buckets:
+                    return
+                self.evicted_early += 1
+            buckets.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class SQLiteBucketStore:
+    """
+    Buckets in a SQLite table, so every worker process on the host spends from the same budget.
+
+    Each take is one short ``BEGIN IMMEDIATE`` transaction (read, refill, write).
+    Wall-clock time is used because the buckets are shared between processes.
+    Every ``prune_every`` takes, buckets that have refilled are deleted.
+    """
+
+    def __init__(self, pool, table="rate_buckets", clock=time.time, prune_every=1000):
+        self.pool = pool
+        self.clock = clock
+        self.prune_every = prune_every
+        self._takes = 0
+        self._sql_get = f"SELECT tokens, updated_at FROM {table} WHERE key = ?"
+        self._sql_put = (f"INSERT INTO {table} (key, tokens, updated_at, full_at) VALUES (?, ?, ?, ?) "
+                         "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, "
+                         "updated_at = excluded.updated_at, full_at = excluded.full_at")
+        self._sql_prune = f"DELETE FROM {table} WHERE full_at <= ?"
+        self._sql_clear = f"DELETE FROM {table}"
+        self._sql_count = f"SELECT COUNT(*) FROM {table}"
+        with pool.transaction() as connection:
+            connection.execute(f"CREATE TABLE IF NOT EXISTS {table} "
+                               "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, full_at REAL NOT NULL)")
+            connection.execute(f"CREATE INDEX IF NOT EXISTS {table}_full_at ON {table} (full_at)")
+
+    def take(self, key, rate, burst, cost=1.0):
+        now = self.clock()
+        with self.pool.transaction() as connection:
+            row = connection.execute(self._sql_get, (key,)).fetchone()
+            tokens = burst if row is None else _refill(row[0], row[1], now, rate, burst)
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / rate
+            connection.execute(self._sql_put, (key, tokens, now, now + (burst - tokens) / rate))
+        self._takes += 1
+        if self._takes % self.prune_every == 0:
+            self.prune()
+        return wait
+
+    def prune(self):
+        with self.pool.connection() as connection:
+            return connection.execute(self._sql_prune, (self.clock(),)).rowcount
+
+    def clear(self):
+        with self.pool.connection() as connection:
+            connection.execute(self._sql_clear)
+
+    def __len__(self):
+        with self.pool.connection() as connection:
+            return connection.execute(self._sql_count).fetchone()[0]
@@ -0,0 +1,116 @@
+"""Tests for the gateway rate limiter."""
+
+import pytest
+from flask import Flask
+from flask_jwt_extended import create_access_token
+
+from ratelimit import Limit, RateLimiter, init_rate_limits
+from ratelimit.buckets import MemoryBucketStore, SQLiteBucketStore
+from storage.sqlite import ConnectionPool
+from tokens import init_jwt
+
+
+class _Clock:
+    def __init__(self, now=1_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_bucket_allows_bursts_then_refills_at_the_rate():
+    clock = _Clock()
+    store = MemoryBucketStore(clock=clock)
+    assert [store.take("k", rate=1.0, burst=3) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert store.take("k", rate=1.0, burst=3) == 1.0  # Empty: the next token is a second away
+    clock.now += 0.5
+    assert store.take("k", rate=1.0, burst=3) == 0.5
+    clock.now += 0.5
+    assert store.take("k", rate=1.0, burst=3) == 0.0
+
+
+def test_refilled_buckets_are_evicted_and_memory_is_bounded():
+    clock = _Clock()
+    store = MemoryBucketStore(max_buckets=3, clock=clock)
+    store.take("a", rate=1.0, burst=2)
+    store.take("b", rate=1.0, burst=2)
+    clock.now += 1.0  # "a" and "b" are full again on the next take
+    store.take("c", rate=1.0, burst=2)
+    assert len(store) == 1 and store.evicted_early == 0
+
+    for key in "defg":
+        store.take(key, rate=1.0, burst=2)
+    assert len(store) == 3
+    assert store.evicted_early == 2  # "c" and "d" had to go before refilling
+
+
+def test_sqlite_buckets_are_shared_between_stores(tmp_path):
+    clock = _Clock()
+    pool = ConnectionPool(str(tmp_path / "limits.db"), size=2)
+    first, second = SQLiteBucketStore(pool, clock=clock), SQLiteBucketStore(pool, clock=clock)
+    assert first.take("k", rate=1.0, burst=2) == 0.0
+    assert second.take("k", rate=1.0, burst=2) == 0.0
+    assert first.take("k", rate=1.0, burst=2) == 1.0
+    clock.now += 5
+    assert first.prune() == 1 and len(first) == 0
+    pool.close()
+
+
+def test_most_specific_budget_wins():
+    default, login, events, users = Limit(300), Limit(10), Limit(60), Limit(30)
+    limiter = RateLimiter(MemoryBucketStore(), {"/api/*": default, "POST /api/auth/login": login,
+                                                "GET /api/events": events, "/api/users/*": users})
+    assert limiter.limit_for("POST", "/api/auth/login")[1] is login
+    assert limiter.limit_for("GET", "/api/auth/login")[1] is default
+    assert limiter.limit_for("GET", "/api/events")[1] is events
+    assert limiter.limit_for("GET", "/api/events/")[1] is events
+    assert limiter.limit_for("GET", "/api/events/123")[1] is default  # Exact paths don't cover what is below them
+    assert limiter.limit_for("POST", "/api/events")[1] is default
+    assert limiter.limit_for("GET", "/api/users")[1] is users
+    assert limiter.limit_for("GET", "/api/users/u-1/avatar")[1] is users
+    assert limiter.limit_for("GET", "/api/usersx")[1] is default
+    assert limiter.limit_for("GET", "/health") == (None, None)
+
+
+def _app(limits):
+    app = Flask(__name__)
+    app.config["JWT_SECRET_KEY"] = "test-secret-key-of-reasonable-length"
+    init_jwt(app)
+    limiter = init_rate_limits(app, RateLimiter(MemoryBucketStore(), limits))
+
+    @app.route("/api/events")
+    def events():
+        return {"events": []}
+
+    return app, limiter
+
+
+def test_over_budget_requests_get_429_with_retry_after():
+    app, limiter = _app({"/api/events": Limit(6, burst=2)})
+    client = app.test_client()
+    assert [client.get("/api/events").status_code for _ in range(2)] == [200, 200]
+    response = client.get("/api/events")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "10"  # 6 a minute: one token every 10 s
+    assert limiter.limited == 1
+    assert client.open("/api/events", method="OPTIONS").status_code != 429
+
+
+def test_clients_are_keyed_by_jwt_identity_then_ip():
+    app, _ = _app({"/api/events": Limit(1, burst=1)})
+    with app.app_context():
+        alice = {"Authorization": f"Bearer {create_access_token(identity='alice')}"}
+        bob = {"Authorization": f"Bearer {create_access_token(identity='bob')}"}
+    client = app.test_client()
+    assert client.get("/api/events", headers=alice).status_code == 200
+    assert client.get("/api/events", headers=alice).status_code == 429
+    assert client.get("/api/events", headers=bob).status_code == 200  # Same IP, different user
+    assert client.get("/api/events").status_code == 200  # Anonymous: the IP's own bucket
+    assert client.get("/api/events", headers={"Authorization": "Bearer forged"}).status_code == 429  # Falls back to IP
+
+
+def test_limits_must_be_positive():
+    for per_minute, burst in ((0, None), (-5, None), (10, 0), (10, -1)):
+        with pytest.raises(ValueError, match="must be positive"):
+            Limit(per_minute, burst)
+    assert Limit(10).burst == 10
@@ -4,20 +4,26 @@ from flask import Flask, request, jsonify
 from flask_restful import Api, Resource
 import boto3 # For Cognito integration
 from flask_jwt_extended import (
-    create_access_token, create_refresh_token, jwt_required, get_jwt_identity, JWTManager
+    create_access_token, create_refresh_token, decode_token, get_jwt, get_jwt_identity, jwt_required
 )
+from flask_jwt_extended.exceptions import JWTDecodeError
+from jwt import InvalidTokenError
+import atexit
 import structlog
 import os
 
-from .utils import hash_password, verify_password
+from .hashing import HashingOverloaded, pool_from_env
+from .utils import needs_rehash
+from storage import open_table
+from tokens import init_jwt
+from tokens.revocation import RevocationList
 from config import config
 
 app = Flask(__name__)
 
 # Configuration
 app.config["JWT_SECRET_KEY"] = os.environ.get("JWT_SECRET_KEY", "super-secret-key-for-dev-only") # Change this in production!
-app.config["JWT_ACCESS_TOKEN_EXPIRES"] = False # Or set a specific timedelta, e.g., timedelta(hours=1)
-app.config["JWT_REFRESH_TOKEN_EXPIRES"] = False # Or set a specific timedelta, e.g., timedelta(days=30)
+# Token lifetimes are set by init_jwt (JWT_ACCESS_TOKEN_MINUTES, JWT_REFRESH_TOKEN_DAYS)
 
 # AWS Cognito Configuration (placeholders - to be set via environment variables in Lambda)
 COGNITO_USER_POOL_ID = os.environ.get("COGNITO_USER_POOL_ID")
@@ -28,14 +34,74 @@ COGNITO_REGION = os.environ.get("AWS_REGION", "us-east-1")
 # cognito_client = boto3.client("cognito-idp", region_name=COGNITO_REGION) # Uncomment when Cognito is provisioned
 
 api = Api(app)
-jwt = JWTManager(app)
+jwt = init_jwt(app)
 logger = structlog.get_logger()
 
+# PBKDF2 runs in a bounded process pool so a login spike can't starve every other route.
+# Requests that find it saturated get a 503 straight away.
+password_hasher = pool_from_env()
+atexit.register(password_hasher.shutdown)
+HASHING_RETRY_AFTER_SECONDS = 1
+
+def hashing_unavailable(event_name, email):
+    logger.warn(event_name, email=email)
+    return {"message": "Too many sign-in requests, please retry shortly"}, 503, {"Retry-After": str(HASHING_RETRY_AFTER_SECONDS)}
+
+def upgrade_password_hash(email, user, password):
+    """
+    Re-hashes a just-verified password whose stored hash is below the current cost.
+
+    Best effort: if the pool is saturated the login still succeeds, and the
+    upgrade is tried again on the user's next login.
+    """
+    if not needs_rehash(user["password_hash"]):
+        return
+    try:
+        new_hash = password_hasher.hash_password(password)
+    except HashingOverloaded:
+        logger.info("auth.login.rehash_deferred", email=email)
+        return
+    users_db[email] = {**user, "password_hash": new_hash}
+    logger.info("auth.login.rehashed", email=email, method=new_hash.split("$", 1)[0])
+
 # In-memory user store for demonstration (replace with Cognito/DynamoDB as per PRD)
 # This will be replaced with AWS Cognito integration and DynamoDB for user data persistence.
-users_db = {}
+# Keyed by email; AuthUserModel is keyed by the Cognito sub, so users are stored as plain documents
+users_db = open_table("users", key_field="email", indexes=("user_id",))
 # Example: users_db = {"testuser@example.com": {"password_hash": "hashed_password_string", "role": "volunteer", "email": "testuser@example.com", "user_id": "cognito_sub_or_uuid"}}
 
+# Revoked refresh tokens by jti. The Bloom filter in front of the table is rebuilt from it here,
+# so checking a token that isn't revoked (nearly all of them) costs no storage read. A background
+# thread keeps it in step with other workers' revocations and prunes expired ones.
+revoked_tokens_db = open_table("revoked_tokens", key_field="jti", indexes=("revokedBucket",))
+revocation_list = RevocationList(
+    revoked_tokens_db,
+    capacity=int(os.environ.get("REVOCATION_FILTER_CAPACITY", "1000000")),
+    sync_interval=float(os.environ.get("REVOCATION_SYNC_SECONDS", "30")),
+    prune_interval=float(os.environ.get("REVOCATION_PRUNE_SECONDS", "3600")),
+)
+revocation_list.rebuild()
+if revocation_list.sync_interval > 0:
+    revocation_list.start()
+    atexit.register(revocation_list.stop)
+
+def normalize_email(email):
+    """Emails are stored and looked up lower-cased, so "Jane@Example.com" and "jane@example.com" are one user."""
+    return email.strip().lower()
+
+def existing_identities(identities):
+    """
+    The subset of ``identities`` (user ids or emails) that still belong to a user.
+
+    User ids are resolved through the ``user_id`` index and emails by key, so the
+    cost is one lookup per identity regardless of how many users exist.
+    """
+    identities = set(identities)
+    found = {user["user_id"] for user in users_db.find_many("user_id", identities)}
+    emails = {normalize_email(identity): identity for identity in identities - found if "@" in identity}
+    found.update(emails[email] for email in users_db.get_many(emails))
+    return found
+
 class Signup(Resource):
     def post(self):
         data = request.get_json()
@@ -50,12 +116,14 @@ class Signup(Resource):
         if not email or not password:
             logger.warn("auth.signup.missing_fields", email=email)
             return {"message": "Email and password are required"}, 400
+        email = normalize_email(email)
 
         if "@" not in email or "." not in email: # Basic email validation
             logger.warn("auth.signup.invalid_email_format", email=email)
             return {"message": "Invalid email format"}, 400
 
         # TODO: Replace in-memory check with Cognito user existence check if possible or rely on Cognito's own error for existing user.
+        # Saves hashing a password for a known email; the conditional insert below is what stops concurrent signups
         if email in users_db:
             logger.warn("auth.signup.user_exists", email=email)
             return {"message": "User already exists"}, 409 # Conflict
@@ -85,8 +153,13 @@ class Signup(Resource):
         # --- End Cognito Integration Point ---
 
         # Fallback to in-memory for now if Cognito is not active
-        hashed_pw = hash_password(password)
-        users_db[email] = {"password_hash": hashed_pw, "role": role, "email": email, "user_id": f"mem_{email}"}
+        try:
+            hashed_pw = password_hasher.hash_password(password)
+        except HashingOverloaded:
+            return hashing_unavailable("auth.signup.hashing_overloaded", email)
+        if not users_db.insert({"password_hash": hashed_pw, "role": role, "email": email, "user_id": f"mem_{email}"}):
+            logger.warn("auth.signup.user_exists", email=email)
+            return {"message": "User already exists"}, 409
         logger.info("auth.signup.success_in_memory", email=email, role=role)
         return {"message": "User created successfully (in-memory)"}, 201
 
@@ -103,6 +176,7 @@ class Login(Resource):
         if not email or not password:
             logger.warn("auth.login.missing_fields", email=email)
             return {"message": "Email and password are required"}, 400
+        email = normalize_email(email)
 
         # --- AWS Cognito Integration Point for Login ---
         # try:
@@ -136,7 +210,12 @@ class Login(Resource):
 
         # Fallback to in-memory for now if Cognito is not active
         user = users_db.get(email)
-        if user and verify_password(user["password_hash"], password):
+        try:
+            password_ok = bool(user) and password_hasher.verify_password(user["password_hash"], password)
+        except HashingOverloaded:
+            return hashing_unavailable("auth.login.hashing_overloaded", email)
+        if password_ok:
+            upgrade_password_hash(email, user, password)
             # For local JWT generation if not using Cognito tokens directly
             # The identity should be something unique, like user_id from Cognito (sub) or our DB
             user_identity = user.get("user_id", email) # Use user_id if available
@@ -157,6 +236,11 @@ class TokenRefresh(Resource):
     def post(self):
         current_user_identity = get_jwt_identity() # This will be user_id or email based on login
 
+        # Checked here rather than in a blocklist loader so it also applies when mounted in the gateway
+        if revocation_list.is_revoked(get_jwt()["jti"]):
+            logger.warn("auth.refresh.revoked", identity=current_user_identity)
+            return {"message": "Refresh token has been revoked"}, 401
+
         # --- AWS Cognito Integration Point for Refresh ---
         # If using Cognito tokens, refresh might be handled differently or directly with Cognito
         # For example, using cognito_client.initiate_auth with REFRESH_TOKEN_AUTH
@@ -164,19 +248,9 @@ class TokenRefresh(Resource):
         # If Cognito provides the JWTs, this endpoint might not be needed or would proxy to Cognito.
         # --- End Cognito Integration Point ---
 
-        # Check if user still exists (important if using local JWTs and local user store)
-        # This check needs to be adapted based on how identity (email vs user_id) is stored and retrieved.
-        user_exists = False
-        if "@" in current_user_identity: # Assuming identity is email
-            if current_user_identity in users_db:
-                user_exists = True
-        else: # Assuming identity is a user_id
-            for u_email, u_data in users_db.items():
-                if u_data.get("user_id") == current_user_identity:
-                    user_exists = True
-                    break
-        
-        if not user_exists:
+        # Check if user still exists (important if using local JWTs and local user store).
+        # The identity is a user_id (local ids like "mem_<email>" contain an "@" too) or an email.
+        if current_user_identity not in existing_identities([current_user_identity]):
             logger.warn("auth.refresh.user_not_found", identity=current_user_identity)
             return {"message": "User not found for token refresh"}, 404
 
@@ -184,10 +258,42 @@ class TokenRefresh(Resource):
         logger.info("auth.refresh.success", identity=current_user_identity)
         return {"access_token": access_token}, 200
 
+class Logout(Resource):
+    @jwt_required(refresh=True)
+    def post(self):
+        """Revokes the refresh token the request was made with."""
+        claims = get_jwt()
+        revocation_list.revoke(claims["jti"], expires_at=claims.get("exp"), reason="logout")
+        logger.info("auth.logout.success", identity=claims["sub"])
+        return {"message": "Logged out"}, 200
+
+class RevokeToken(Resource):
+    @jwt_required()
+    def post(self):
+        """Revokes one of the caller's own refresh tokens, e.g. from a lost device."""
+        data = request.get_json(silent=True) or {}
+        token = data.get("token")
+        if not token:
+            return {"message": "token is required"}, 400
+        try:
+            claims = decode_token(token, allow_expired=True)
+        except (InvalidTokenError, JWTDecodeError):
+            return {"message": "Invalid token"}, 400
+        if claims.get("type") != "refresh":
+            return {"message": "Only refresh tokens can be revoked"}, 400
+        if claims["sub"] != get_jwt_identity():
+            logger.warn("auth.revoke.forbidden", identity=get_jwt_identity())
+            return {"message": "You can only revoke your own tokens"}, 403
+        revocation_list.revoke(claims["jti"], expires_at=claims.get("exp"), reason="revoked")
+        logger.info("auth.revoke.success", identity=claims["sub"])
+        return {"message": "Token revoked"}, 200
+
 # API Resources
 api.add_resource(Signup, "/auth/signup")
 api.add_resource(Login, "/auth/login")
 api.add_resource(TokenRefresh, "/auth/refresh")
+api.add_resource(Logout, "/auth/logout")
+api.add_resource(RevokeToken, "/auth/revoke")
 
 # Basic health check endpoint
 @app.route("/auth/health", methods=["GET"])
@@ -0,0 +1,62 @@
+"""Password hashing off the request thread, in a bounded process pool that sheds load when saturated."""
+
+import os
+
+from procpool import BoundedProcessPool, PoolBusy
+
+from . import utils
+from .utils import hash_password, verify_password
+
+
+class HashingOverloaded(PoolBusy):
+    """Raised when the hashing pool is saturated (or too slow) and the request should get a 503."""
+
+
+def _lower_priority(niceness):
+    # Hashing is bulk work: under contention the kernel should favour the request-serving processes
+    if niceness and hasattr(os, "nice"):
+        os.nice(niceness)
+
+
+class HashingPool(BoundedProcessPool):
+    """
+    Runs ``hash_password``/``verify_password`` in ``workers`` separate processes.
+
+    At most ``workers + max_queue`` hashes are admitted at once; beyond that,
+    calls fail immediately with HashingOverloaded rather than queueing behind
+    work that would take seconds to drain. An admitted call that still hasn't
+    finished after ``timeout`` seconds also raises HashingOverloaded.
+
+    With ``workers=0`` hashing runs inline on the caller's thread (no pool).
+    """
+
+    busy = HashingOverloaded
+    log_name = "auth.hashing"
+    description = "Password hashing"
+
+    def __init__(self, workers, max_queue, timeout=5.0, niceness=0):
+        super().__init__(workers, max_queue, timeout, initializer=_lower_priority, initargs=(niceness,))
+        self.niceness = niceness
+
+    def hash_password(self, password, iterations=None):
+        # Resolved here rather than in the worker, which has its own copy of the module
+        return self.run(hash_password, password, iterations or utils.PASSWORD_HASH_ITERATIONS)
+
+    def verify_password(self, hashed_password, plain_password):
+        return self.run(verify_password, hashed_password, plain_password)
+
+    def warm_up(self):
+        """Starts every worker process now instead of on the first logins."""
+        if self.workers:
+            list(self._get_executor().map(hash_password, ["warm-up"] * self.workers))
+
+
+def pool_from_env():
+    cpus = os.cpu_count() or 1
+    workers = int(os.environ.get("PASSWORD_HASH_WORKERS", str(max(1, cpus - 1))))
+    return HashingPool(
+        workers=workers,
+        max_queue=int(os.environ.get("PASSWORD_HASH_QUEUE", str(workers * 4))),
+        timeout=float(os.environ.get("PASSWORD_HASH_TIMEOUT", "5")),
+        niceness=int(os.environ.get("PASSWORD_HASH_NICE", "0")),
+    )
@@ -26,8 +26,8 @@ class AuthUserModel(Model):
     class Meta:
         table_name = os.environ.get("AUTH_USERS_DYNAMODB_TABLE", "BloomRefresh-AuthUsers")
         region = os.environ.get("AWS_REGION", "us-east-2")
-        # For local testing with DynamoDB Local, uncomment and configure:
-        # host = "http://localhost:8000"
+        # For local testing with DynamoDB Local, set DYNAMODB_ENDPOINT_URL (e.g. http://localhost:8000)
+        host = os.environ.get("DYNAMODB_ENDPOINT_URL")
         aws_access_key_id = os.environ.get("AWS_ACCESS_KEY_ID_DUMMY", "dummy") # Required by PynamoDB, even for local
         aws_secret_access_key = os.environ.get("AWS_SECRET_ACCESS_KEY_DUMMY", "dummy") # Required by PynamoDB, even for local
 
@@ -44,4 +44,161 @@ def test_refresh_token(mock_dependency, client):
 def test_health(client):
     response = client.get("/auth/health")
     assert response.status_code == 200
-    assert response.json["status"] == "Auth service is healthy"
\ No newline at end of file
+    assert response.json["status"] == "Auth service is healthy"
+import threading
+from services.auth_services import app as auth_service
+from services.auth_services.hashing import HashingOverloaded, HashingPool
+
+@pytest.fixture
+def auth_client():
+    auth_service.users_db.clear()
+    auth_service.revoked_tokens_db.clear()
+    auth_service.revocation_list.rebuild()
+    original_hasher = auth_service.password_hasher
+    auth_service.password_hasher = HashingPool(workers=0, max_queue=0)
+    with auth_service.app.test_client() as client:
+        yield client
+    auth_service.password_hasher = original_hasher
+    auth_service.users_db.clear()
+
+def test_signup_and_login_with_inline_hashing(auth_client):
+    response = auth_client.post("/auth/signup", json={"email": "a@example.com", "password": "pw123456"})
+    assert response.status_code == 201
+    assert auth_client.post("/auth/login", json={"email": "a@example.com", "password": "pw123456"}).status_code == 200
+    assert auth_client.post("/auth/login", json={"email": "a@example.com", "password": "wrong"}).status_code == 401
+    assert auth_client.post("/auth/login", json={"email": "nobody@example.com", "password": "x"}).status_code == 401
+
+def test_process_pool_hashes_and_verifies():
+    pool = HashingPool(workers=1, max_queue=0)
+    try:
+        hashed = pool.hash_password("pw123456")
+        assert hashed.startswith("pbkdf2:sha256")
+        assert pool.verify_password(hashed, "pw123456")
+        assert not pool.verify_password(hashed, "wrong")
+    finally:
+        pool.shutdown()
+
+def test_saturated_pool_sheds_immediately():
+    pool = HashingPool(workers=1, max_queue=0)
+    try:
+        pool.warm_up()
+        busy = threading.Thread(target=pool.hash_password, args=("pw123456",))
+        busy.start()
+        while pool._slots._value:  # Wait until the background hash holds the only slot
+            pass
+        with pytest.raises(HashingOverloaded):
+            pool.hash_password("another")
+        busy.join()
+        assert pool.hash_password("after").startswith("pbkdf2:sha256")  # The slot was given back
+    finally:
+        pool.shutdown()
+
+def test_login_returns_503_when_hashing_is_saturated(auth_client):
+    auth_client.post("/auth/signup", json={"email": "a@example.com", "password": "pw123456"})
+
+    class SaturatedPool:
+        def hash_password(self, *args):
+            raise HashingOverloaded("saturated")
+        verify_password = hash_password
+
+    auth_service.password_hasher = SaturatedPool()
+    response = auth_client.post("/auth/login", json={"email": "a@example.com", "password": "pw123456"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert auth_client.post("/auth/signup", json={"email": "b@example.com", "password": "pw"}).status_code == 503
+    assert "b@example.com" not in auth_service.users_db
+
+def test_emails_are_case_insensitive(auth_client):
+    assert auth_client.post("/auth/signup", json={"email": "Jane@Example.com", "password": "pw123456"}).status_code == 201
+    assert auth_client.post("/auth/signup", json={"email": "jane@example.COM", "password": "other"}).status_code == 409
+    assert auth_client.post("/auth/login", json={"email": " JANE@example.com", "password": "pw123456"}).status_code == 200
+
+def test_refresh_finds_user_by_indexed_user_id(auth_client):
+    auth_client.post("/auth/signup", json={"email": "a@example.com", "password": "pw123456"})
+    tokens = auth_client.post("/auth/login", json={"email": "a@example.com", "password": "pw123456"}).json
+    response = auth_client.post("/auth/refresh", headers={"Authorization": f"Bearer {tokens['refresh_token']}"})
+    assert response.status_code == 200
+    assert "access_token" in response.json
+
+    del auth_service.users_db["a@example.com"]
+    response = auth_client.post("/auth/refresh", headers={"Authorization": f"Bearer {tokens['refresh_token']}"})
+    assert response.status_code == 404
+
+def test_existing_identities_checks_ids_and_emails_in_bulk(auth_client):
+    for email in ("a@example.com", "b@example.com"):
+        auth_client.post("/auth/signup", json={"email": email, "password": "pw123456"})
+    found = auth_service.existing_identities(["mem_a@example.com", "B@example.com", "mem_gone@example.com", "gone@example.com"])
+    assert found == {"mem_a@example.com", "B@example.com"}
+
+def _login(client, email):
+    client.post("/auth/signup", json={"email": email, "password": "pw123456"})
+    return client.post("/auth/login", json={"email": email, "password": "pw123456"}).json
+
+def test_logout_revokes_the_refresh_token(auth_client):
+    tokens = _login(auth_client, "a@example.com")
+    refresh_headers = {"Authorization": f"Bearer {tokens['refresh_token']}"}
+    assert auth_client.post("/auth/refresh", headers=refresh_headers).status_code == 200
+
+    assert auth_client.post("/auth/logout", headers=refresh_headers).status_code == 200
+    assert auth_client.post("/auth/refresh", headers=refresh_headers).status_code == 401
+
+    # A fresh login gets a new, unrevoked refresh token
+    tokens = _login(auth_client, "a@example.com")
+    assert auth_client.post("/auth/refresh", headers={"Authorization": f"Bearer {tokens['refresh_token']}"}).status_code == 200
+
+def test_revoke_only_own_refresh_tokens(auth_client):
+    alice, bob = _login(auth_client, "alice@example.com"), _login(auth_client, "bob@example.com")
+    alice_headers = {"Authorization": f"Bearer {alice['access_token']}"}
+
+    response = auth_client.post("/auth/revoke", json={"token": bob["refresh_token"]}, headers=alice_headers)
+    assert response.status_code == 403
+    response = auth_client.post("/auth/revoke", json={"token": alice["access_token"]}, headers=alice_headers)
+    assert response.status_code == 400
+    assert auth_client.post("/auth/revoke", json={"token": "garbage"}, headers=alice_headers).status_code == 400
+
+    response = auth_client.post("/auth/revoke", json={"token": alice["refresh_token"]}, headers=alice_headers)
+    assert response.status_code == 200
+    assert auth_client.post("/auth/refresh", headers={"Authorization": f"Bearer {alice['refresh_token']}"}).status_code == 401
+    assert auth_client.post("/auth/refresh", headers={"Authorization": f"Bearer {bob['refresh_token']}"}).status_code == 200
+
+from services.auth_services import utils
+
+def test_login_upgrades_an_outdated_password_hash(auth_client, monkeypatch):
+    monkeypatch.setattr(utils, "PASSWORD_HASH_ITERATIONS", 2_000)
+    auth_service.users_db["a@example.com"] = {
+        "email": "a@example.com", "user_id": "u1", "role": "volunteer",
+        "password_hash": utils.hash_password("pw123456", iterations=1_000),
+    }
+    assert auth_client.post("/auth/login", json={"email": "a@example.com", "password": "pw123456"}).status_code == 200
+    upgraded = auth_service.users_db["a@example.com"]["password_hash"]
+    assert utils.hash_iterations(upgraded) == 2_000
+    assert auth_service.users_db["a@example.com"]["user_id"] == "u1"
+    assert auth_client.post("/auth/login", json={"email": "a@example.com", "password": "pw123456"}).status_code == 200
+    assert auth_service.users_db["a@example.com"]["password_hash"] == upgraded  # Current hashes are left alone
+
+def test_hash_cost_helpers():
+    assert utils.hash_iterations(utils.hash_password("pw", iterations=1_000)) == 1_000
+    assert utils.hash_iterations("scrypt:32768:8:1$salt$hash") is None
+    assert utils.needs_rehash("scrypt:32768:8:1$salt$hash", iterations=1_000)
+    assert not utils.needs_rehash(utils.hash_password("pw", iterations=3_000), iterations=2_000)
+    iterations = utils.calibrate_iterations(budget_ms=1, sample_iterations=10_000, repeats=1)
+    assert iterations == utils.MIN_HASH_ITERATIONS  # 1 ms is below what the floor costs anywhere
+
+def test_concurrent_signups_create_one_user(auth_client, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from storage.memory import MemoryTable
+
+    class UnseenUsers(MemoryTable):
+        def __contains__(self, key):
+            return False  # Every request passes the existence check before any of them has written the user
+
+    monkeypatch.setattr(auth_service, "users_db", UnseenUsers("users", "email", ("user_id",)))
+
+    def signup(password):
+        with auth_service.app.test_client() as client:
+            return client.post("/auth/signup", json={"email": "a@example.com", "password": password}).status_code
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        statuses = list(pool.map(signup, [f"pw-{i}" for i in range(8)]))
+    assert sorted(statuses) == [201] + [409] * 7
+    assert len(auth_service.users_db) == 1
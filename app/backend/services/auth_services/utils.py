@@ -1,12 +1,56 @@
 """Utility functions for password hashing and verification."""
 
-from werkzeug.security import generate_password_hash, check_password_hash
+import os
+import time
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
+
+HASH_ALGORITHM = "pbkdf2:sha256"
+# Never calibrate below this, however slow the machine: it's the floor of what we consider safe
+MIN_HASH_ITERATIONS = 100_000
+# The work factor for new hashes. Tune per deployment with benchmarks.bench_hash_cost;
+# stored hashes below it are upgraded the next time their owner logs in.
+PASSWORD_HASH_ITERATIONS = int(os.environ.get("PASSWORD_HASH_ITERATIONS", str(DEFAULT_PBKDF2_ITERATIONS)))
 
 # Password Hashing
-def hash_password(password):
+def hash_password(password, iterations=None):
     """Hashes a password using a strong hashing algorithm."""
-    return generate_password_hash(password, method="pbkdf2:sha256")
+    return generate_password_hash(password, method=f"{HASH_ALGORITHM}:{iterations or PASSWORD_HASH_ITERATIONS}")
 
 def verify_password(hashed_password, plain_password):
     """Verifies a plain password against a hashed password."""
-    return check_password_hash(hashed_password, plain_password)
\ No newline at end of file
+    return check_password_hash(hashed_password, plain_password)
+
+def hash_iterations(hashed_password):
+    """The PBKDF2 iteration count a stored hash was made with, or None if it isn't a PBKDF2-SHA256 hash."""
+    method = hashed_password.split("$", 1)[0]
+    prefix = f"{HASH_ALGORITHM}:"
+    if not method.startswith(prefix) or not method[len(prefix):].isdigit():
+        return None
+    return int(method[len(prefix):])
+
+def needs_rehash(hashed_password, iterations=None):
+    """True when a stored hash is weaker than new hashes would be (fewer iterations, or another method)."""
+    stored = hash_iterations(hashed_password)
+    return stored is None or stored < (iterations or PASSWORD_HASH_ITERATIONS)
+
+def time_hash(iterations, repeats=3):
+    """Best-of-``repeats`` seconds to hash one password with ``iterations``."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        hash_password("calibration-password", iterations)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def calibrate_iterations(budget_ms, sample_iterations=200_000, repeats=3):
+    """
+    The largest iteration count whose hash fits in ``budget_ms`` on this machine.
+
+    PBKDF2 time is linear in the iteration count, so one timed sample is
+    scaled to the budget. The result is rounded down to a multiple of 10,000
+    and never goes below MIN_HASH_ITERATIONS.
+    """
+    per_iteration = time_hash(sample_iterations, repeats) / sample_iterations
+    fitted = int(budget_ms / 1000 / per_iteration) // 10_000 * 10_000
+    return max(MIN_HASH_ITERATIONS, fitted)
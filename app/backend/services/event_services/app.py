@@ -2,18 +2,31 @@
 
 from flask import Flask, request, jsonify
 from flask_restful import Api, Resource
-from flask_jwt_extended import jwt_required, get_jwt_identity, JWTManager
+from flask_jwt_extended import jwt_required, get_jwt_identity
 import os
+import math
+import atexit
+import json
+import threading
+import boto3
 import structlog
 from datetime import datetime, UTC
 import uuid # For generating eventId and rsvpId if not using database auto-increment
 from config import config
-
-# from .models import EventModel, RsvpModel # Placeholder for PynamoDB or similar
+from storage import VersionConflict, open_table
+from storage.base import VERSION_FIELD
+from tokens import init_jwt
+from .models import EventModel, RsvpModel
+from .change_feed import ChangeFeed
+from .geo_index import GeoGridIndex
+from .time_index import TimeIndex, decode_cursor, encode_cursor, parse_iso8601
+from .locks import StripedLock
+from .search_index import SearchIndex, event_fields
+from .publisher import LocalEventBridgeClient, PublishBufferFull, make_publisher
+from .response_cache import ALL_EVENTS, ResponseCache
 
 app = Flask(__name__)
-app.config["JWT_SECRET_KEY"] = os.environ.get("JWT_SECRET_KEY", "super-secret-key-for-dev-only")
-jwt = JWTManager(app)
+jwt = init_jwt(app)
 api = Api(app)
 logger = structlog.get_logger()
 
@@ -21,38 +34,414 @@ logger = structlog.get_logger()
 SECRET_KEY = config.SECRET_KEY
 DATABASE_URL = config.DATABASE_URL
 
-# In-memory data stores for demonstration (replace with DynamoDB as per PRD)
-events_db = {}
+# Data stores, backed by the storage selected with DATABASE_URL (memory, SQLite or DynamoDB)
+events_db = open_table("events", key_field="eventId", indexes=("organizerId",), model=EventModel)
 # Example: events_db = {"event_uuid_1": {"eventId": "event_uuid_1", "organizerId": "cognito_sub_xyz", "title": "Beach Cleanup", "location": {"latitude": 34.0522, "longitude": -118.2437, "address": "Santa Monica Beach"}, "dateTime": "2025-07-15T09:00:00Z", "capacity": 50, "supplies": "Gloves and bags provided"}}
-rsvps_db = {}
+# Waitlisted RSVPs also carry waitlistFor (their eventId) until promoted, so the waitlist index holds only them
+rsvps_db = open_table("rsvps", key_field="rsvpId", indexes=("eventId", "userId", "waitlistFor"), model=RsvpModel)
 # Example: rsvps_db = {"event_uuid_1#cognito_sub_abc": {"eventId": "event_uuid_1", "userId": "cognito_sub_abc", "status": "confirmed", "registeredAt": "2025-07-01T10:00:00Z"}}
+# Confirmed seats per event. Admission changes the count only with conditional writes, so workers
+# sharing the store can't oversell between them.
+seats_db = open_table("event_seats", key_field="eventId")
+# Example: seats_db = {"event_uuid_1": {"eventId": "event_uuid_1", "confirmed": 12, "version": 40}}
+# The events written or deleted recently, by any worker; see refresh_indexes
+event_changes = ChangeFeed(open_table("event_changes", key_field="eventId", indexes=("changedBucket",)))
+
+# Secondary indexes over events_db. They must be kept in step with every write to events_db; other
+# workers' writes reach them through event_changes.
+geo_index = GeoGridIndex(cell_size_deg=float(os.environ.get("EVENTS_GEO_CELL_DEG", "0.1")))
+time_index = TimeIndex()
+search_index = SearchIndex()
+# Held while an event's entries in all three indexes change, so request threads and the refresh thread
+# never interleave their updates of the same event (each index also locks itself against queries)
+index_lock = threading.RLock()
+# Serialized GET responses, invalidated by per-event version counters
+response_cache = ResponseCache(max_entries=int(os.environ.get("EVENTS_RESPONSE_CACHE_SIZE", "4096")))
+# Queues this process's RSVP writes per event, so they don't keep retrying each other's conditional writes
+rsvp_locks = StripedLock(stripes=int(os.environ.get("RSVP_LOCK_STRIPES", "64")))
+# How often other workers' event writes are applied to this one's indexes and response cache
+INDEX_REFRESH_SECONDS = float(os.environ.get("EVENTS_INDEX_REFRESH_SECONDS", "2"))
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+BULK_BATCH_SIZE = 100
+BULK_MAX_BYTES = int(os.environ.get("EVENTS_BULK_MAX_BYTES", str(10 * 1024 * 1024)))
+EXPORT_PAGE_SIZE = 500
+DEFAULT_SEARCH_RESULTS = 20
+# Larger circles would visit most of the grid; nobody travels further than this to a cleanup, so
+# larger radii are cut down to it
+MAX_RADIUS_KM = float(os.environ.get("EVENTS_MAX_RADIUS_KM", "500"))
+MAX_SEARCH_RESULTS = 100
+
+# --- Index Maintenance ---
+def _event_coordinates(event):
+    """Returns (lat, lng) for an event, or None if its location can't be placed on the map."""
+    location = event.get("location")
+    if not isinstance(location, dict):
+        return None
+    try:
+        lat, lng = float(location["latitude"]), float(location["longitude"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0):
+        return None
+    return lat, lng
+
+def index_event(event):
+    """Adds or refreshes an event in the secondary indexes and invalidates its cached responses."""
+    coordinates = _event_coordinates(event)
+    with index_lock:
+        if coordinates:
+            geo_index.add(event["eventId"], *coordinates)
+        else:
+            geo_index.remove(event["eventId"])
+        time_index.add(event["eventId"], parse_iso8601(event["dateTime"]))
+        search_index.add(event["eventId"], event_fields(event))
+        response_cache.invalidate_event(event["eventId"])
+
+def unindex_event(event_id):
+    """Removes an event from the secondary indexes and its cached responses."""
+    with index_lock:
+        geo_index.remove(event_id)
+        time_index.remove(event_id)
+        search_index.remove(event_id)
+        response_cache.forget_event(event_id)
+
+def save_event(event):
+    """Writes a new or replaced event, indexes it and lets the other workers know."""
+    events_db[event["eventId"]] = event
+    index_event(event)
+    event_changes.record(event["eventId"])
+
+def save_events(events):
+    events_db.put_many(events)
+    for event in events:
+        index_event(event)
+        event_changes.record(event["eventId"])
+
+def update_event(event_id, fields):
+    """Changes some of an event's fields in place (so seat counts written meanwhile survive) and returns it."""
+    event = events_db.update(event_id, fields)
+    index_event(event)
+    event_changes.record(event_id)
+    return event
+
+def delete_event(event_id):
+    events_db.pop(event_id, None)
+    unindex_event(event_id)
+    event_changes.record(event_id)
+
+def refresh_indexes(event_ids=None):
+    """
+    Applies events written or deleted by other workers to the indexes and the response cache.
+
+    Runs every INDEX_REFRESH_SECONDS on a background thread with the ids from
+    event_changes; returns how many events were refreshed.
+    """
+    event_ids = event_changes.pull() if event_ids is None else event_ids
+    # Read and applied under index_lock: a request thread that writes one of these events meanwhile
+    # indexes its copy after this one, so an older read never overwrites a newer write
+    with index_lock:
+        found = events_db.get_many(event_ids)
+        for event_id in event_ids:
+            if event_id in found:
+                index_event(found[event_id])
+            else:
+                unindex_event(event_id)
+    if event_ids:
+        logger.info("event.indexes.refreshed", events=len(event_ids))
+    return len(event_ids)
+
+def cached_json_response(cache_key, version, build):
+    """
+    Serves a JSON body from response_cache, building it with ``build() -> (payload, headers)`` on a miss.
+    Answers a matching If-None-Match with 304 and no body.
+    """
+    entry = response_cache.get(cache_key, version)
+    if entry is None:
+        payload, headers = build()
+        entry = response_cache.put(cache_key, version, jsonify(payload).get_data(), headers)
+    if request.if_none_match.contains_weak(entry.etag):
+        response = app.response_class(status=304, headers=entry.headers)
+    else:
+        response = app.response_class(entry.body, mimetype="application/json", headers=entry.headers)
+    response.set_etag(entry.etag)
+    # Clients may keep a copy but must revalidate it with If-None-Match before reuse
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+def confirmed_count(event_id):
+    seats = seats_db.load(event_id)
+    return seats["confirmed"] if seats else 0
+
+def take_seat(event):
+    """
+    Claims one of the event's seats; returns False when they are all taken.
+
+    The count is raised with a write conditioned on the version it was read at,
+    so two workers (or threads) can't both take the last seat: the loser reads
+    the count again and retries.
+    """
+    event_id, capacity = event["eventId"], event.get("capacity")
+    while True:
+        seats = seats_db.load(event_id)
+        confirmed = seats["confirmed"] if seats else 0
+        if capacity is not None and confirmed >= capacity:
+            return False
+        if seats is None:
+            if seats_db.insert({"eventId": event_id, "confirmed": 1}):
+                return True
+            continue
+        try:
+            seats_db.update(event_id, {"confirmed": confirmed + 1}, expected_version=seats.get(VERSION_FIELD, 0))
+            return True
+        except (KeyError, VersionConflict):
+            continue
+
+def release_seat(event_id):
+    while True:
+        seats = seats_db.load(event_id)
+        if seats is None:
+            return
+        try:
+            seats_db.update(event_id, {"confirmed": max(0, seats["confirmed"] - 1)}, expected_version=seats.get(VERSION_FIELD, 0))
+            return
+        except KeyError:
+            return
+        except VersionConflict:
+            continue
+
+def rsvps_for(field, value):
+    """An event's or a user's RSVPs, from the store's index, in registration order."""
+    return sorted(rsvps_db.find(field, value), key=lambda rsvp: rsvp["registeredAt"])
+
+def promote_waitlisted(event):
+    """
+    Confirms waitlisted RSVPs, oldest first, while the event has free seats. Returns the promoted RSVPs.
+
+    Only the event's waitlist is read, through the waitlistFor index, and not
+    at all while the event is full. Each promotion is conditioned on the RSVP
+    being unchanged since it was read, so an RSVP withdrawn (or promoted by
+    another worker) meanwhile is skipped and its seat given back.
+    """
+    capacity = event.get("capacity")
+    if capacity is not None and confirmed_count(event["eventId"]) >= capacity:
+        return []
+    promoted = []
+    for rsvp in rsvps_for("waitlistFor", event["eventId"]):
+        if rsvp["status"] != "waitlisted":
+            continue
+        if not take_seat(event):
+            break
+        try:
+            promoted.append(rsvps_db.update(rsvp["rsvpId"], {"status": "confirmed", "promotedAt": datetime.utcnow().isoformat() + "Z"},
+                                            remove_fields=("waitlistFor",), expected_version=rsvp.get(VERSION_FIELD, 0)))
+        except (KeyError, VersionConflict):
+            release_seat(event["eventId"])
+    return promoted
+
+def publish_promotions(promoted):
+    for rsvp in promoted:
+        logger.info("rsvp.waitlist.promoted", event_id=rsvp["eventId"], user_id=rsvp["userId"])
+        publish_event_to_event_bridge("UserRSVPPromoted", {"eventId": rsvp["eventId"], "userId": rsvp["userId"], "status": "confirmed"})
+
+def _valid_capacity(capacity):
+    return capacity is None or (isinstance(capacity, int) and not isinstance(capacity, bool) and capacity >= 0)
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+def _title_error(title):
+    if not isinstance(title, str) or not title.strip():
+        return "title must be a non-empty string"
+    return None
+
+def _location_error(location):
+    if not isinstance(location, dict) or not all(k in location for k in ["latitude", "longitude"]):
+        return "Invalid location format. Must include latitude and longitude."
+    lat, lng = location["latitude"], location["longitude"]
+    if not (_is_number(lat) and _is_number(lng) and -90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0):
+        return "latitude and longitude must be numbers within -90..90 and -180..180"
+    if not isinstance(location.get("address", ""), str):
+        return "location.address must be a string"
+    return None
+
+def _supplies_error(supplies):
+    if supplies is not None and not isinstance(supplies, str):
+        return "supplies must be a string"
+    return None
+
+def validate_event_payload(data):
+    """Checks a create payload; returns an error message, or None if it is valid."""
+    if not isinstance(data, dict):
+        return "Payload must be a JSON object"
+
+    # Required fields from PRD: title, location, dateTime
+    # Optional: capacity, supplies
+    title = data.get("title")
+    location = data.get("location") # Expecting an object like {"latitude": ..., "longitude": ..., "address": ...}
+    date_time_str = data.get("dateTime")
+
+    if not all([title, location, date_time_str]):
+        return "Missing required fields: title, location, dateTime"
+
+    # Basic validation (more can be added)
+    error = _title_error(title) or _location_error(location) or _supplies_error(data.get("supplies"))
+    if error:
+        return error
+    try:
+        # Validate dateTime format (e.g., ISO 8601)
+        datetime.fromisoformat(date_time_str.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return "Invalid dateTime format. Use ISO 8601 format (YYYY-MM-DDTHH:MM:SSZ)."
+    if not _valid_capacity(data.get("capacity")):
+        return "capacity must be a non-negative integer"
+    return None
+
+def build_event(data, organizer_id):
+    """Builds a new event record from a payload that passed validate_event_payload."""
+    return {
+        "eventId": str(uuid.uuid4()),
+        "organizerId": organizer_id,
+        "title": data["title"],
+        "location": data["location"],
+        "dateTime": data["dateTime"],
+        "capacity": data.get("capacity"),
+        "supplies": data.get("supplies", "Bring your own if possible."),
+        "createdAt": datetime.now(UTC).isoformat()
+    }
+
+def rebuild_indexes():
+    """Rebuilds the in-process indexes from the stores, e.g. after a restart."""
+    for index in (geo_index, time_index, search_index):
+        index.clear()
+    for event in events_db.values():
+        index_event(event)
+    pruned = event_changes.prune()
+    logger.info("event.indexes.rebuilt", events=len(time_index), changes_pruned=pruned)
+
+def _parse_time_range():
+    """Reads ?from=&to= as aware datetimes. Raises ValueError on a malformed bound."""
+    bounds = []
+    for name in ("from", "to"):
+        value = request.args.get(name)
+        bounds.append(parse_iso8601(value) if value else None)
+    return bounds
+
+# --- EventBridge Publishing ---
+# Entries are buffered and sent by a background thread in PutEvents batches of up to 10, so the
+# request path never waits on EventBridge. EVENTBRIDGE_PUBLISH_MODE=inline sends one call per event instead.
+# Without EVENT_BUS_NAME the local stand-in client is used and nothing leaves the process.
+EVENT_BUS_NAME = os.environ.get("EVENT_BUS_NAME")
+if EVENT_BUS_NAME:
+    event_bridge_client = boto3.client("events", region_name=os.environ.get("AWS_REGION", "us-east-1"))
+else:
+    event_bridge_client = LocalEventBridgeClient()
+event_publisher = make_publisher(
+    os.environ.get("EVENTBRIDGE_PUBLISH_MODE", "batch"),
+    event_bridge_client,
+    event_bus_name=EVENT_BUS_NAME or "BloomRefreshEventBus",
+    source="com.bloomrefresh.eventservice",
+)
+atexit.register(event_publisher.close)
+# User ids per EventDeleted entry; user ids are ~40 bytes as JSON, so an entry stays around 10 KB
+CANCELLATION_RECIPIENTS_PER_ENTRY = int(os.environ.get("CANCELLATION_RECIPIENTS_PER_ENTRY", "250"))
 
-# --- Helper Functions (Conceptual) ---
 def publish_event_to_event_bridge(event_type, detail):
-    """Placeholder for publishing an event to AWS EventBridge."""
-    # In a real scenario, this would use boto3 to put_events to EventBridge
+    """Hands an event to the EventBridge publisher; never fails the calling request."""
     logger.info(f"event_bridge.publish", event_type=event_type, detail=detail)
-    # Example:
-    # event_bridge_client = boto3.client("events")
-    # response = event_bridge_client.put_events(
-    #     Entries=[
-    #         {
-    #             "Source": "com.bloomrefresh.eventservice",
-    #             "DetailType": event_type,
-    #             "Detail": json.dumps(detail),
-    #             "EventBusName": os.environ.get("EVENT_BUS_NAME", "BloomRefreshEventBus")
-    #         }
-    #     ]
-    # )
-    pass
+    try:
+        event_publisher.publish(event_type, detail)
+    except PublishBufferFull:
+        logger.error("event_bridge.publish.buffer_full", event_type=event_type, detail=detail)
+    except Exception as e:
+        logger.error("event_bridge.publish.error", event_type=event_type, error=str(e))
+
+def publish_event_deleted(event, attendee_ids):
+    """
+    Publishes EventDeleted with the users who had RSVPd, since their RSVPs are gone once it's consumed.
+
+    Each entry lists at most CANCELLATION_RECIPIENTS_PER_ENTRY of them (``part`` of ``parts``),
+    keeping ten entries well within PutEvents' 256 KB request limit however large the event.
+    """
+    detail = {"eventId": event["eventId"], "organizerId": event["organizerId"], "title": event.get("title"),
+              "dateTime": event.get("dateTime")}
+    parts = max(1, -(-len(attendee_ids) // CANCELLATION_RECIPIENTS_PER_ENTRY))
+    for part in range(parts):
+        start = part * CANCELLATION_RECIPIENTS_PER_ENTRY
+        attendees = attendee_ids[start:start + CANCELLATION_RECIPIENTS_PER_ENTRY]
+        publish_event_to_event_bridge("EventDeleted", dict(detail, attendeeIds=attendees, part=part + 1, parts=parts))
 
 # --- Event Resources ---
 class EventList(Resource):
     @jwt_required() # Optional: listing events might be public, creating requires auth
     def get(self):
-        # TODO: Implement filtering (date, distance - distance requires location data and geo-queries)
-        logger.info("event.list.get.success", count=len(events_db))
-        return jsonify(list(events_db.values()))
+        try:
+            start, end = _parse_time_range()
+        except ValueError:
+            return {"message": "Invalid from/to format. Use ISO 8601 format (YYYY-MM-DDTHH:MM:SSZ)."}, 400
+
+        try:
+            limit = int(request.args.get("limit", DEFAULT_PAGE_SIZE))
+        except ValueError:
+            return {"message": "limit must be an integer"}, 400
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            return {"message": f"limit must be between 1 and {MAX_PAGE_SIZE}"}, 400
+
+        cursor = request.args.get("cursor")
+        after = None
+        if cursor is not None:
+            try:
+                after = decode_cursor(cursor)
+            except ValueError:
+                return {"message": "Invalid cursor"}, 400
+
+        geo_args = [request.args.get(k) for k in ("lat", "lng", "radiusKm")]
+        if any(geo_args):
+            if not all(geo_args):
+                return {"message": "lat, lng and radiusKm must be provided together"}, 400
+            try:
+                lat, lng, radius_km = (float(v) for v in geo_args)
+            except ValueError:
+                return {"message": "lat, lng and radiusKm must be numbers"}, 400
+            # float() accepts "nan" and "inf", which every range check below would wave through
+            if not all(math.isfinite(v) for v in (lat, lng, radius_km)):
+                return {"message": "lat, lng and radiusKm must be finite numbers"}, 400
+            if not (-90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0) or radius_km < 0:
+                return {"message": "lat/lng out of range, or radiusKm negative"}, 400
+            radius_km = min(radius_km, MAX_RADIUS_KM)
+
+            def build_radius():
+                # The nearest limit + 1 matches settle the page, unless a date range filters some of them out:
+                # then later matches are read, limit + 1 at a time, until the page is full
+                matches = geo_index.query_radius(lat, lng, radius_km, limit=None if start or end else limit + 1, after=after)
+                events, keys = [], []
+                for offset in range(0, len(matches), limit + 1):
+                    chunk = matches[offset:offset + limit + 1]
+                    found = events_db.get_many(event_id for _, event_id in chunk)
+                    for distance, event_id in chunk:
+                        event = found.get(event_id)
+                        if event is None:
+                            continue
+                        when = parse_iso8601(event["dateTime"]) if start or end else None
+                        if (not start or when >= start) and (not end or when < end):
+                            events.append(dict(event, distanceKm=round(distance, 3)))
+                            keys.append((distance, event_id))
+                    if len(events) > limit:
+                        break
+                next_cursor = encode_cursor(keys[limit - 1]) if len(events) > limit else None
+                logger.info("event.list.get.radius_success", count=min(len(events), limit), radius_km=radius_km,
+                            has_more=bool(next_cursor))
+                return events[:limit], ({"X-Next-Cursor": next_cursor} if next_cursor else {})
+
+            return cached_json_response(("list", request.query_string), response_cache.version(ALL_EVENTS), build_radius)
+
+        def build_page():
+            event_ids, next_cursor = time_index.page(start=start, end=end, limit=limit, cursor=cursor)
+            logger.info("event.list.get.success", count=len(event_ids), has_more=bool(next_cursor))
+            return list(events_db.get_many(event_ids).values()), ({"X-Next-Cursor": next_cursor} if next_cursor else {})
+
+        return cached_json_response(("list", request.query_string), response_cache.version(ALL_EVENTS), build_page)
 
     @jwt_required()
     def post(self):
@@ -62,53 +451,125 @@ class EventList(Resource):
             logger.warn("event.create.missing_payload", organizer_id=organizer_id)
             return {"message": "Payload missing"}, 400
 
-        # Required fields from PRD: title, location, dateTime
-        # Optional: capacity, supplies
-        title = data.get("title")
-        location = data.get("location") # Expecting an object like {"latitude": ..., "longitude": ..., "address": ...}
-        date_time_str = data.get("dateTime")
+        error = validate_event_payload(data)
+        if error:
+            logger.warn("event.create.invalid_payload", organizer_id=organizer_id, error=error)
+            return {"message": error}, 400
 
-        if not all([title, location, date_time_str]):
-            logger.warn("event.create.missing_fields", organizer_id=organizer_id, data_keys=list(data.keys()))
-            return {"message": "Missing required fields: title, location, dateTime"}, 400
-        
-        # Basic validation (more can be added)
-        if not isinstance(location, dict) or not all(k in location for k in ["latitude", "longitude"]):
-            return {"message": "Invalid location format. Must include latitude and longitude."},400
-        try:
-            # Validate dateTime format (e.g., ISO 8601)
-            datetime.fromisoformat(date_time_str.replace("Z", "+00:00"))
-        except ValueError:
-            return {"message": "Invalid dateTime format. Use ISO 8601 format (YYYY-MM-DDTHH:MM:SSZ)."}, 400
-
-        event_id = str(uuid.uuid4())
-        new_event = {
-            "eventId": event_id,
-            "organizerId": organizer_id,
-            "title": title,
-            "location": location,
-            "dateTime": date_time_str,
-            "capacity": data.get("capacity"),
-            "supplies": data.get("supplies", "Bring your own if possible."),
-            "createdAt": datetime.now(UTC).isoformat()
-        }
-        # TODO: Replace with DynamoDB save: EventModel(**new_event).save()
-        events_db[event_id] = new_event
+        new_event = build_event(data, organizer_id)
+        event_id, title = new_event["eventId"], new_event["title"]
+        save_event(new_event)
         logger.info("event.create.success", event_id=event_id, organizer_id=organizer_id)
         
         # Publish event to EventBridge (e.g., for Notification Service)
-        publish_event_to_event_bridge("NewEventCreated", {"eventId": event_id, "title": title, "organizerId": organizer_id})
+        publish_event_to_event_bridge("NewEventCreated", {"eventId": event_id, "title": title, "organizerId": organizer_id,
+                                                              "dateTime": new_event["dateTime"]})
         
-        return jsonify(new_event), 201
+        return new_event, 201
+
+class EventBulkImport(Resource):
+    @jwt_required()
+    def post(self):
+        """Creates events from an NDJSON body (one event payload per line), validating rows as they stream in."""
+        organizer_id = get_jwt_identity()
+        if request.content_length is not None and request.content_length > BULK_MAX_BYTES:
+            return {"message": f"Bulk payload exceeds {BULK_MAX_BYTES} bytes"}, 413
+
+        results = []
+        batch = []
+        committed = 0
+
+        def insert_batch():
+            nonlocal committed
+            save_events(batch)
+            committed += len(batch)
+            for event in batch:
+                publish_event_to_event_bridge("NewEventCreated", {"eventId": event["eventId"], "title": event["title"], "organizerId": organizer_id,
+                                                                  "dateTime": event["dateTime"]})
+            batch.clear()
+
+        # Read the body line by line without buffering it whole. Content-Length is absent on chunked uploads, so
+        # the byte limit is enforced here too: each read asks for at most one byte past what is left of it
+        remaining = BULK_MAX_BYTES
+        line_number = 0
+        while raw_line := request.stream.readline(remaining + 1):
+            remaining -= len(raw_line)
+            if remaining < 0:
+                logger.warn("event.bulk_import.too_large", organizer_id=organizer_id, created=committed)
+                return {"message": f"Bulk payload exceeds {BULK_MAX_BYTES} bytes", "created": committed}, 413
+            line_number += 1
+            line = raw_line.strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError:
+                results.append({"line": line_number, "status": "error", "message": "Invalid JSON"})
+                continue
+            error = validate_event_payload(data)
+            if error:
+                results.append({"line": line_number, "status": "error", "message": error})
+                continue
+            event = build_event(data, organizer_id)
+            batch.append(event)
+            results.append({"line": line_number, "status": "created", "eventId": event["eventId"]})
+            if len(batch) >= BULK_BATCH_SIZE:
+                insert_batch()
+        insert_batch()
+
+        created = sum(1 for r in results if r["status"] == "created")
+        logger.info("event.bulk_import.success", organizer_id=organizer_id, created=created, failed=len(results) - created)
+        return {"created": created, "failed": len(results) - created, "results": results}, 200
+
+class EventExport(Resource):
+    @jwt_required()
+    def get(self):
+        """Streams every event as NDJSON in dateTime order."""
+        def generate():
+            # Walk the time index page by page; cursors stay valid while events change underneath
+            cursor = None
+            exported = 0
+            while True:
+                event_ids, cursor = time_index.page(limit=EXPORT_PAGE_SIZE, cursor=cursor)
+                for event in events_db.get_many(event_ids).values():
+                    exported += 1
+                    yield json.dumps(event) + "\n"
+                if cursor is None:
+                    break
+            logger.info("event.export.success", count=exported)
+
+        return app.response_class(generate(), mimetype="application/x-ndjson")
+
+class EventSearch(Resource):
+    @jwt_required()
+    def get(self):
+        query = request.args.get("q", "").strip()
+        if not query:
+            return {"message": "Query parameter q is required"}, 400
+        try:
+            limit = int(request.args.get("limit", DEFAULT_SEARCH_RESULTS))
+        except ValueError:
+            return {"message": "limit must be an integer"}, 400
+        if not 1 <= limit <= MAX_SEARCH_RESULTS:
+            return {"message": f"limit must be between 1 and {MAX_SEARCH_RESULTS}"}, 400
+
+        # Searches title, supplies and location.address; every query word must match (as a word or prefix)
+        results = search_index.search(query, limit=limit)
+        found = events_db.get_many(event_id for _, event_id in results)
+        events = [dict(found[event_id], score=round(score, 4)) for score, event_id in results if event_id in found]
+        logger.info("event.search.success", query=query, count=len(events))
+        return jsonify(events)
 
 class EventDetail(Resource):
     @jwt_required() # Optional: viewing details might be public
     def get(self, event_id):
-        # TODO: Replace with DynamoDB lookup: EventModel.get(event_id)
+        # Version before body: a write landing in between then only makes this entry stale, instead of
+        # caching the old body under the new version
+        version = response_cache.version(event_id)
         event = events_db.get(event_id)
         if event:
             logger.info("event.detail.get.success", event_id=event_id)
-            return jsonify(event)
+            return cached_json_response(("event", event_id), version, lambda: (event, {}))
         else:
             logger.warn("event.detail.get.not_found", event_id=event_id)
             return {"message": "Event not found"}, 404
@@ -116,7 +577,6 @@ class EventDetail(Resource):
     @jwt_required()
     def put(self, event_id):
         organizer_id = get_jwt_identity()
-        # TODO: Replace with DynamoDB lookup
         event = events_db.get(event_id)
         if not event:
             logger.warn("event.update.not_found", event_id=event_id, organizer_id=organizer_id)
@@ -130,24 +590,44 @@ class EventDetail(Resource):
         if not data:
             logger.warn("event.update.missing_payload", event_id=event_id)
             return {"message": "Payload missing"}, 400
+        if not isinstance(data, dict):
+            return {"message": "Payload must be a JSON object"}, 400
 
-        # Update allowed fields
-        if "title" in data: event["title"] = data["title"]
-        if "location" in data: event["location"] = data["location"]
-        if "dateTime" in data: event["dateTime"] = data["dateTime"]
-        if "capacity" in data: event["capacity"] = data["capacity"]
-        if "supplies" in data: event["supplies"] = data["supplies"]
-        event["updatedAt"] = datetime.utcnow().isoformat() + "Z"
+        if "dateTime" in data:
+            try:
+                parse_iso8601(data["dateTime"])
+            except (AttributeError, ValueError):
+                return {"message": "Invalid dateTime format. Use ISO 8601 format (YYYY-MM-DDTHH:MM:SSZ)."}, 400
+        if "capacity" in data and not _valid_capacity(data["capacity"]):
+            return {"message": "capacity must be a non-negative integer"}, 400
+        # The same field rules as create, so the geo and search indexes only ever see well-formed values
+        error = (("title" in data and _title_error(data["title"])) or ("location" in data and _location_error(data["location"]))
+                 or ("supplies" in data and _supplies_error(data["supplies"])))
+        if error:
+            return {"message": error}, 400
+
+        # Capacity changes interact with RSVP admission, so take the event's RSVP lock
+        with rsvp_locks.for_key(event_id):
+            # Update allowed fields
+            fields = {field: data[field] for field in ("title", "location", "dateTime", "capacity", "supplies") if field in data}
+            fields["updatedAt"] = datetime.utcnow().isoformat() + "Z"
+            try:
+                event = update_event(event_id, fields)
+            except KeyError:
+                return {"message": "Event not found"}, 404  # Deleted since it was read
+            # A raised capacity frees seats for the waitlist; a lowered one keeps existing confirmations
+            promoted = promote_waitlisted(event)
 
-        # TODO: Replace with DynamoDB update: event.update(actions=[...])
-        events_db[event_id] = event
         logger.info("event.update.success", event_id=event_id)
+        # Lets the notification service move the event's reminders when its date changes
+        publish_event_to_event_bridge("EventUpdated", {"eventId": event_id, "title": event["title"], "organizerId": organizer_id,
+                                                       "dateTime": event["dateTime"]})
+        publish_promotions(promoted)
         return jsonify(event)
 
     @jwt_required()
     def delete(self, event_id):
         organizer_id = get_jwt_identity()
-        # TODO: Replace with DynamoDB lookup
         event = events_db.get(event_id)
         if not event:
             logger.warn("event.delete.not_found", event_id=event_id, organizer_id=organizer_id)
@@ -157,16 +637,18 @@ class EventDetail(Resource):
             logger.warn("event.delete.auth_error", event_id=event_id, organizer_id=organizer_id)
             return {"message": "You are not authorized to delete this event"}, 403
 
-        # TODO: Replace with DynamoDB delete: event.delete()
         # Also consider what to do with RSVPs - cascade delete or mark event as cancelled.
-        del events_db[event_id]
-        # Potentially delete related RSVPs from rsvps_db
-        related_rsvps = [k for k in rsvps_db if k.startswith(f"{event_id}#")]
-        for rsvp_key in related_rsvps:
-            del rsvps_db[rsvp_key]
-            
-        logger.info("event.delete.success", event_id=event_id)
-        publish_event_to_event_bridge("EventDeleted", {"eventId": event_id, "organizerId": organizer_id})
+        with rsvp_locks.for_key(event_id):
+            delete_event(event_id)
+            # Cascade delete the event's RSVPs, found through the rsvps table's eventId index
+            rsvps = rsvps_for("eventId", event_id)
+            attendee_ids = [rsvp["userId"] for rsvp in rsvps]
+            for rsvp in rsvps:
+                rsvps_db.pop(rsvp["rsvpId"], None)
+            seats_db.pop(event_id, None)
+
+        logger.info("event.delete.success", event_id=event_id, attendees=len(attendee_ids))
+        publish_event_deleted(event, attendee_ids)
         return {"message": "Event deleted successfully"}, 200
 
 # --- RSVP Resources ---
@@ -174,54 +656,104 @@ class Rsvp(Resource):
     @jwt_required()
     def post(self, event_id):
         user_id = get_jwt_identity()
-        # TODO: Check if event exists
-        if event_id not in events_db:
-            logger.warn("rsvp.create.event_not_found", event_id=event_id, user_id=user_id)
-            return {"message": "Event not found"}, 404
-
         rsvp_id = f"{event_id}#{user_id}"
-        if rsvp_id in rsvps_db and rsvps_db[rsvp_id]["status"] == "confirmed":
-            logger.warn("rsvp.create.already_rsvpd", event_id=event_id, user_id=user_id)
-            return {"message": "Already RSVPd to this event"}, 409
-
-        # TODO: Check event capacity if implemented
-        # event = events_db[event_id]
-        # current_rsvps = len([r for r in rsvps_db.values() if r["eventId"] == event_id and r["status"] == "confirmed"])
-        # if event.get("capacity") is not None and current_rsvps >= event["capacity"]:
-        #     return {"message": "Event is at full capacity"}, 409
-
-        new_rsvp = {
-            "rsvpId": rsvp_id, # Or generate a separate UUID for rsvpId
-            "eventId": event_id,
-            "userId": user_id,
-            "status": "confirmed",
-            "registeredAt": datetime.utcnow().isoformat() + "Z"
-        }
-        # TODO: Replace with DynamoDB save: RsvpModel(**new_rsvp).save()
-        rsvps_db[rsvp_id] = new_rsvp
-        logger.info("rsvp.create.success", event_id=event_id, user_id=user_id)
-        publish_event_to_event_bridge("UserRSVPd", {"eventId": event_id, "userId": user_id, "status": "confirmed"})
-        return jsonify(new_rsvp), 201
+
+        # Seats are taken with conditional writes (see take_seat), so concurrent requests can't oversell the
+        # last seats, in this worker or across workers; the lock only queues this worker's requests
+        with rsvp_locks.for_key(event_id):
+            event = events_db.get(event_id)
+            if not event:
+                logger.warn("rsvp.create.event_not_found", event_id=event_id, user_id=user_id)
+                return {"message": "Event not found"}, 404
+
+            existing = rsvps_db.get(rsvp_id)
+            if existing and existing["status"] in ("confirmed", "waitlisted"):
+                logger.warn("rsvp.create.already_rsvpd", event_id=event_id, user_id=user_id, status=existing["status"])
+                return {"message": "Already RSVPd to this event", "status": existing["status"]}, 409
+
+            has_seat = take_seat(event)
+            new_rsvp = {
+                "rsvpId": rsvp_id, # Or generate a separate UUID for rsvpId
+                "eventId": event_id,
+                "userId": user_id,
+                "status": "confirmed" if has_seat else "waitlisted",
+                "registeredAt": datetime.utcnow().isoformat() + "Z"
+            }
+            if not rsvps_db.insert(new_rsvp if has_seat else dict(new_rsvp, waitlistFor=event_id)):
+                # The same user's request on another worker got there first
+                if has_seat:
+                    release_seat(event_id)
+                logger.warn("rsvp.create.already_rsvpd", event_id=event_id, user_id=user_id)
+                return {"message": "Already RSVPd to this event"}, 409
+
+        if has_seat:
+            logger.info("rsvp.create.success", event_id=event_id, user_id=user_id)
+        else:
+            logger.info("rsvp.create.waitlisted", event_id=event_id, user_id=user_id)
+        publish_event_to_event_bridge("UserRSVPd", {"eventId": event_id, "userId": user_id, "status": new_rsvp["status"],
+                                                    "title": event.get("title"), "organizerId": event.get("organizerId")})
+        return new_rsvp, 201
 
     @jwt_required()
     def delete(self, event_id):
         user_id = get_jwt_identity()
         rsvp_id = f"{event_id}#{user_id}"
 
-        # TODO: Replace with DynamoDB lookup and delete
-        if rsvp_id in rsvps_db:
-            del rsvps_db[rsvp_id]
-            logger.info("rsvp.delete.success", event_id=event_id, user_id=user_id)
-            publish_event_to_event_bridge("UserRSVPWithdrawn", {"eventId": event_id, "userId": user_id, "status": "withdrawn"})
-            return {"message": "RSVP withdrawn successfully"}, 200
-        else:
-            logger.warn("rsvp.delete.not_found", event_id=event_id, user_id=user_id)
-            return {"message": "RSVP not found"}, 404
+        with rsvp_locks.for_key(event_id):
+            # Marked withdrawn with a conditional write first, so that of two concurrent withdrawals (or a
+            # withdrawal and a promotion) exactly one decides whether a seat is given back
+            while True:
+                rsvp = rsvps_db.load(rsvp_id)
+                if rsvp is None or rsvp["status"] == "withdrawn":
+                    logger.warn("rsvp.delete.not_found", event_id=event_id, user_id=user_id)
+                    return {"message": "RSVP not found"}, 404
+                try:
+                    rsvps_db.update(rsvp_id, {"status": "withdrawn"}, remove_fields=("waitlistFor",),
+                                    expected_version=rsvp.get(VERSION_FIELD, 0))
+                    break
+                except (KeyError, VersionConflict):
+                    continue
+            rsvps_db.pop(rsvp_id, None)
+            promoted = []
+            if rsvp["status"] == "confirmed":
+                release_seat(event_id)
+                event = events_db.get(event_id)
+                promoted = promote_waitlisted(event) if event else []
+
+        logger.info("rsvp.delete.success", event_id=event_id, user_id=user_id)
+        publish_event_to_event_bridge("UserRSVPWithdrawn", {"eventId": event_id, "userId": user_id, "status": "withdrawn"})
+        publish_promotions(promoted)
+        return {"message": "RSVP withdrawn successfully"}, 200
+
+class UserRsvpList(Resource):
+    @jwt_required()
+    def get(self, user_id):
+        current_user_identity = get_jwt_identity()
+        if current_user_identity != user_id:
+            logger.warn("rsvp.user_list.auth_error", requested_user_id=user_id, requester_identity=current_user_identity)
+            return {"message": "You are not authorized to view these RSVPs"}, 403
+
+        # "My events": each RSVP with the event it belongs to, found through the rsvps table's userId index
+        user_rsvps = [rsvp for rsvp in rsvps_for("userId", user_id) if rsvp["status"] != "withdrawn"]
+        events = events_db.get_many(rsvp["eventId"] for rsvp in user_rsvps)
+        rsvps = [dict(rsvp, event=events.get(rsvp["eventId"])) for rsvp in user_rsvps]
+        logger.info("rsvp.user_list.success", user_id=user_id, count=len(rsvps))
+        return jsonify(rsvps)
+
+# Persistent backends outlive the process; bring the indexes back in line with them
+rebuild_indexes()
+if INDEX_REFRESH_SECONDS > 0:
+    event_changes.start(INDEX_REFRESH_SECONDS, refresh_indexes)
+    atexit.register(event_changes.stop)
 
 # API Resources
 api.add_resource(EventList, "/events")
+api.add_resource(EventSearch, "/events/search")
+api.add_resource(EventBulkImport, "/events:bulk")
+api.add_resource(EventExport, "/events:export")
 api.add_resource(EventDetail, "/events/<string:event_id>")
 api.add_resource(Rsvp, "/events/<string:event_id>/rsvp")
+api.add_resource(UserRsvpList, "/users/<string:user_id>/rsvps")
 
 # Basic health check endpoint
 @app.route("/events/health", methods=["GET"])
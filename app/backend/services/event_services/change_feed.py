@@ -0,0 +1,91 @@
+"""Which events changed recently, kept in a table so every worker can catch up on the others' writes."""
+
+import threading
+import time
+
+import structlog
+
+logger = structlog.get_logger()
+
+# Changes carry the minute they were made in, an indexed field, so a pull reads only recent ones
+CHANGE_BUCKET_SECONDS = 60
+# How far before the last pull a pull looks again, for writes that landed late or came from a skewed clock
+PULL_MARGIN_SECONDS = 60
+# Change records are only read within the margin; after this long they are deleted (the DynamoDB TTL attribute)
+CHANGE_TTL_SECONDS = 86400
+
+
+def change_bucket(timestamp):
+    return int(timestamp // CHANGE_BUCKET_SECONDS)
+
+
+class ChangeFeed:
+    """
+    One record per event in ``table``, overwritten whenever the event is written or deleted.
+
+    ``record`` is called after each write. ``pull`` returns the ids of events
+    that changed since the previous pull, through the ``changedBucket`` index, so
+    its cost depends on how much changed and not on how many events there are.
+    Changes this instance recorded itself are not returned again. The caller
+    reads the events back to tell updates from deletes. ``start`` pulls every
+    ``interval`` seconds on a background thread and hands the ids to a callback.
+    """
+
+    def __init__(self, table, clock=time.time):
+        self.table = table
+        self.clock = clock
+        self._pulled_at = clock()
+        self._seen = {}  # event_id -> changedAt of the last change applied here
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def record(self, event_id):
+        now = self.clock()
+        self.table[event_id] = {"eventId": event_id, "changedAt": now, "changedBucket": change_bucket(now),
+                                "expiresAt": int(now + CHANGE_TTL_SECONDS)}
+        with self._lock:
+            self._seen[event_id] = now
+
+    def pull(self):
+        """Ids of events changed elsewhere since the last pull."""
+        with self._lock:
+            now = self.clock()
+            since = self._pulled_at - PULL_MARGIN_SECONDS
+            changed = []
+            for change in self.table.find_many("changedBucket", range(change_bucket(since), change_bucket(now) + 1)):
+                event_id = change["eventId"]
+                if change["changedAt"] > self._seen.get(event_id, since):
+                    self._seen[event_id] = change["changedAt"]
+                    changed.append(event_id)
+            # Older changes are outside every later pull's window, so they can't be returned again anyway
+            self._seen = {event_id: at for event_id, at in self._seen.items() if at > since}
+            self._pulled_at = now
+        return changed
+
+    def prune(self):
+        """Deletes records past their expiry (DynamoDB does this itself); returns how many were removed."""
+        now = self.clock()
+        expired = [change["eventId"] for change in self.table.values() if change["expiresAt"] <= now]
+        for event_id in expired:
+            self.table.pop(event_id, None)
+        return len(expired)
+
+    def start(self, interval, apply):
+        """Calls ``apply(event_ids)`` with each pull's changes every ``interval`` seconds, until ``stop``."""
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    changed = self.pull()
+                    if changed:
+                        apply(changed)
+                except Exception as e:
+                    logger.error("event.change_feed.pull_failed", error=str(e))
+
+        self._thread = threading.Thread(target=run, name="event-change-feed", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
@@ -0,0 +1,125 @@
+"""Grid-cell spatial index over event locations."""
+
+import heapq
+import math
+import threading
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180.0
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points, in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GeoGridIndex:
+    """
+    Buckets event ids into fixed-size latitude/longitude cells.
+
+    A radius query only visits the cells overlapping the search circle's bounding
+    box, so its cost follows the number of events near the query point rather
+    than the size of the whole table. Updates and queries may come from
+    different threads; they take turns on a lock.
+    """
+
+    def __init__(self, cell_size_deg=0.1):
+        if cell_size_deg <= 0 or abs(360 / cell_size_deg - round(360 / cell_size_deg)) > 1e-9:
+            raise ValueError("cell_size_deg must evenly divide 360")
+        self.cell_size_deg = cell_size_deg
+        self._lat_cells = int(round(180 / cell_size_deg))
+        self._lng_cells = int(round(360 / cell_size_deg))
+        self._cells = {}  # (row, col) -> {event_id: (lat, lng)}
+        self._positions = {}  # event_id -> (row, col)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, event_id):
+        return event_id in self._positions
+
+    def _row(self, lat):
+        return min(self._lat_cells - 1, max(0, int(math.floor((lat + 90.0) / self.cell_size_deg))))
+
+    def _col(self, lng):
+        return int(math.floor((lng + 180.0) / self.cell_size_deg)) % self._lng_cells
+
+    def add(self, event_id, lat, lng):
+        """Inserts or moves an event to the given coordinates."""
+        cell = (self._row(lat), self._col(lng))
+        with self._lock:
+            self._remove(event_id)
+            self._cells.setdefault(cell, {})[event_id] = (lat, lng)
+            self._positions[event_id] = cell
+
+    def remove(self, event_id):
+        """Drops an event from the index; unknown ids are ignored."""
+        with self._lock:
+            self._remove(event_id)
+
+    def _remove(self, event_id):
+        cell = self._positions.pop(event_id, None)
+        if cell is None:
+            return
+        bucket = self._cells[cell]
+        del bucket[event_id]
+        if not bucket:
+            del self._cells[cell]
+
+    def clear(self):
+        with self._lock:
+            self._cells.clear()
+            self._positions.clear()
+
+    def _candidate_cells(self, lat, lng, radius_km):
+        d_lat = radius_km / KM_PER_DEGREE_LAT
+        row_lo, row_hi = self._row(lat - d_lat), self._row(lat + d_lat)
+
+        # Longitude degrees shrink towards the poles; widen the box by the worst-case
+        # latitude it touches. Near a pole (or for huge radii) every column is in range.
+        max_abs_lat = min(90.0, max(abs(lat - d_lat), abs(lat + d_lat)))
+        cos_lat = math.cos(math.radians(max_abs_lat))
+        if cos_lat <= 1e-9 or d_lat / cos_lat >= 180.0:
+            cols = range(self._lng_cells)
+        else:
+            d_lng = d_lat / cos_lat
+            col_lo = int(math.floor((lng - d_lng + 180.0) / self.cell_size_deg))
+            col_hi = int(math.floor((lng + d_lng + 180.0) / self.cell_size_deg))
+            if col_hi - col_lo + 1 >= self._lng_cells:
+                cols = range(self._lng_cells)
+            else:
+                cols = [c % self._lng_cells for c in range(col_lo, col_hi + 1)]
+
+        n_cells = (row_hi - row_lo + 1) * len(cols)
+        if n_cells >= len(self._cells):
+            # The box covers more cells than are populated; walk the populated ones instead.
+            col_set = set(cols)
+            return [cell for cell in self._cells if row_lo <= cell[0] <= row_hi and cell[1] in col_set]
+        return [(row, col) for row in range(row_lo, row_hi + 1) for col in cols]
+
+    def query_radius(self, lat, lng, radius_km, limit=None, after=None):
+        """
+        Returns ``(distance_km, event_id)`` pairs within ``radius_km``, nearest first.
+
+        With ``after`` (a pair from an earlier result), only pairs that sort after
+        it are returned; with ``limit``, only the nearest ``limit`` of them.
+        """
+        results = []
+        with self._lock:
+            for cell in self._candidate_cells(lat, lng, radius_km):
+                bucket = self._cells.get(cell)
+                if not bucket:
+                    continue
+                for event_id, (e_lat, e_lng) in bucket.items():
+                    distance = haversine_km(lat, lng, e_lat, e_lng)
+                    if distance <= radius_km and (after is None or (distance, event_id) > after):
+                        results.append((distance, event_id))
+        if limit is not None:
+            return heapq.nsmallest(limit, results)
+        results.sort()
+        return results
@@ -0,0 +1,25 @@
+"""Lock striping for per-event critical sections."""
+
+import threading
+
+
+class StripedLock:
+    """
+    A fixed pool of locks; each key maps to one stripe.
+
+    Requests for the same event always serialize on the same lock, while requests
+    for different events usually land on different stripes and proceed in parallel.
+    Memory stays constant no matter how many events exist.
+    """
+
+    def __init__(self, stripes=64):
+        if stripes < 1:
+            raise ValueError("stripes must be positive")
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def __len__(self):
+        return len(self._locks)
+
+    def for_key(self, key):
+        """Returns the lock guarding ``key``; use it as a context manager."""
+        return self._locks[hash(key) % len(self._locks)]
@@ -1,5 +1,6 @@
 
 from pynamodb.models import Model
+from pynamodb.indexes import GlobalSecondaryIndex, AllProjection
 from pynamodb.attributes import UnicodeAttribute, MapAttribute, UTCDateTimeAttribute, NumberAttribute
 import os
 from datetime import datetime
@@ -13,6 +14,47 @@ from datetime import datetime
 # PK: eventId#userId
 # Attributes: status, registeredAt
 
+class EventsByOrganizerIndex(GlobalSecondaryIndex):
+    """
+    Events by organizer; what ``events_db.find("organizerId", ...)`` queries.
+    """
+    class Meta:
+        index_name = "organizerId-index"
+        projection = AllProjection()
+
+    organizerId = UnicodeAttribute(hash_key=True)
+
+class RsvpsByEventIndex(GlobalSecondaryIndex):
+    """
+    RSVPs by event; what ``rsvps_db.find("eventId", ...)`` queries.
+    """
+    class Meta:
+        index_name = "eventId-index"
+        projection = AllProjection()
+
+    eventId = UnicodeAttribute(hash_key=True)
+
+class RsvpsByUserIndex(GlobalSecondaryIndex):
+    """
+    RSVPs by user; what ``rsvps_db.find("userId", ...)`` queries.
+    """
+    class Meta:
+        index_name = "userId-index"
+        projection = AllProjection()
+
+    userId = UnicodeAttribute(hash_key=True)
+
+class RsvpsWaitlistedForEventIndex(GlobalSecondaryIndex):
+    """
+    An event's waitlist, oldest first; sparse, since only waitlisted RSVPs carry ``waitlistFor``.
+    """
+    class Meta:
+        index_name = "waitlistFor-index"
+        projection = AllProjection()
+
+    waitlistFor = UnicodeAttribute(hash_key=True)
+    registeredAt = UTCDateTimeAttribute(range_key=True)
+
 class EventModel(Model):
     """
     Represents a cleanup event.
@@ -22,6 +64,7 @@ class EventModel(Model):
         region = os.environ.get("AWS_REGION", "us-east-1")
         aws_access_key_id = os.environ.get("AWS_ACCESS_KEY_ID_DUMMY", "dummy")
         aws_secret_access_key = os.environ.get("AWS_SECRET_ACCESS_KEY_DUMMY", "dummy")
+        host = os.environ.get("DYNAMODB_ENDPOINT_URL") # DynamoDB Local / moto in development
 
     eventId = UnicodeAttribute(hash_key=True)
     organizerId = UnicodeAttribute(null=False) # userId of the organizer
@@ -32,6 +75,8 @@ class EventModel(Model):
     supplies = UnicodeAttribute(null=True)
     createdAt = UTCDateTimeAttribute(default=datetime.utcnow)
     updatedAt = UTCDateTimeAttribute(null=True)
+    version = NumberAttribute(default=0) # Bumped by Table.update, which edits events in place
+    by_organizer = EventsByOrganizerIndex()
 
     def __iter__(self):
         for name, attr in self.get_attributes().items():
@@ -46,6 +91,7 @@ class RsvpModel(Model):
         region = os.environ.get("AWS_REGION", "us-east-1")
         aws_access_key_id = os.environ.get("AWS_ACCESS_KEY_ID_DUMMY", "dummy")
         aws_secret_access_key = os.environ.get("AWS_SECRET_ACCESS_KEY_DUMMY", "dummy")
+        host = os.environ.get("DYNAMODB_ENDPOINT_URL") # DynamoDB Local / moto in development
 
     # Composite key: eventId#userId
     # PynamoDB typically uses a single hash_key and an optional range_key.
@@ -57,6 +103,11 @@ class RsvpModel(Model):
     userId = UnicodeAttribute(null=False)  # Stored separately for easier GSI if needed
     status = UnicodeAttribute(null=False, default="confirmed") # e.g., "confirmed", "withdrawn"
     registeredAt = UTCDateTimeAttribute(default=datetime.utcnow)
+    waitlistFor = UnicodeAttribute(null=True) # The eventId while waitlisted, removed on promotion or withdrawal
+    version = NumberAttribute(default=0) # Bumped by Table.update; promotions and withdrawals are conditioned on it
+    by_event = RsvpsByEventIndex()
+    by_user = RsvpsByUserIndex()
+    waitlist = RsvpsWaitlistedForEventIndex()
 
     def __iter__(self):
         for name, attr in self.get_attributes().items():
@@ -0,0 +1,196 @@
+"""EventBridge publishing: a batching background publisher, an inline one, and a local stand-in client."""
+
+import itertools
+import json
+import queue
+import threading
+import time
+from collections import deque
+
+import structlog
+
+logger = structlog.get_logger()
+
+# PutEvents accepts at most 10 entries per call
+MAX_ENTRIES_PER_CALL = 10
+
+
+class PublishBufferFull(Exception):
+    """Raised when the publisher's buffer stays full for longer than the caller is willing to wait."""
+
+
+def build_entry(source, event_bus_name, event_type, detail):
+    return {
+        "Source": source,
+        "DetailType": event_type,
+        "Detail": json.dumps(detail),
+        "EventBusName": event_bus_name,
+    }
+
+
+def _failed_entries(entries, response):
+    """Entries PutEvents reported as failed; results line up with the request by position."""
+    if not response.get("FailedEntryCount"):
+        return []
+    return [entry for entry, result in zip(entries, response["Entries"]) if result.get("ErrorCode")]
+
+
+class InlinePublisher:
+    """Sends every entry with its own PutEvents call on the caller's thread."""
+
+    def __init__(self, client, event_bus_name, source):
+        self.client = client
+        self.event_bus_name = event_bus_name
+        self.source = source
+
+    def publish(self, event_type, detail):
+        entry = build_entry(self.source, self.event_bus_name, event_type, detail)
+        response = self.client.put_events(Entries=[entry])
+        if _failed_entries([entry], response):
+            logger.error("event_bridge.publish.failed", event_type=event_type, result=response["Entries"][0])
+
+    def flush(self, timeout=None):
+        return True
+
+    def close(self, timeout=None):
+        pass
+
+
+class BatchingPublisher:
+    """
+    Buffers entries and sends them from a background thread in batches of up to 10.
+
+    A batch goes out once it is full or ``linger_seconds`` after its first entry
+    arrived, whichever comes first. Entries PutEvents rejects are retried on their
+    own with exponential backoff; entries that were accepted are never resent.
+    When the buffer is full, ``publish`` blocks for up to ``put_timeout`` seconds
+    and then raises PublishBufferFull, pushing back on the request path instead of
+    growing without bound.
+    """
+
+    def __init__(self, client, event_bus_name, source, linger_seconds=0.05, max_buffer=10_000,
+                 put_timeout=0.5, max_attempts=5, base_backoff=0.05):
+        self.client = client
+        self.event_bus_name = event_bus_name
+        self.source = source
+        self.linger_seconds = linger_seconds
+        self.put_timeout = put_timeout
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self._buffer = queue.Queue(maxsize=max_buffer)
+        self._closed = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="eventbridge-publisher", daemon=True)
+        self._worker.start()
+
+    def publish(self, event_type, detail):
+        if self._closed.is_set():
+            raise RuntimeError("publisher is closed")
+        entry = build_entry(self.source, self.event_bus_name, event_type, detail)
+        try:
+            self._buffer.put(entry, timeout=self.put_timeout)
+        except queue.Full:
+            raise PublishBufferFull(f"EventBridge buffer full ({self._buffer.maxsize} entries)") from None
+
+    def flush(self, timeout=None):
+        """Blocks until every buffered entry has been sent (or given up on). Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._buffer.all_tasks_done:
+            while self._buffer.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._buffer.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout=5.0):
+        """Stops accepting entries, sends what is buffered and stops the worker."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self.flush(timeout)
+        self._worker.join(timeout)
+
+    def _next_batch(self):
+        try:
+            first = self._buffer.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.linger_seconds
+        while len(batch) < MAX_ENTRIES_PER_CALL:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._buffer.get(timeout=remaining) if remaining > 0 else self._buffer.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not (self._closed.is_set() and self._buffer.unfinished_tasks == 0):
+            batch = self._next_batch()
+            if not batch:
+                continue
+            try:
+                self._send(batch)
+            finally:
+                for _ in batch:
+                    self._buffer.task_done()
+
+    def _send(self, batch):
+        pending = batch
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                pending = _failed_entries(pending, self.client.put_events(Entries=pending))
+            except Exception as e:  # Throttling, network errors: the whole batch is still pending
+                logger.warn("event_bridge.publish.call_error", error=str(e), attempt=attempt, entries=len(pending))
+            if not pending:
+                return
+            if attempt < self.max_attempts:
+                time.sleep(self.base_backoff * 2 ** (attempt - 1))
+        logger.error("event_bridge.publish.dropped", entries=len(pending),
+                     detail_types=[entry["DetailType"] for entry in pending])
+
+
+class LocalEventBridgeClient:
+    """
+    In-process stand-in for the boto3 ``events`` client's ``put_events``.
+
+    ``latency`` simulates the network round trip per call. ``fail`` is an optional
+    predicate over an entry; matching entries come back with an ErrorCode, the way
+    PutEvents reports partial failures. Only the most recent ``max_recorded`` calls
+    and entries are kept, so a long-running dev server doesn't grow without bound.
+    """
+
+    def __init__(self, latency=0.0, fail=None, max_recorded=10_000):
+        self.latency = latency
+        self.fail = fail
+        self.calls = deque(maxlen=max_recorded)
+        self.accepted = deque(maxlen=max_recorded)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def put_events(self, Entries):
+        if len(Entries) > MAX_ENTRIES_PER_CALL:
+            raise ValueError("PutEvents accepts at most 10 entries")
+        if self.latency:
+            time.sleep(self.latency)
+        results = []
+        with self._lock:
+            self.calls.append(list(Entries))
+            for entry in Entries:
+                if self.fail and self.fail(entry):
+                    results.append({"ErrorCode": "InternalFailure", "ErrorMessage": "Simulated failure"})
+                else:
+                    self.accepted.append(entry)
+                    results.append({"EventId": f"local-{next(self._ids)}"})
+        return {"FailedEntryCount": sum("ErrorCode" in r for r in results), "Entries": results}
+
+
+def make_publisher(mode, client, event_bus_name, source):
+    """Builds the publisher for ``mode`` ("batch" or "inline")."""
+    if mode == "inline":
+        return InlinePublisher(client, event_bus_name, source)
+    if mode == "batch":
+        return BatchingPublisher(client, event_bus_name, source)
+    raise ValueError(f"Unknown EventBridge publish mode: {mode}")
+
@@ -0,0 +1,80 @@
+"""Versioned cache of serialized event responses, with strong ETags."""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Version key that every event write bumps; list responses are cached against it
+ALL_EVENTS = "*"
+
+
+def strong_etag(body):
+    """Content-derived strong ETag (unquoted), stable across restarts and workers."""
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class CachedResponse:
+    __slots__ = ("version", "body", "etag", "headers")
+
+    def __init__(self, version, body, headers):
+        self.version = version
+        self.body = body
+        self.etag = strong_etag(body)
+        self.headers = headers
+
+
+class ResponseCache:
+    """
+    LRU cache of response bodies, each tagged with the version it was built from.
+
+    Every event has a version counter, and ALL_EVENTS has one that moves on any
+    event write. An entry is served only while the version it was built from is
+    still current, so invalidation is a counter bump and never has to find the
+    affected entries. Bumps must happen after the underlying write completes.
+    """
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._versions = {}
+        self._entries = OrderedDict()  # cache key -> CachedResponse
+        self._lock = threading.Lock()
+
+    def version(self, key):
+        return self._versions.get(key, 0)
+
+    def invalidate_event(self, event_id):
+        with self._lock:
+            self._versions[event_id] = self._versions.get(event_id, 0) + 1
+            self._versions[ALL_EVENTS] = self._versions.get(ALL_EVENTS, 0) + 1
+            self._entries.pop(("event", event_id), None)
+
+    def forget_event(self, event_id):
+        """Invalidates a deleted event and drops its version counter."""
+        self.invalidate_event(event_id)
+        with self._lock:
+            self._versions.pop(event_id, None)
+
+    def get(self, cache_key, version):
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None or entry.version != version:
+                return None
+            self._entries.move_to_end(cache_key)
+            return entry
+
+    def put(self, cache_key, version, body, headers=None):
+        entry = CachedResponse(version, body, headers or {})
+        with self._lock:
+            self._entries[cache_key] = entry
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._versions.clear()
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
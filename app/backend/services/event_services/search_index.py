@@ -0,0 +1,153 @@
+"""In-process inverted index for full-text event search."""
+
+import bisect
+import heapq
+import math
+import re
+import threading
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+STOPWORDS = frozenset({"a", "an", "and", "at", "by", "for", "in", "of", "on", "or", "the", "to", "with"})
+
+# How much a hit in each field counts towards an event's score
+FIELD_WEIGHTS = {"title": 3.0, "address": 1.5, "supplies": 1.0}
+
+# A prefix hit (e.g. "beac" -> "beach") counts for less than the whole word
+PREFIX_MATCH_WEIGHT = 0.5
+MIN_PREFIX_LENGTH = 2
+# Upper bound on how many vocabulary terms a single prefix may expand to
+MAX_PREFIX_EXPANSIONS = 64
+
+
+def tokenize(text):
+    """Lower-cases and splits text into word tokens, dropping stopwords."""
+    if not text:
+        return []
+    return [t for t in TOKEN_PATTERN.findall(str(text).lower()) if t not in STOPWORDS]
+
+
+def event_fields(event):
+    """The searchable text of an event, keyed by field name."""
+    location = event.get("location")
+    address = location.get("address") if isinstance(location, dict) else None
+    return {"title": event.get("title"), "address": address, "supplies": event.get("supplies")}
+
+
+class SearchIndex:
+    """
+    Maps terms to the events containing them, with field-weighted term frequencies.
+
+    Documents are indexed and removed incrementally. Queries AND their terms
+    together, treat each term as a prefix as well as a whole word, and rank
+    matches by a tf-idf score. Updates and queries may come from different
+    threads; they take turns on a lock.
+    """
+
+    def __init__(self):
+        self._postings = {}  # term -> {event_id: tf}, where tf = 1 + log(field-weighted count)
+        self._documents = {}  # event_id -> terms it was indexed under, needed to unindex
+        self._vocabulary = []  # sorted terms, for prefix lookups
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._documents)
+
+    def add(self, event_id, fields):
+        """Indexes (or re-indexes) a document given as ``{field_name: text}``."""
+        weights = {}
+        for field, text in fields.items():
+            field_weight = FIELD_WEIGHTS.get(field, 1.0)
+            for term in tokenize(text):
+                weights[term] = weights.get(term, 0.0) + field_weight
+        with self._lock:
+            self._remove(event_id)
+            for term, weight in weights.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    bisect.insort(self._vocabulary, term)
+                postings[event_id] = 1.0 + math.log(weight)
+            self._documents[event_id] = tuple(weights)
+
+    def remove(self, event_id):
+        """Drops a document from the index; unknown ids are ignored."""
+        with self._lock:
+            self._remove(event_id)
+
+    def _remove(self, event_id):
+        terms = self._documents.pop(event_id, None)
+        if not terms:
+            return
+        for term in terms:
+            postings = self._postings[term]
+            del postings[event_id]
+            if not postings:
+                del self._postings[term]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, term)]
+
+    def clear(self):
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+            self._vocabulary.clear()
+
+    def _expand(self, token):
+        """Vocabulary terms a query token matches, with the weight each match carries."""
+        matches = {}
+        if token in self._postings:
+            matches[token] = 1.0
+        if len(token) >= MIN_PREFIX_LENGTH:
+            position = bisect.bisect_right(self._vocabulary, token)
+            for term in self._vocabulary[position:position + MAX_PREFIX_EXPANSIONS]:
+                if not term.startswith(token):
+                    break
+                matches[term] = PREFIX_MATCH_WEIGHT
+        return matches
+
+    def _weighted_terms(self, token):
+        """``[(postings, factor)]`` for each term a token matches; score = tf * factor."""
+        total = len(self._documents)
+        return [
+            (self._postings[term], match_weight * math.log(1.0 + total / len(self._postings[term])))
+            for term, match_weight in self._expand(token).items()
+        ]
+
+    def search(self, query, limit=20):
+        """Returns up to ``limit`` ``(score, event_id)`` pairs, best first."""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens or limit < 1:
+            return []
+        with self._lock:
+            return self._search(tokens, limit)
+
+    def _search(self, tokens, limit):
+        expanded = []
+        for token in tokens:
+            terms = self._weighted_terms(token)
+            if not terms:
+                return []
+            expanded.append((sum(len(postings) for postings, _ in terms), terms))
+        expanded.sort(key=lambda entry: entry[0])
+
+        # Only the most selective token walks its postings; the rest are probed per candidate,
+        # so a multi-word query costs about (smallest posting list) x (number of tokens).
+        scores = {}
+        for postings, factor in expanded[0][1]:
+            for event_id, tf in postings.items():
+                score = tf * factor
+                if score > scores.get(event_id, 0.0):
+                    scores[event_id] = score
+        for _, terms in expanded[1:]:
+            narrowed = {}
+            for event_id, score in scores.items():
+                best = 0.0
+                for postings, factor in terms:
+                    tf = postings.get(event_id)
+                    if tf is not None and tf * factor > best:
+                        best = tf * factor
+                if best:
+                    narrowed[event_id] = score + best
+            scores = narrowed
+            if not scores:
+                break
+        return heapq.nlargest(limit, ((score, event_id) for event_id, score in scores.items()))
@@ -41,3 +41,585 @@ def test_get_event(mock_dependency, client):
     assert response.status_code == 200
     assert "title" in response.json
     assert response.json["title"] == "Beach Cleanup"
+
+# --- Event service resources, exercised directly against the service app ---
+import contextlib
+import io
+import json
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask_jwt_extended import create_access_token
+from services.event_services import app as event_service
+from services.event_services.publisher import BatchingPublisher, LocalEventBridgeClient, PublishBufferFull
+
+def _auth_headers(identity):
+    with event_service.app.app_context():
+        return {"Authorization": f"Bearer {create_access_token(identity=identity)}"}
+
+@pytest.fixture
+def event_client():
+    event_service.events_db.clear()
+    event_service.rsvps_db.clear()
+    event_service.seats_db.clear()
+    event_service.event_changes.table.clear()
+    event_service.geo_index.clear()
+    event_service.time_index.clear()
+    event_service.search_index.clear()
+    event_service.response_cache.clear()
+    with event_service.app.test_client() as client:
+        yield client
+
+def _create_event(client, headers, lat, lng, **overrides):
+    payload = {
+        "title": "Beach Cleanup",
+        "location": {"latitude": lat, "longitude": lng, "address": "Santa Monica Beach"},
+        "dateTime": "2025-07-15T09:00:00Z",
+        "capacity": 50,
+    }
+    payload.update(overrides)
+    response = client.post("/events", json=payload, headers=headers)
+    assert response.status_code == 201
+    return response.json["eventId"]
+
+def test_radius_search_returns_nearby_events_nearest_first(event_client):
+    headers = _auth_headers("organizer-1")
+    santa_monica = _create_event(event_client, headers, 34.0195, -118.4912)
+    downtown_la = _create_event(event_client, headers, 34.0522, -118.2437)
+    _create_event(event_client, headers, 40.7128, -74.0060)  # New York
+
+    response = event_client.get("/events?lat=34.02&lng=-118.49&radiusKm=30", headers=headers)
+    assert response.status_code == 200
+    assert [e["eventId"] for e in response.json] == [santa_monica, downtown_la]
+    assert response.json[0]["distanceKm"] < response.json[1]["distanceKm"]
+
+def test_radius_search_follows_updates_and_deletes(event_client):
+    headers = _auth_headers("organizer-1")
+    event_id = _create_event(event_client, headers, 34.0195, -118.4912)
+    query = "/events?lat=40.71&lng=-74.0&radiusKm=10"
+    assert event_client.get(query, headers=headers).json == []
+
+    event_client.put(f"/events/{event_id}", json={"location": {"latitude": 40.7128, "longitude": -74.0060}}, headers=headers)
+    assert [e["eventId"] for e in event_client.get(query, headers=headers).json] == [event_id]
+
+    event_client.delete(f"/events/{event_id}", headers=headers)
+    assert event_client.get(query, headers=headers).json == []
+
+def test_radius_search_across_antimeridian(event_client):
+    headers = _auth_headers("organizer-1")
+    event_id = _create_event(event_client, headers, -16.5, 179.95)
+    response = event_client.get("/events?lat=-16.5&lng=-179.95&radiusKm=20", headers=headers)
+    assert [e["eventId"] for e in response.json] == [event_id]
+
+def test_radius_search_rejects_partial_params(event_client):
+    headers = _auth_headers("organizer-1")
+    assert event_client.get("/events?lat=34.0&lng=-118.0", headers=headers).status_code == 400
+    assert event_client.get("/events?lat=abc&lng=-118.0&radiusKm=5", headers=headers).status_code == 400
+
+def test_list_pages_through_date_range_in_order(event_client):
+    headers = _auth_headers("organizer-1")
+    ids_by_day = {day: _create_event(event_client, headers, 34.0, -118.0, dateTime=f"2025-07-{day:02d}T09:00:00Z") for day in (5, 1, 4, 2, 3, 9)}
+
+    response = event_client.get("/events?from=2025-07-02T00:00:00Z&to=2025-07-06T00:00:00Z&limit=2", headers=headers)
+    assert [e["eventId"] for e in response.json] == [ids_by_day[2], ids_by_day[3]]
+    cursor = response.headers["X-Next-Cursor"]
+
+    # An insert before the cursor position must not shift the next page.
+    _create_event(event_client, headers, 34.0, -118.0, dateTime="2025-07-02T12:00:00Z")
+    response = event_client.get(f"/events?from=2025-07-02T00:00:00Z&to=2025-07-06T00:00:00Z&limit=2&cursor={cursor}", headers=headers)
+    assert [e["eventId"] for e in response.json] == [ids_by_day[4], ids_by_day[5]]
+    assert "X-Next-Cursor" not in response.headers
+
+def test_list_order_follows_date_changes_and_deletes(event_client):
+    headers = _auth_headers("organizer-1")
+    first = _create_event(event_client, headers, 34.0, -118.0, dateTime="2025-07-01T09:00:00Z")
+    second = _create_event(event_client, headers, 34.0, -118.0, dateTime="2025-07-02T09:00:00Z")
+
+    event_client.put(f"/events/{first}", json={"dateTime": "2025-07-03T09:00:00Z"}, headers=headers)
+    assert [e["eventId"] for e in event_client.get("/events", headers=headers).json] == [second, first]
+
+    event_client.delete(f"/events/{second}", headers=headers)
+    assert [e["eventId"] for e in event_client.get("/events", headers=headers).json] == [first]
+
+def test_list_rejects_bad_pagination_params(event_client):
+    headers = _auth_headers("organizer-1")
+    assert event_client.get("/events?cursor=not-a-cursor", headers=headers).status_code == 400
+    assert event_client.get("/events?limit=0", headers=headers).status_code == 400
+    assert event_client.get("/events?from=yesterday", headers=headers).status_code == 400
+
+def test_user_rsvps_lists_my_events(event_client):
+    organizer = _auth_headers("organizer-1")
+    volunteer = _auth_headers("volunteer-1")
+    first = _create_event(event_client, organizer, 34.0, -118.0, title="Beach Cleanup")
+    second = _create_event(event_client, organizer, 34.0, -118.0, title="River Cleanup")
+    assert event_client.post(f"/events/{first}/rsvp", headers=volunteer).status_code == 201
+    assert event_client.post(f"/events/{second}/rsvp", headers=volunteer).status_code == 201
+    event_client.post(f"/events/{second}/rsvp", headers=_auth_headers("volunteer-2"))
+
+    response = event_client.get("/users/volunteer-1/rsvps", headers=volunteer)
+    assert response.status_code == 200
+    assert [(r["eventId"], r["event"]["title"]) for r in response.json] == [(first, "Beach Cleanup"), (second, "River Cleanup")]
+    assert event_service.confirmed_count(second) == 2
+
+    assert event_client.get("/users/volunteer-1/rsvps", headers=organizer).status_code == 403
+
+def test_rsvp_indexes_follow_withdrawals_and_event_deletes(event_client):
+    organizer = _auth_headers("organizer-1")
+    volunteer = _auth_headers("volunteer-1")
+    event_id = _create_event(event_client, organizer, 34.0, -118.0)
+    event_client.post(f"/events/{event_id}/rsvp", headers=volunteer)
+    event_client.post(f"/events/{event_id}/rsvp", headers=_auth_headers("volunteer-2"))
+
+    event_client.delete(f"/events/{event_id}/rsvp", headers=volunteer)
+    assert event_service.confirmed_count(event_id) == 1
+    assert event_client.get("/users/volunteer-1/rsvps", headers=volunteer).json == []
+
+    event_client.delete(f"/events/{event_id}", headers=organizer)
+    assert event_service.rsvps_db == {}
+    assert event_service.seats_db == {}
+    assert event_service.confirmed_count(event_id) == 0
+
+def test_rsvp_waitlist_promotes_oldest_when_a_seat_frees(event_client, monkeypatch):
+    published = []
+    monkeypatch.setattr(event_service, "publish_event_to_event_bridge", lambda event_type, detail: published.append((event_type, detail)))
+    organizer = _auth_headers("organizer-1")
+    event_id = _create_event(event_client, organizer, 34.0, -118.0, capacity=1)
+
+    statuses = [event_client.post(f"/events/{event_id}/rsvp", headers=_auth_headers(f"v{i}")).json["status"] for i in range(3)]
+    assert statuses == ["confirmed", "waitlisted", "waitlisted"]
+    assert event_client.post(f"/events/{event_id}/rsvp", headers=_auth_headers("v1")).status_code == 409
+
+    event_client.delete(f"/events/{event_id}/rsvp", headers=_auth_headers("v0"))
+    assert event_service.rsvps_db[f"{event_id}#v1"]["status"] == "confirmed"
+    assert event_service.rsvps_db[f"{event_id}#v2"]["status"] == "waitlisted"
+    assert ("UserRSVPPromoted", {"eventId": event_id, "userId": "v1", "status": "confirmed"}) in published
+
+    event_client.put(f"/events/{event_id}", json={"capacity": 5}, headers=organizer)
+    assert event_service.rsvps_db[f"{event_id}#v2"]["status"] == "confirmed"
+    assert not any(r["status"] == "waitlisted" for r in event_service.rsvps_db.values())
+
+def test_concurrent_rsvps_never_oversell(event_client, monkeypatch):
+    monkeypatch.setattr(event_service, "publish_event_to_event_bridge", lambda event_type, detail: None)
+    event_id = _create_event(event_client, _auth_headers("organizer-1"), 34.0, -118.0, capacity=50)
+    volunteers = [_auth_headers(f"volunteer-{i}") for i in range(300)]
+
+    def rsvp(headers):
+        with event_service.app.test_client() as client:
+            return client.post(f"/events/{event_id}/rsvp", headers=headers).json["status"]
+
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # Force frequent thread switches to expose check-then-insert races
+    try:
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            statuses = list(pool.map(rsvp, volunteers))
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    assert statuses.count("confirmed") == 50
+    assert statuses.count("waitlisted") == 250
+    assert event_service.confirmed_count(event_id) == 50
+    assert sum(r["status"] == "confirmed" for r in event_service.rsvps_db.values()) == 50
+
+def test_search_ranks_title_hits_and_matches_prefixes(event_client):
+    headers = _auth_headers("organizer-1")
+    river = _create_event(event_client, headers, 34.0, -118.0, title="River Cleanup", supplies="Gloves provided")
+    beach = _create_event(event_client, headers, 34.0, -118.0, title="Beach Cleanup",
+                          location={"latitude": 34.0, "longitude": -118.0, "address": "Riverside Park"})
+    _create_event(event_client, headers, 34.0, -118.0, title="Tree Planting", supplies="Shovels")
+
+    response = event_client.get("/events/search?q=river", headers=headers)
+    assert response.status_code == 200
+    assert [e["eventId"] for e in response.json] == [river, beach]
+
+    response = event_client.get("/events/search?q=river%20clean", headers=headers)
+    assert [e["eventId"] for e in response.json] == [river, beach]
+    assert [e["eventId"] for e in event_client.get("/events/search?q=glove", headers=headers).json] == [river]
+    assert event_client.get("/events/search?q=river%20shovels", headers=headers).json == []
+
+def test_search_index_follows_updates_and_deletes(event_client):
+    headers = _auth_headers("organizer-1")
+    event_id = _create_event(event_client, headers, 34.0, -118.0, title="Sunrise Cleanup")
+    event_client.put(f"/events/{event_id}", json={"title": "Lake Cleanup"}, headers=headers)
+    assert event_client.get("/events/search?q=sunrise", headers=headers).json == []
+    assert [e["eventId"] for e in event_client.get("/events/search?q=lake", headers=headers).json] == [event_id]
+
+    event_client.delete(f"/events/{event_id}", headers=headers)
+    assert event_client.get("/events/search?q=lake", headers=headers).json == []
+    assert len(event_service.search_index) == 0
+    assert event_client.get("/events/search", headers=headers).status_code == 400
+
+def test_batching_publisher_sends_batches_of_at_most_ten():
+    client = LocalEventBridgeClient()
+    publisher = BatchingPublisher(client, "bus", "test", linger_seconds=0.05)
+    for i in range(25):
+        publisher.publish("NewEventCreated", {"eventId": str(i)})
+    publisher.close()
+
+    assert all(len(call) <= 10 for call in client.calls)
+    assert len(client.calls) < 25
+    assert sorted(int(json.loads(e["Detail"])["eventId"]) for e in client.accepted) == list(range(25))
+
+def test_batching_publisher_retries_only_failed_entries():
+    failures = {"3": 2, "7": 1}  # eventId -> times PutEvents should reject it
+
+    def fail(entry):
+        event_id = json.loads(entry["Detail"])["eventId"]
+        if failures.get(event_id):
+            failures[event_id] -= 1
+            return True
+        return False
+
+    client = LocalEventBridgeClient(fail=fail)
+    publisher = BatchingPublisher(client, "bus", "test", linger_seconds=0.2, base_backoff=0.001)
+    for i in range(10):
+        publisher.publish("NewEventCreated", {"eventId": str(i)})
+    assert publisher.flush(timeout=5)
+    publisher.close()
+
+    sent = [[json.loads(e["Detail"])["eventId"] for e in call] for call in client.calls]
+    assert sent == [[str(i) for i in range(10)], ["3", "7"], ["3"]]
+    assert len(client.accepted) == 10
+
+def test_batching_publisher_applies_backpressure_when_full():
+    client = LocalEventBridgeClient(latency=0.5)
+    publisher = BatchingPublisher(client, "bus", "test", linger_seconds=0, max_buffer=1, put_timeout=0.01)
+    with pytest.raises(PublishBufferFull):
+        for i in range(5):
+            publisher.publish("NewEventCreated", {"eventId": str(i)})
+    publisher.close()
+
+def test_event_detail_etag_and_conditional_get(event_client):
+    headers = _auth_headers("organizer-1")
+    event_id = _create_event(event_client, headers, 34.0, -118.0)
+
+    first = event_client.get(f"/events/{event_id}", headers=headers)
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and not etag.startswith("W/")
+
+    not_modified = event_client.get(f"/events/{event_id}", headers=dict(headers, **{"If-None-Match": etag}))
+    assert not_modified.status_code == 304
+    assert not_modified.data == b""
+    assert not_modified.headers["ETag"] == etag
+
+    event_client.put(f"/events/{event_id}", json={"title": "Renamed"}, headers=headers)
+    changed = event_client.get(f"/events/{event_id}", headers=dict(headers, **{"If-None-Match": etag}))
+    assert changed.status_code == 200
+    assert changed.json["title"] == "Renamed"
+    assert changed.headers["ETag"] != etag
+
+    event_client.delete(f"/events/{event_id}", headers=headers)
+    assert event_client.get(f"/events/{event_id}", headers=dict(headers, **{"If-None-Match": etag})).status_code == 404
+
+def test_event_list_cache_invalidated_by_writes(event_client):
+    headers = _auth_headers("organizer-1")
+    _create_event(event_client, headers, 34.0, -118.0, dateTime="2025-07-01T09:00:00Z")
+    response = event_client.get("/events?limit=1", headers=headers)
+    etag = response.headers["ETag"]
+    assert "X-Next-Cursor" not in response.headers
+    assert event_client.get("/events?limit=1", headers=dict(headers, **{"If-None-Match": etag})).status_code == 304
+
+    second = _create_event(event_client, headers, 34.0, -118.0, dateTime="2025-06-01T09:00:00Z")
+    response = event_client.get("/events?limit=1", headers=dict(headers, **{"If-None-Match": etag}))
+    assert response.status_code == 200
+    assert [e["eventId"] for e in response.json] == [second]
+    assert "X-Next-Cursor" in response.headers
+
+    cached = event_client.get("/events?limit=1", headers=headers)
+    assert cached.headers["X-Next-Cursor"] == response.headers["X-Next-Cursor"]
+
+def test_bulk_import_reports_per_row_results(event_client):
+    headers = _auth_headers("organizer-1")
+    rows = [
+        {"title": "Beach Cleanup", "location": {"latitude": 34.0, "longitude": -118.0}, "dateTime": "2025-07-15T09:00:00Z"},
+        "not json",
+        {"title": "No Location", "dateTime": "2025-07-15T09:00:00Z"},
+        {"title": "Bad Date", "location": {"latitude": 34.0, "longitude": -118.0}, "dateTime": "next tuesday"},
+        {"title": "River Cleanup", "location": {"latitude": 34.1, "longitude": -118.1}, "dateTime": "2025-07-16T09:00:00Z", "capacity": 10},
+    ]
+    body = "\n".join(row if isinstance(row, str) else json.dumps(row) for row in rows) + "\n"
+    response = event_client.post("/events:bulk", data=body, content_type="application/x-ndjson", headers=headers)
+
+    assert response.status_code == 200
+    assert (response.json["created"], response.json["failed"]) == (2, 3)
+    assert [(r["line"], r["status"]) for r in response.json["results"]] == [
+        (1, "created"), (2, "error"), (3, "error"), (4, "error"), (5, "created"),
+    ]
+    assert response.json["results"][2]["message"] == "Missing required fields: title, location, dateTime"
+    created_id = response.json["results"][4]["eventId"]
+    assert event_service.events_db[created_id]["organizerId"] == "organizer-1"
+    assert [e["eventId"] for e in event_client.get("/events/search?q=river", headers=headers).json] == [created_id]
+
+def test_export_streams_ndjson_in_date_order(event_client, monkeypatch):
+    monkeypatch.setattr(event_service, "EXPORT_PAGE_SIZE", 2)
+    headers = _auth_headers("organizer-1")
+    ids = [_create_event(event_client, headers, 34.0, -118.0, dateTime=f"2025-07-{day:02d}T09:00:00Z") for day in (3, 1, 5, 2, 4)]
+
+    response = event_client.get("/events:export", headers=headers)
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    exported = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert [e["eventId"] for e in exported] == [ids[1], ids[3], ids[0], ids[4], ids[2]]
+
+def test_event_deleted_lists_attendees_in_parts(event_client, monkeypatch):
+    published = []
+    monkeypatch.setattr(event_service, "publish_event_to_event_bridge", lambda event_type, detail: published.append((event_type, detail)))
+    monkeypatch.setattr(event_service, "CANCELLATION_RECIPIENTS_PER_ENTRY", 2)
+    organizer = _auth_headers("organizer-1")
+    event_id = _create_event(event_client, organizer, 34.0, -118.0)
+    for i in range(5):
+        event_client.post(f"/events/{event_id}/rsvp", headers=_auth_headers(f"v{i}"))
+    rsvpd = [detail for event_type, detail in published if event_type == "UserRSVPd"]
+    assert {(d["title"], d["organizerId"]) for d in rsvpd} == {("Beach Cleanup", "organizer-1")}
+
+    event_client.delete(f"/events/{event_id}", headers=organizer)
+    deleted = [detail for event_type, detail in published if event_type == "EventDeleted"]
+    assert [(d["part"], d["parts"], len(d["attendeeIds"])) for d in deleted] == [(1, 3, 2), (2, 3, 2), (3, 3, 1)]
+    assert sorted(sum((d["attendeeIds"] for d in deleted), [])) == [f"v{i}" for i in range(5)]
+    assert event_service.rsvps_db == {}
+
+def test_date_changes_are_published_for_reminders(event_client, monkeypatch):
+    published = []
+    monkeypatch.setattr(event_service, "publish_event_to_event_bridge", lambda event_type, detail: published.append((event_type, detail)))
+    organizer = _auth_headers("organizer-1")
+    event_id = _create_event(event_client, organizer, 34.0, -118.0)
+    event_client.put(f"/events/{event_id}", json={"dateTime": "2025-07-20T09:00:00Z"}, headers=organizer)
+    assert [(event_type, detail["dateTime"]) for event_type, detail in published] == [
+        ("NewEventCreated", "2025-07-15T09:00:00Z"), ("EventUpdated", "2025-07-20T09:00:00Z")]
+
+def test_radius_and_update_payloads_are_validated(event_client):
+    headers = _auth_headers("organizer-1")
+    event_id = _create_event(event_client, headers, 34.0, -118.0)
+    for query in ("lat=nan&lng=0&radiusKm=5", "lat=0&lng=inf&radiusKm=5", "lat=0&lng=0&radiusKm=inf",
+                  "lat=0&lng=0&radiusKm=-1"):
+        assert event_client.get(f"/events?{query}", headers=headers).status_code == 400
+
+    for payload in ({"title": 42}, {"title": ""}, {"location": "Santa Monica"}, {"location": {"latitude": "34", "longitude": 1}},
+                    {"location": {"latitude": 95.0, "longitude": 1.0}}, {"supplies": ["gloves"]}, ["title"]):
+        assert event_client.put(f"/events/{event_id}", json=payload, headers=headers).status_code == 400
+    assert event_client.get(f"/events/{event_id}", headers=headers).json["title"] == "Beach Cleanup"
+    assert event_client.get("/events?lat=34&lng=-118&radiusKm=1", headers=headers).json[0]["eventId"] == event_id
+
+def test_detail_cache_never_keeps_a_body_older_than_its_version(event_client, monkeypatch):
+    headers = _auth_headers("organizer-1")
+    event_id = _create_event(event_client, headers, 34.0, -118.0)
+    read = event_service.events_db.get
+
+    def read_then_race(key, default=None):
+        doc = dict(read(key, default))
+        # Another request's update lands after this read, before the response is cached
+        renamed = dict(doc, title="Renamed")
+        event_service.events_db[key] = renamed
+        event_service.index_event(renamed)
+        return doc
+
+    monkeypatch.setattr(event_service.events_db, "get", read_then_race)
+    assert event_client.get(f"/events/{event_id}", headers=headers).json["title"] == "Beach Cleanup"
+    monkeypatch.setattr(event_service.events_db, "get", read)
+    assert event_client.get(f"/events/{event_id}", headers=headers).json["title"] == "Renamed"
+
+def test_bulk_import_enforces_the_byte_limit_without_content_length(event_client, monkeypatch):
+    headers = _auth_headers("organizer-1")
+    row = json.dumps({"title": "Beach Cleanup", "location": {"latitude": 34.0, "longitude": -118.0},
+                      "dateTime": "2025-07-15T09:00:00Z"}) + "\n"
+    monkeypatch.setattr(event_service, "BULK_MAX_BYTES", 3 * len(row))
+    monkeypatch.setattr(event_service, "BULK_BATCH_SIZE", 2)
+
+    def post_chunked(rows):
+        # Werkzeug ignores Content-Length on chunked requests; the server marks such input as terminated
+        return event_client.post("/events:bulk", input_stream=io.BytesIO((row * rows).encode()),
+                                 headers={**headers, "Transfer-Encoding": "chunked"}, content_type="application/x-ndjson",
+                                 environ_overrides={"wsgi.input_terminated": True})
+
+    response = post_chunked(3)
+    assert response.status_code == 200 and response.json["created"] == 3
+
+    response = post_chunked(100)
+    assert response.status_code == 413
+    assert response.json["created"] == 2  # The first batch went in before the limit was reached
+
+def test_other_workers_event_writes_reach_the_indexes_and_cache(event_client):
+    headers = _auth_headers("organizer-1")
+    local = _create_event(event_client, headers, 34.0, -118.0, title="Beach Cleanup")
+    assert [e["eventId"] for e in event_client.get("/events", headers=headers).json] == [local]
+    assert event_service.refresh_indexes() == 0  # This worker's own writes are already applied
+
+    # Another worker sharing the store creates an event and deletes this one
+    other_worker = event_service.ChangeFeed(event_service.event_changes.table)
+    remote = event_service.build_event({"title": "River Cleanup", "location": {"latitude": 34.0, "longitude": -118.0},
+                                        "dateTime": "2025-07-16T09:00:00Z"}, "organizer-2")
+    event_service.events_db[remote["eventId"]] = remote
+    other_worker.record(remote["eventId"])
+    del event_service.events_db[local]
+    other_worker.record(local)
+
+    event_service.refresh_indexes()  # What the background thread does every EVENTS_INDEX_REFRESH_SECONDS
+    assert [e["eventId"] for e in event_client.get("/events", headers=headers).json] == [remote["eventId"]]
+    assert [e["eventId"] for e in event_client.get("/events/search?q=river", headers=headers).json] == [remote["eventId"]]
+    assert [e["eventId"] for e in event_client.get("/events?lat=34&lng=-118&radiusKm=1", headers=headers).json] == [remote["eventId"]]
+    assert event_service.refresh_indexes() == 0
+
+def test_seats_are_never_oversold_without_the_in_process_lock(event_client, monkeypatch):
+    # As with several workers, where each has its own rsvp_locks: only the conditional writes protect the seats
+    class NoLocks:
+        def for_key(self, key):
+            return contextlib.nullcontext()
+
+    monkeypatch.setattr(event_service, "rsvp_locks", NoLocks())
+    monkeypatch.setattr(event_service, "publish_event_to_event_bridge", lambda event_type, detail: None)
+    event_id = _create_event(event_client, _auth_headers("organizer-1"), 34.0, -118.0, capacity=20)
+
+    def rsvp_and_maybe_withdraw(i):
+        with event_service.app.test_client() as client:
+            headers = _auth_headers(f"volunteer-{i}")
+            client.post(f"/events/{event_id}/rsvp", headers=headers)
+            if i % 3 == 0:
+                client.delete(f"/events/{event_id}/rsvp", headers=headers)
+
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            list(pool.map(rsvp_and_maybe_withdraw, range(150)))
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    confirmed = sum(r["status"] == "confirmed" for r in event_service.rsvps_db.values())
+    assert confirmed == event_service.confirmed_count(event_id) == 20
+    assert len(event_service.rsvps_db) == 100
+
+def test_geo_index_queries_run_alongside_writes():
+    from services.event_services.geo_index import GeoGridIndex
+    index = GeoGridIndex()
+    stop = threading.Event()
+
+    def churn():
+        i = 0
+        while not stop.is_set():
+            index.add(f"event-{i % 500}", 34.0 + (i % 50) * 0.01, -118.0 + (i % 70) * 0.01)
+            index.remove(f"event-{(i + 250) % 500}")
+            i += 1
+
+    def query(_):
+        for _ in range(200):
+            index.query_radius(34.2, -117.7, 100)
+
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    writer = threading.Thread(target=churn)
+    writer.start()
+    try:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(query, range(4)))  # Re-raises "dictionary changed size during iteration", if any
+    finally:
+        stop.set()
+        writer.join()
+        sys.setswitchinterval(switch_interval)
+
+def test_search_index_queries_run_alongside_writes():
+    from services.event_services.search_index import SearchIndex
+    index = SearchIndex()
+    stop = threading.Event()
+
+    def churn():
+        i = 0
+        while not stop.is_set():
+            index.add(f"event-{i % 500}", {"title": f"beach cleanup {i % 37}", "address": f"pier {i % 11}"})
+            index.remove(f"event-{(i + 250) % 500}")
+            i += 1
+
+    def query(_):
+        for _ in range(200):
+            index.search("beach pi", limit=10)
+
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    writer = threading.Thread(target=churn)
+    writer.start()
+    try:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(query, range(4)))
+    finally:
+        stop.set()
+        writer.join()
+        sys.setswitchinterval(switch_interval)
+
+def test_index_refresh_runs_alongside_radius_and_search_requests(event_client):
+    headers = _auth_headers("organizer-1")
+    other_worker = event_service.ChangeFeed(event_service.event_changes.table)
+    events = [event_service.build_event({"title": f"River Cleanup {i}", "location": {"latitude": 34.0 + i * 0.001,
+                                         "longitude": -118.0}, "dateTime": "2025-07-16T09:00:00Z"}, "organizer-2")
+              for i in range(200)]
+    stop = threading.Event()
+
+    def refresh():
+        # What the background thread does while other workers keep creating and deleting events
+        i = 0
+        while not stop.is_set():
+            event = events[i % len(events)]
+            if event["eventId"] in event_service.events_db:
+                del event_service.events_db[event["eventId"]]
+            else:
+                event_service.events_db[event["eventId"]] = event
+            other_worker.record(event["eventId"])
+            event_service.refresh_indexes()
+            i += 1
+
+    def query(_):
+        with event_service.app.test_client() as client:
+            for _ in range(50):
+                assert client.get("/events?lat=34.1&lng=-118&radiusKm=50", headers=headers).status_code == 200
+                assert client.get("/events/search?q=river", headers=headers).status_code == 200
+                assert client.get("/events", headers=headers).status_code == 200
+
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    writer = threading.Thread(target=refresh)
+    writer.start()
+    try:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(query, range(4)))
+    finally:
+        stop.set()
+        writer.join()
+        sys.setswitchinterval(switch_interval)
+
+def test_waitlist_promotion_reads_only_the_waitlist(event_client, monkeypatch):
+    monkeypatch.setattr(event_service, "publish_event_to_event_bridge", lambda event_type, detail: None)
+    organizer = _auth_headers("organizer-1")
+    event_id = _create_event(event_client, organizer, 34.0, -118.0, capacity=3)
+    for i in range(6):
+        event_client.post(f"/events/{event_id}/rsvp", headers=_auth_headers(f"v{i}"))
+
+    finds = []
+    find = event_service.rsvps_db.find
+    monkeypatch.setattr(event_service.rsvps_db, "find", lambda field, value: finds.append(field) or find(field, value))
+    event_client.put(f"/events/{event_id}", json={"title": "Still full"}, headers=organizer)
+    assert finds == []  # No free seat, so the waitlist isn't read
+
+    event_client.delete(f"/events/{event_id}/rsvp", headers=_auth_headers("v0"))
+    assert finds == ["waitlistFor"]
+    promoted = event_service.rsvps_db[f"{event_id}#v3"]
+    assert promoted["status"] == "confirmed" and "waitlistFor" not in promoted
+    assert [r["userId"] for r in find("waitlistFor", event_id)] == ["v4", "v5"]
+
+def test_radius_search_is_clamped_and_paged(event_client):
+    headers = _auth_headers("organizer-1")
+    near = [_create_event(event_client, headers, 34.0 + i * 0.01, -118.0, dateTime=f"2025-07-{10 + i % 2}T09:00:00Z")
+            for i in range(7)]
+    _create_event(event_client, headers, 51.5, -0.1)  # Further than EVENTS_MAX_RADIUS_KM, whatever radiusKm says
+
+    def pages(query):
+        ids, cursor = [], None
+        while True:
+            response = event_client.get(f"/events?{query}" + (f"&cursor={cursor}" if cursor else ""), headers=headers)
+            assert response.status_code == 200 and len(response.json) <= 3
+            ids.append([e["eventId"] for e in response.json])
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                return ids
+
+    assert pages("lat=34&lng=-118&radiusKm=100000&limit=3") == [near[0:3], near[3:6], near[6:]]
+    odd = [near[i] for i in range(1, 7, 2)]
+    assert pages("lat=34&lng=-118&radiusKm=50&limit=2&from=2025-07-11T00:00:00Z") == [odd[:2], odd[2:]]
+    assert event_client.get("/events?lat=34&lng=-118&radiusKm=5&limit=0", headers=headers).status_code == 400
+    assert event_client.get("/events?lat=34&lng=-118&radiusKm=5&cursor=nope", headers=headers).status_code == 400
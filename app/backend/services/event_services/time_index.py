@@ -0,0 +1,96 @@
+"""Sorted index of events by start time, with opaque cursors for pagination."""
+
+import base64
+import bisect
+import json
+import threading
+from datetime import datetime, UTC
+
+
+def parse_iso8601(value):
+    """Parses an ISO 8601 timestamp (``Z`` suffix allowed) into an aware UTC datetime."""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=UTC)
+    return parsed.astimezone(UTC)
+
+
+def encode_cursor(key):
+    """Turns an index key into an opaque, URL-safe cursor string."""
+    raw = json.dumps(list(key), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError for anything it didn't produce."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, event_id = json.loads(raw)
+        return float(timestamp), str(event_id)
+    except (TypeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+class TimeIndex:
+    """
+    Keeps ``(timestamp, event_id)`` keys in a bisect-maintained list.
+
+    Cursors encode the last key of a page, so the next page starts strictly after
+    it. That keeps pages stable while events are inserted or removed elsewhere in
+    the list, and each page costs a binary search plus the page itself. Updates
+    and pages may come from different threads; they take turns on a lock.
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._by_id = {}  # event_id -> key currently in _keys
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, event_id, when):
+        """Inserts or moves an event to the given start time."""
+        key = (when.timestamp(), event_id)
+        with self._lock:
+            if self._by_id.get(event_id) == key:
+                return
+            self._remove(event_id)
+            bisect.insort(self._keys, key)
+            self._by_id[event_id] = key
+
+    def remove(self, event_id):
+        """Drops an event from the index; unknown ids are ignored."""
+        with self._lock:
+            self._remove(event_id)
+
+    def _remove(self, event_id):
+        key = self._by_id.pop(event_id, None)
+        if key is None:
+            return
+        position = bisect.bisect_left(self._keys, key)
+        del self._keys[position]
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+            self._by_id.clear()
+
+    def page(self, start=None, end=None, limit=50, cursor=None):
+        """
+        Returns ``(event_ids, next_cursor)`` for events with ``start <= dateTime < end``.
+
+        ``next_cursor`` is None when there are no further events in the range.
+        """
+        after = decode_cursor(cursor) if cursor is not None else None
+        with self._lock:
+            position = bisect.bisect_right(self._keys, after) if after is not None else 0
+            if start is not None:
+                position = max(position, bisect.bisect_left(self._keys, (start.timestamp(), "")))
+            stop = len(self._keys)
+            if end is not None:
+                stop = bisect.bisect_left(self._keys, (end.timestamp(), ""))
+            keys = self._keys[position:min(stop, position + limit)]
+        has_more = position + limit < stop
+        next_cursor = encode_cursor(keys[-1]) if keys and has_more else None
+        return [event_id for _, event_id in keys], next_cursor
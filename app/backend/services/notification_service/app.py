@@ -5,11 +5,19 @@ from flask import Flask, request, jsonify
 import os
 import structlog
 import boto3 # For SNS, SQS
+import atexit
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, UTC
 from config import config
 
-# from .models import NotificationModel # Placeholder for PynamoDB or similar
+from storage import open_table
+from .batch import process_batch
+from .dedup import DeliveryLog, delivery_key
+from .fanout import fan_out
+from .models import NotificationModel
+from .reminders import REMINDER_OFFSETS, ReminderScheduler
+from .sns import LocalSNSClient
 
 app = Flask(__name__)
 # api = Api(app) # Only if exposing REST endpoints directly
@@ -24,12 +32,47 @@ AWS_REGION = os.environ.get("AWS_REGION", "us-east-1")
 SECRET_KEY = config.SECRET_KEY
 DATABASE_URL = config.DATABASE_URL
 
+# SQS batches are processed concurrently. A record still running after NOTIFICATION_RECORD_TIMEOUT
+# seconds is reported failed, and the batch always returns NOTIFICATION_DEADLINE_MARGIN seconds
+# before the Lambda would time out, so its result (the failed message ids) is never lost.
+NOTIFICATION_WORKERS = int(os.environ.get("NOTIFICATION_WORKERS", "10"))
+NOTIFICATION_RECORD_TIMEOUT = float(os.environ.get("NOTIFICATION_RECORD_TIMEOUT", "10"))
+NOTIFICATION_DEADLINE_MARGIN = float(os.environ.get("NOTIFICATION_DEADLINE_MARGIN", "2"))
+# Notifications to many users (e.g. everyone RSVP'd to a cancelled event) go out as PublishBatch calls,
+# NOTIFICATION_FANOUT_WORKERS at a time, shared by all the records being processed
+NOTIFICATION_FANOUT_WORKERS = int(os.environ.get("NOTIFICATION_FANOUT_WORKERS", "8"))
+NOTIFICATION_FANOUT_PAGE_SIZE = int(os.environ.get("NOTIFICATION_FANOUT_PAGE_SIZE", "500"))
+
 # Initialize AWS clients (boto3)
-# sns_client = boto3.client("sns", region_name=AWS_REGION) # Uncomment when SNS is provisioned
+# Without SNS_TOPIC_ARN_GENERAL the local stand-in client is used and nothing leaves the process.
+# One client is shared by the record-processing and fan-out threads (boto3 clients are thread-safe).
+if SNS_TOPIC_ARN_GENERAL:
+    from botocore.config import Config
+    sns_client = boto3.client("sns", region_name=AWS_REGION, config=Config(
+        retries={"mode": "adaptive", "max_attempts": 5},
+        max_pool_connections=NOTIFICATION_WORKERS + NOTIFICATION_FANOUT_WORKERS,
+    ))
+else:
+    sns_client = LocalSNSClient()
 # sqs_client = boto3.client("sqs", region_name=AWS_REGION) # Uncomment when SQS is provisioned
+fanout_executor = ThreadPoolExecutor(max_workers=NOTIFICATION_FANOUT_WORKERS, thread_name_prefix="sns-fanout")
 
 # In-memory notifications store for demonstration (replace with DynamoDB as per PRD)
-notifications_log_db = {}
+notifications_log_db = open_table("notifications_log", key_field="notificationId", indexes=("userId",), model=NotificationModel)
+# Who is attending each event, kept up to date from the RSVP events, so reminders can be sent to them
+attendees_db = open_table("event_attendees", key_field="attendeeId", indexes=("eventId",))
+# Pending reminders, shared by every instance: the scheduler's heap is rebuilt from this table on
+# startup and topped up from it on every tick
+reminders_db = open_table("event_reminders", key_field="reminderId", indexes=("eventId", "dueBucket"))
+# Each notification is claimed in notifications_log_db before it is sent, so that redeliveries don't
+# send it again (see dedup.DeliveryLog). NOTIFICATION_DEDUP_TTL should cover how long SQS may
+# redeliver a message (its retention period); sent keys are also cached in memory for that long.
+deliveries = DeliveryLog(
+    notifications_log_db,
+    ttl=float(os.environ.get("NOTIFICATION_DEDUP_TTL", str(14 * 86400))),
+    lease=float(os.environ.get("NOTIFICATION_CLAIM_LEASE", "60")),
+    cache_size=int(os.environ.get("NOTIFICATION_DEDUP_CACHE_SIZE", "100000")),
+)
 # Example: notifications_log_db["notif_uuid_1"] = {"notificationId": "notif_uuid_1", "userId": "cognito_sub_abc", "eventId": "event_uuid_1", "type": "event_reminder", "payload": {"message": "..."}, "status": "sent", "sentAt": "..."}
 
 # --- Event Handler Logic (Conceptual for Lambda) ---
@@ -38,106 +81,209 @@ def handle_eventbridge_event(event, context):
     """
     Processes events received from EventBridge (via SQS trigger typically).
     `event` would be the SQS message containing the EventBridge detail.
+
+    Returns the SQS partial batch response: only the messages listed in
+    ``batchItemFailures`` are redelivered, so the event source mapping must have
+    ``ReportBatchItemFailures`` enabled.
     """
-    logger.info("notification.handler.received_event", sqs_event=event)
-    
-    for record in event.get("Records", []):
-        try:
-            message_body_str = record.get("body")
-            if not message_body_str:
-                logger.warn("notification.handler.empty_message_body", record=record)
-                continue
-
-            # The SQS message body is the EventBridge event detail
-            event_detail_str = message_body_str # If EventBridge directly puts to SQS with full event
-            # If SQS message is a wrapper, extract EventBridge detail, e.g. json.loads(message_body_str).get("detail")
-            
-            event_detail = json.loads(event_detail_str) # Assuming body is the JSON string of the EventBridge event
-            event_type = event_detail.get("detail-type") # Or however EventBridge structures it
-            actual_detail = event_detail.get("detail")
-
-            logger.info("notification.handler.processing", event_type=event_type, detail=actual_detail)
-
-            # Based on event_type, craft and send notification
-            if event_type == "NewEventCreated":
-                # Example: Notify users interested in new events (complex logic not in scope for this stub)
-                # Or notify the organizer their event was listed.
-                user_id_to_notify = actual_detail.get("organizerId")
-                message = f"Your event '{actual_detail.get('title')}' has been successfully created!"
-                subject = "Event Created: " + actual_detail.get('title')
-                send_notification_via_sns(user_id_to_notify, subject, message, event_type, actual_detail.get("eventId"))
-            
-            elif event_type == "UserRSVPd":
-                # Notify organizer about new RSVP
-                # organizer_id = events_db.get(actual_detail.get("eventId"), {}).get("organizerId") # Needs access to event data
-                # if organizer_id:
-                #     message_to_organizer = f"User {actual_detail.get('userId')} has RSVPd to your event '{events_db.get(actual_detail.get('eventId'), {}).get('title')}'!"
-                #     subject_organizer = "New RSVP for your event"
-                #     send_notification_via_sns(organizer_id, subject_organizer, message_to_organizer, event_type, actual_detail.get("eventId"))
-                # Notify user about successful RSVP
-                user_id_to_notify = actual_detail.get("userId")
-                # message_to_user = f"You have successfully RSVPd to the event '{events_db.get(actual_detail.get('eventId'), {}).get('title')}'!"
-                # subject_user = "RSVP Confirmed"
-                # send_notification_via_sns(user_id_to_notify, subject_user, message_to_user, event_type, actual_detail.get("eventId"))
-
-            # TODO: Add handlers for other event types (reminders, cancellations, etc.)
-            # Reminders would likely be scheduled (e.g. EventBridge scheduled events triggering a Lambda)
-
-            # TODO: Log notification to DynamoDB using NotificationModel
-
-        except Exception as e:
-            logger.error("notification.handler.error", error=str(e), record_body=record.get("body"))
-            # Optionally, re-queue or send to DLQ based on SQS configuration
-            # For now, just log and continue
-    return {"status": "Processed SQS messages"}
+    records = event.get("Records", [])
+    logger.info("notification.handler.received_event", records=len(records))
+    suppressed_before = deliveries.suppressed
+    time_left = None
+    if context is not None and hasattr(context, "get_remaining_time_in_millis"):
+        time_left = max(0.0, context.get_remaining_time_in_millis() / 1000 - NOTIFICATION_DEADLINE_MARGIN)
+    failed = process_batch(
+        records, process_record,
+        max_workers=NOTIFICATION_WORKERS, timeout=NOTIFICATION_RECORD_TIMEOUT, time_left=time_left,
+    )
+    if failed:
+        logger.warn("notification.handler.partial_failure", failed=len(failed), records=len(records))
+    logger.info("notification.handler.batch_done", records=len(records), failed=len(failed),
+                duplicates_suppressed=deliveries.suppressed - suppressed_before)
+    return {"batchItemFailures": [{"itemIdentifier": message_id} for message_id in failed]}
+
+def process_record(record):
+    """Handles one SQS record. Raises if it should be redelivered."""
+    message_body_str = record.get("body")
+    if not message_body_str:
+        logger.warn("notification.handler.empty_message_body", record=record)
+        return  # Nothing to retry
+
+    # The SQS message body is the EventBridge event detail
+    event_detail_str = message_body_str # If EventBridge directly puts to SQS with full event
+    # If SQS message is a wrapper, extract EventBridge detail, e.g. json.loads(message_body_str).get("detail")
+
+    event_detail = json.loads(event_detail_str) # Assuming body is the JSON string of the EventBridge event
+    event_type = event_detail.get("detail-type") # Or however EventBridge structures it
+    actual_detail = event_detail.get("detail") or {}
+
+    # Notifications are deduplicated by the EventBridge event id, which redeliveries keep
+    source_id = event_detail.get("id") or record.get("messageId")
+
+    handler = EVENT_HANDLERS.get(event_type)
+    if handler is None:
+        logger.info("notification.handler.unhandled_type", event_type=event_type)
+        return  # Not ours to notify about; retrying won't change that
+    logger.info("notification.handler.processing", event_type=event_type, detail=actual_detail, source_id=source_id)
+    handler(actual_detail, source_id)
+
+# --- Event Handlers ---
+# detail-type -> handler(detail, source_id). Handlers raise to have the record redelivered, and pass
+# source_id on with what they send, so a redelivered record doesn't send anything twice.
+EVENT_HANDLERS = {}
+
+def handles(event_type):
+    """Registers the decorated function as the handler for ``event_type`` events."""
+    def register(handler):
+        EVENT_HANDLERS[event_type] = handler
+        return handler
+    return register
+
+@handles("NewEventCreated")
+def on_new_event_created(detail, source_id):
+    # Example: Notify users interested in new events (complex logic not in scope for this stub)
+    # Or notify the organizer their event was listed.
+    message = f"Your event '{detail.get('title')}' has been successfully created!"
+    subject = "Event Created: " + detail.get("title")
+    send_notification_via_sns(detail.get("organizerId"), subject, message, "NewEventCreated", detail.get("eventId"), source_id)
+    if detail.get("dateTime"):
+        reminder_scheduler.schedule_event(detail["eventId"], detail.get("title"), detail["dateTime"])
+
+@handles("EventUpdated")
+def on_event_updated(detail, source_id):
+    # Moves the reminders if the date changed (and picks up a new title); no-op otherwise
+    if detail.get("dateTime"):
+        reminder_scheduler.schedule_event(detail["eventId"], detail.get("title"), detail["dateTime"])
+
+@handles("UserRSVPd")
+def on_user_rsvpd(detail, source_id):
+    # The event service includes the event's title and organizer, so no lookup is needed here
+    event_id = detail.get("eventId")
+    title = detail.get("title") or event_id
+    if detail.get("organizerId"):
+        message_to_organizer = f"User {detail.get('userId')} has RSVPd to your event '{title}'!"
+        # A distinct type, so an organizer RSVPing to their own event still gets both messages
+        send_notification_via_sns(detail["organizerId"], "New RSVP for your event", message_to_organizer, "RSVPReceived", event_id, source_id)
+    if detail.get("status") == "waitlisted":
+        subject_user, message_to_user = "RSVP Waitlisted", f"The event '{title}' is full; you're on its waitlist."
+    else:
+        subject_user, message_to_user = "RSVP Confirmed", f"You have successfully RSVPd to the event '{title}'!"
+    send_notification_via_sns(detail.get("userId"), subject_user, message_to_user, "UserRSVPd", event_id, source_id)
+    if detail.get("status") == "confirmed":
+        add_attendee(event_id, detail.get("userId"))
+
+@handles("UserRSVPPromoted")
+def on_user_rsvp_promoted(detail, source_id):
+    add_attendee(detail.get("eventId"), detail.get("userId"))
+
+@handles("UserRSVPWithdrawn")
+def on_user_rsvp_withdrawn(detail, source_id):
+    attendees_db.pop(f"{detail.get('eventId')}#{detail.get('userId')}", None)
+
+def add_attendee(event_id, user_id):
+    attendees_db[f"{event_id}#{user_id}"] = {"attendeeId": f"{event_id}#{user_id}", "eventId": event_id, "userId": user_id}
+
+@handles("EventDeleted")
+def on_event_deleted(detail, source_id):
+    # The event service deletes the RSVPs with the event, so it sends their users along: a large
+    # audience is split over several EventDeleted entries, each listing one part of it
+    event_id = detail.get("eventId")
+    title = detail.get("title") or event_id
+    message = f"The event '{title}' has been cancelled by its organizer."
+    sent = fan_out_notification(detail.get("attendeeIds", []), "Event Cancelled: " + title, message, "EventDeleted",
+                                event_id, source_id)
+    logger.info("notification.event_deleted.fanned_out", event_id=event_id, sent=sent,
+                part=detail.get("part"), parts=detail.get("parts"))
+    reminder_scheduler.cancel_event(event_id)
+    for attendee in attendees_db.find("eventId", event_id):
+        attendees_db.pop(attendee["attendeeId"], None)
+
+def fan_out_notification(recipients, subject, message_body, notification_type, event_id, source_id):
+    """Sends one notification to many users with PublishBatch (see fanout.py), skipping ones already sent."""
+    def claim(user_id):
+        return deliveries.claim(delivery_key(source_id, user_id, notification_type), user_id, notification_type, subject, event_id)
+
+    def settle(user_id, sent):
+        key = delivery_key(source_id, user_id, notification_type)
+        deliveries.sent(key) if sent else deliveries.release(key)
+
+    return fan_out(
+        sns_client, SNS_TOPIC_ARN_GENERAL or "local", recipients,
+        lambda user_id: sns_message(user_id, subject, message_body, notification_type),
+        fanout_executor, page_size=NOTIFICATION_FANOUT_PAGE_SIZE, claim=claim, settle=settle,
+    )
+
+# --- Reminders ---
+def send_reminder(reminder):
+    """Sends one of an event's reminders to everyone attending it. Raises if some couldn't be sent."""
+    hours = REMINDER_OFFSETS[reminder["name"]] // 3600
+    subject = f"Reminder: {reminder['title']} starts in {hours} hour{'s' if hours != 1 else ''}"
+    message = f"The event '{reminder['title']}' starts at {reminder['dateTime']}. See you there!"
+    recipients = (attendee["userId"] for attendee in attendees_db.find("eventId", reminder["eventId"]))
+    # Keyed by the date too, so a rescheduled event's reminders are sent again
+    source_id = f"reminder:{reminder['reminderId']}@{reminder['dateTime']}"
+    sent = fan_out_notification(recipients, subject, message, "EventReminder", reminder["eventId"], source_id)
+    logger.info("notification.reminder.fanned_out", reminder_id=reminder["reminderId"], sent=sent)
+
+# Reminders fire REMINDER_OFFSETS before each event. With REMINDER_TICK_SECONDS > 0 a background thread
+# checks for due ones that often; set it to 0 where handle_reminder_tick runs on a schedule instead
+# (e.g. an EventBridge rule invoking the Lambda every minute).
+REMINDER_TICK_SECONDS = float(os.environ.get("REMINDER_TICK_SECONDS", "30"))
+reminder_scheduler = ReminderScheduler(reminders_db, send_reminder)
+reminder_scheduler.recover()
+if REMINDER_TICK_SECONDS > 0:
+    reminder_scheduler.start(REMINDER_TICK_SECONDS)
+    atexit.register(reminder_scheduler.stop)
+
+def handle_reminder_tick(event, context):
+    """Entry point for a scheduled invocation: sends the reminders that are due."""
+    return {"sent": reminder_scheduler.tick()}
 
 # --- SNS Sending Logic (Conceptual) ---
-def send_notification_via_sns(user_id, subject, message_body, notification_type, event_id=None):
-    """Placeholder for sending a notification via AWS SNS."""
-    # In a real scenario, this would:
+def send_notification_via_sns(user_id, subject, message_body, notification_type, event_id=None, source_id=None):
+    """
+    Publishes a notification for one user to the general topic. Raises if SNS rejects it.
+
+    The recipient goes in a message attribute, so per-user subscriptions can use a filter policy.
+    With ``source_id`` (what the notification is for, e.g. an EventBridge event id), it is sent
+    at most once per recipient and type; a repeat returns None without publishing.
+    """
+    key = delivery_key(source_id, user_id, notification_type) if source_id else None
+    if key and not deliveries.claim(key, user_id, notification_type, subject, event_id):
+        return None
+    # In a real scenario, this would also:
     # 1. Get user's contact preferences/details (e.g., email from User Service or Cognito)
-    # 2. Publish to an SNS topic or directly to an endpoint (if user has specific SNS endpoint ARN)
-    
+    # 2. Publish directly to an endpoint (if user has specific SNS endpoint ARN)
     logger.info("notification.send_sns.attempt", user_id=user_id, subject=subject, type=notification_type)
-    # try:
-    #     # This is a simplified example; actual targeting is more complex
-    #     # You might publish to a general topic, or a user-specific topic, or directly to an email endpoint if using SNS for email.
-    #     if not SNS_TOPIC_ARN_GENERAL:
-    #         logger.error("notification.send_sns.sns_topic_not_configured")
-    #         return
-    #     response = sns_client.publish(
-    #         TopicArn=SNS_TOPIC_ARN_GENERAL, # Or a more specific topic/endpoint
-    #         Message=json.dumps({
-    #             "default": message_body, # Default message
-    #             "email": message_body, # For email subscribers
-    #             "sms": message_body[:140] # For SMS subscribers (truncated)
-    #         }),
-    #         Subject=subject,
-    #         MessageStructure="json" # If sending structured messages for different protocols
-    #     )
-    #     logger.info("notification.send_sns.success", user_id=user_id, message_id=response.get("MessageId"))
-    #     # Log this notification to DynamoDB
-    #     log_notification_to_db(user_id, notification_type, {"subject": subject, "body": message_body}, "sent", event_id)
-    # except Exception as e:
-    #     logger.error("notification.send_sns.error", user_id=user_id, error=str(e))
-    #     log_notification_to_db(user_id, notification_type, {"subject": subject, "body": message_body, "error": str(e)}, "failed", event_id)
-    pass # Placeholder for actual SNS call
-
-def log_notification_to_db(user_id, notif_type, payload, status, event_id=None):
-    """Placeholder for logging notification to DynamoDB."""
-    # notification_id = str(uuid.uuid4())
-    # new_log = NotificationModel(
-    #     notificationId=notification_id,
-    #     userId=user_id,
-    #     eventId=event_id,
-    #     type=notif_type,
-    #     payload=payload,
-    #     status=status,
-    #     sentAt=datetime.utcnow() # Or receivedAt if status is pending
-    # )
-    # new_log.save()
-    # logger.info("notification.log_db.success", notification_id=notification_id)
-    pass
+    try:
+        response = sns_client.publish(
+            TopicArn=SNS_TOPIC_ARN_GENERAL or "local",
+            **sns_message(user_id, subject, message_body, notification_type),
+        )
+    except Exception:
+        if key:
+            deliveries.release(key)  # So that a redelivery can try again
+        raise
+    if key:
+        deliveries.sent(key)
+    logger.info("notification.send_sns.success", user_id=user_id, message_id=response.get("MessageId"))
+    return response.get("MessageId")
+
+def sns_message(user_id, subject, message_body, notification_type):
+    """The ``publish`` arguments (or PublishBatch entry, less its Id) for one user's notification."""
+    return {
+        "Message": json.dumps({
+            "default": message_body, # Default message
+            "email": message_body, # For email subscribers
+            "sms": message_body[:140] # For SMS subscribers (truncated)
+        }),
+        "Subject": subject[:100], # SNS rejects longer subjects
+        "MessageStructure": "json", # Structured message for the different protocols
+        "MessageAttributes": {
+            "userId": {"DataType": "String", "StringValue": str(user_id)},
+            "type": {"DataType": "String", "StringValue": notification_type},
+        },
+    }
 
 # --- Internal API Endpoint (as per PRD, but likely less used if event-driven) ---
 # The PRD mentions POST /notifications/send. This might be for ad-hoc or specific system-initiated notifications
@@ -155,14 +301,19 @@ def send_adhoc_notification():
     if not all([user_id, subject, message]):
         return jsonify({"message": "Missing userId, subject, or message"}), 400
     
-    send_notification_via_sns(user_id, subject, message, notif_type, event_id)
+    try:
+        send_notification_via_sns(user_id, subject, message, notif_type, event_id)
+    except Exception as e:
+        logger.error("notification.adhoc.send_failed", user_id=user_id, error=str(e))
+        return jsonify({"message": "Notification could not be sent"}), 502
     return jsonify({"message": "Adhoc notification processed"}), 202
 
 # Basic health check endpoint
 @app.route("/notifications/health", methods=["GET"])
 def health_check():
     logger.info("notification.health.check")
-    return jsonify({"status": "Notification service is healthy", "version": "0.1.0"}), 200
+    return jsonify({"status": "Notification service is healthy", "version": "0.1.0", "reminders": reminder_scheduler.stats(),
+                    "deliveries": deliveries.stats()}), 200
 
 # This __main__ is for conceptual local testing of the Flask app part.
 # The primary functionality (handle_eventbridge_event) is designed for a Lambda environment.
@@ -0,0 +1,92 @@
+"""Concurrent processing of an SQS batch, reporting which messages failed so only those are redelivered."""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import structlog
+
+logger = structlog.get_logger()
+
+
+class _Task:
+    __slots__ = ("record", "started_at")
+
+    def __init__(self, record):
+        self.record = record
+        self.started_at = None
+
+
+def _message_id(record):
+    return record.get("messageId")
+
+
+def process_batch(records, process, max_workers=10, timeout=10.0, time_left=None, clock=time.monotonic):
+    """
+    Runs ``process(record)`` for every record and returns the messageIds of those that failed.
+
+    Records run concurrently on up to ``max_workers`` threads. A record fails if
+    ``process`` raises, or if it is still running ``timeout`` seconds after it
+    started; the batch returns without waiting for it (its thread is abandoned,
+    and SQS will redeliver the message). ``time_left`` caps the whole batch, e.g.
+    the Lambda's remaining time less a margin: anything unfinished by then fails.
+
+    Records from a FIFO queue are processed one at a time in order, and after the
+    first failure the rest are reported failed unprocessed, so that SQS keeps
+    their order on redelivery.
+    """
+    if not records:
+        return []
+    deadline = clock() + time_left if time_left is not None else None
+    if records[0].get("eventSourceARN", "").endswith(".fifo"):
+        return _process_in_order(records, process, timeout, deadline, clock)
+
+    failed = set()
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(records))), thread_name_prefix="sqs-record")
+
+    def run(task):
+        task.started_at = clock()
+        return process(task.record)
+
+    try:
+        pending = {executor.submit(run, task): task for task in map(_Task, records)}
+        while pending:
+            now = clock()
+            # Sleep until the next record could time out (or the batch deadline), unless one finishes first
+            wake_at = [task.started_at + timeout for task in pending.values() if task.started_at is not None]
+            if deadline is not None:
+                wake_at.append(deadline)
+            done, _ = wait(pending, timeout=max(0.0, min(wake_at, default=now + timeout) - now), return_when=FIRST_COMPLETED)
+            for future in done:
+                task = pending.pop(future)
+                error = future.exception()
+                if error is not None:
+                    failed.add(_message_id(task.record))
+                    logger.error("notification.batch.record_failed", message_id=_message_id(task.record), error=str(error))
+            now = clock()
+            for future, task in list(pending.items()):
+                timed_out = task.started_at is not None and now - task.started_at >= timeout
+                if timed_out or (deadline is not None and now >= deadline):
+                    del pending[future]
+                    future.cancel()  # Only stops records that haven't started
+                    failed.add(_message_id(task.record))
+                    logger.error("notification.batch.record_timed_out", message_id=_message_id(task.record),
+                                 started=task.started_at is not None)
+    finally:
+        # Don't wait for abandoned records; their threads finish (or hang) on their own
+        executor.shutdown(wait=False, cancel_futures=True)
+    return [_message_id(record) for record in records if _message_id(record) in failed]
+
+
+def _process_in_order(records, process, timeout, deadline, clock):
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqs-fifo")
+    try:
+        for index, record in enumerate(records):
+            limit = timeout if deadline is None else min(timeout, deadline - clock())
+            try:
+                executor.submit(process, record).result(timeout=max(0.0, limit))
+            except Exception as e:
+                logger.error("notification.batch.record_failed", message_id=_message_id(record), error=str(e) or type(e).__name__)
+                return [_message_id(r) for r in records[index:]]
+        return []
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
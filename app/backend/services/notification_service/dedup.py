@@ -0,0 +1,160 @@
+"""Deduplication of notification sends, since SQS (and EventBridge) deliver at least once."""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, UTC
+
+import structlog
+
+from storage import VersionConflict
+from storage.base import VERSION_FIELD
+
+logger = structlog.get_logger()
+
+
+def delivery_key(source_id, user_id, notification_type):
+    """One notification: what it was sent for (the EventBridge event id), who to, and which message."""
+    return f"{source_id}#{user_id}#{notification_type}"
+
+
+class ClaimInFlight(Exception):
+    """Another worker holds a live claim on the notification; retry once it has been settled."""
+
+
+class TTLCache:
+    """A set of keys that forgets each one ``ttl`` seconds after it was added, holding at most ``max_entries``."""
+
+    def __init__(self, max_entries=100_000, ttl=3600.0, clock=time.time):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._expiry = OrderedDict()  # key -> expires_at; one TTL for all, so oldest first is soonest to expire
+        self._lock = threading.Lock()
+
+    def add(self, key):
+        now = self.clock()
+        with self._lock:
+            self._expiry[key] = now + self.ttl
+            self._expiry.move_to_end(key)
+            while self._expiry and (len(self._expiry) > self.max_entries or next(iter(self._expiry.values())) <= now):
+                self._expiry.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._expiry.pop(key, None)
+
+    def __contains__(self, key):
+        with self._lock:
+            expires_at = self._expiry.get(key)
+            return expires_at is not None and expires_at > self.clock()
+
+    def __len__(self):
+        return len(self._expiry)
+
+
+class DeliveryLog:
+    """
+    Claims each notification before it is sent, so a redelivered event doesn't send it twice.
+
+    ``claim`` conditionally writes a "pending" record to ``table`` (the
+    notifications log), which fails if one exists. If the notification was sent
+    already, ``claim`` returns False. If another worker is still sending it, it
+    raises ClaimInFlight: that send may yet fail, so the caller must retry
+    later (e.g. leave the SQS record to be redelivered) rather than drop it.
+    After the send, ``sent`` marks the record, or ``release`` deletes it so that
+    a redelivery can retry.
+
+    Records carry ``expiresAt`` (the DynamoDB TTL attribute): ``ttl`` seconds
+    after the send, which should cover how long SQS may redeliver, or ``lease``
+    seconds after a claim, after which a claim whose worker died before settling
+    it is taken over. Keys known to be sent are also kept in an in-memory
+    TTLCache of ``cache_size``, so most duplicates are dropped without a read.
+    ``suppressed`` counts duplicates dropped, ``cache_hits`` those of them the
+    cache caught, ``in_flight`` the claims deferred because of another's.
+    """
+
+    def __init__(self, table, ttl=14 * 86400.0, lease=60.0, cache_size=100_000, clock=time.time):
+        self.table = table
+        self.ttl = ttl
+        self.lease = lease
+        self.clock = clock
+        self.recent = TTLCache(cache_size, ttl, clock)
+        self.claimed = self.suppressed = self.cache_hits = self.takeovers = self.in_flight = 0
+        self._counter_lock = threading.Lock()
+
+    def _count(self, *counters):
+        with self._counter_lock:
+            for counter in counters:
+                setattr(self, counter, getattr(self, counter) + 1)
+
+    def claim(self, key, user_id, notification_type, subject, event_id=None):
+        """
+        Returns True if the caller should send this notification, False if it was sent already.
+
+        Raises ClaimInFlight while another worker's claim on it is live.
+        """
+        if key in self.recent:
+            self._count("cache_hits")
+            return self._suppress(key)
+        now = self.clock()
+        record = {
+            "notificationId": key, "userId": user_id, "eventId": event_id, "type": notification_type,
+            "payload": {"subject": subject}, "status": "pending",
+            "createdAt": datetime.fromtimestamp(now, UTC).isoformat(), "expiresAt": int(now + self.lease),
+        }
+        if self.table.insert(record):
+            self._count("claimed")
+            return True
+
+        existing = self.table.load(key)
+        if existing is not None and existing.get("expiresAt", 0) > now:
+            if existing.get("status") == "sent":
+                self.recent.add(key)
+                return self._suppress(key)
+            self._defer(key)
+        if existing is None:  # Released since the insert failed
+            if not self.table.insert(record):
+                self._defer(key)  # Claimed again meanwhile
+            self._count("claimed")
+            return True
+        # An abandoned claim, or a send from longer ago than the dedup window: take it over
+        fields = {field: value for field, value in record.items() if field != "notificationId"}
+        try:
+            self.table.update(key, fields, expected_version=existing.get(VERSION_FIELD, 0))
+        except (KeyError, VersionConflict):
+            self._defer(key)  # Someone else got there first
+        self._count("takeovers", "claimed")
+        logger.info("notification.dedup.claim_taken_over", key=key)
+        return True
+
+    def sent(self, key):
+        now = self.clock()
+        self.recent.add(key)
+        try:
+            self.table.update(key, {"status": "sent", "sentAt": datetime.fromtimestamp(now, UTC).isoformat(),
+                                    "expiresAt": int(now + self.ttl)})
+        except Exception as e:
+            # The message went out; the unsettled claim still blocks resends until its lease expires
+            logger.warn("notification.dedup.record_failed", key=key, error=str(e))
+
+    def release(self, key):
+        self.recent.discard(key)
+        try:
+            self.table.pop(key, None)
+        except Exception as e:
+            logger.warn("notification.dedup.release_failed", key=key, error=str(e))
+
+    def _suppress(self, key):
+        self._count("suppressed")
+        logger.info("notification.dedup.duplicate_suppressed", key=key)
+        return False
+
+    def _defer(self, key):
+        self._count("in_flight")
+        logger.info("notification.dedup.claim_in_flight", key=key)
+        raise ClaimInFlight(key)
+
+    def stats(self):
+        return {"claimed": self.claimed, "suppressed": self.suppressed, "cacheHits": self.cache_hits,
+                "takeovers": self.takeovers, "inFlight": self.in_flight, "cached": len(self.recent)}
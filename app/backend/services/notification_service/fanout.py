@@ -0,0 +1,103 @@
+"""Sending one notification to many recipients through SNS PublishBatch."""
+
+import itertools
+
+import structlog
+
+from .dedup import ClaimInFlight
+
+logger = structlog.get_logger()
+
+# PublishBatch accepts at most this many entries per call
+MAX_BATCH_ENTRIES = 10
+
+
+class FanOutIncomplete(Exception):
+    """Some recipients still weren't sent to after retrying; the record should be redelivered."""
+
+    def __init__(self, failed, sent):
+        super().__init__(f"{len(failed)} recipient(s) not notified ({sent} sent)")
+        self.failed = failed
+        self.sent = sent
+
+
+def pages(items, size):
+    """Lists of up to ``size`` items from ``items``, read lazily."""
+    items = iter(items)
+    while page := list(itertools.islice(items, size)):
+        yield page
+
+
+def _publish_chunk(client, topic_arn, chunk, message_for, claim=None, settle=None):
+    # Returns (sent, retryable recipients, rejected recipients, recipients another worker is sending to)
+    in_flight = []
+    if claim is not None:
+        claimed = []
+        for user_id in chunk:
+            try:
+                if claim(user_id):
+                    claimed.append(user_id)
+            except ClaimInFlight:
+                in_flight.append(user_id)
+        chunk = claimed
+        if not chunk:
+            return 0, [], [], in_flight
+    entries = [dict(message_for(user_id), Id=str(i)) for i, user_id in enumerate(chunk)]
+    try:
+        response = client.publish_batch(TopicArn=topic_arn, PublishBatchRequestEntries=entries)
+    except Exception as e:
+        logger.warn("notification.fanout.batch_error", recipients=len(chunk), error=str(e))
+        response = {"Successful": [], "Failed": [{"Id": entry["Id"], "SenderFault": False} for entry in entries]}
+    retry, rejected = [], []
+    for failure in response.get("Failed", []):
+        user_id = chunk[int(failure["Id"])]
+        (rejected if failure.get("SenderFault") else retry).append(user_id)
+        logger.warn("notification.fanout.entry_failed", user_id=user_id, code=failure.get("Code"))
+    if settle is not None:
+        for success in response.get("Successful", []):
+            settle(chunk[int(success["Id"])], True)
+        for user_id in retry + rejected:
+            settle(user_id, False)
+    return len(response.get("Successful", [])), retry, rejected, in_flight
+
+
+def fan_out(client, topic_arn, recipients, message_for, executor, page_size=500, attempts=2, claim=None, settle=None):
+    """
+    Sends ``message_for(user_id)`` (``publish`` keyword arguments, without
+    ``TopicArn``) to every user in ``recipients`` and returns how many were sent.
+
+    Recipients are read a page of ``page_size`` at a time, so a large audience
+    is never held in memory at once, and duplicates are skipped. Each page goes
+    out as PublishBatch calls of up to 10 entries, run concurrently on
+    ``executor``. Entries that failed on AWS's side are retried, up to
+    ``attempts`` sends in all, before FanOutIncomplete is raised; entries SNS
+    rejected as malformed are logged and dropped, as resending won't help.
+
+    With ``claim(user_id)``, only recipients it returns True for are sent to
+    (see dedup.DeliveryLog), and ``settle(user_id, sent)`` is called with each
+    claimed recipient's outcome. Recipients whose claim raises ClaimInFlight
+    are left out and counted as failed, so that the record is redelivered and
+    they are checked again once the other send has settled.
+    """
+    seen = set()
+    sent, failed = 0, []
+    for page in pages(recipients, page_size):
+        page = [user_id for user_id in page if user_id not in seen]
+        seen.update(page)
+        for attempt in range(attempts):
+            futures = [executor.submit(_publish_chunk, client, topic_arn, chunk, message_for, claim, settle)
+                       for chunk in pages(page, MAX_BATCH_ENTRIES)]
+            page = []
+            for future in futures:
+                chunk_sent, retry, rejected, in_flight = future.result()
+                sent += chunk_sent
+                page.extend(retry)
+                failed.extend(in_flight)
+                if rejected:
+                    logger.error("notification.fanout.rejected", recipients=len(rejected))
+            if not page:
+                break
+        failed.extend(page)
+    if failed:
+        raise FanOutIncomplete(failed, sent)
+    return sent
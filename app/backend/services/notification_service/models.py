@@ -1,7 +1,8 @@
 """Notification service models."""
 
 from pynamodb.models import Model
-from pynamodb.attributes import UnicodeAttribute, MapAttribute, UTCDateTimeAttribute
+from pynamodb.indexes import GlobalSecondaryIndex, AllProjection
+from pynamodb.attributes import UnicodeAttribute, MapAttribute, NumberAttribute, UTCDateTimeAttribute
 import os
 from datetime import datetime, UTC
 
@@ -9,7 +10,17 @@ from datetime import datetime, UTC
 # Service: Notification
 # Table: Notifications
 # PK: notificationId
-# Attributes: userId, eventId, type, payload, status, sentAt
+# Attributes: userId, eventId, type, payload, status, sentAt, expiresAt (TTL)
+
+class NotificationsByUserIndex(GlobalSecondaryIndex):
+    """
+    Notifications by user; what ``notifications_log_db.find("userId", ...)`` queries.
+    """
+    class Meta:
+        index_name = "userId-index"
+        projection = AllProjection()
+
+    userId = UnicodeAttribute(hash_key=True)
 
 class NotificationModel(Model):
     """
@@ -20,6 +31,7 @@ class NotificationModel(Model):
         region = os.environ.get("AWS_REGION", "us-east-1")
         aws_access_key_id = os.environ.get("AWS_ACCESS_KEY_ID_DUMMY", "dummy")
         aws_secret_access_key = os.environ.get("AWS_SECRET_ACCESS_KEY_DUMMY", "dummy")
+        host = os.environ.get("DYNAMODB_ENDPOINT_URL") # DynamoDB Local / moto in development
 
     notificationId = UnicodeAttribute(hash_key=True)
     userId = UnicodeAttribute(null=False)
@@ -29,6 +41,9 @@ class NotificationModel(Model):
     status = UnicodeAttribute(null=False, default="pending") # e.g., "pending", "sent", "failed", "read"
     createdAt = UTCDateTimeAttribute(default=datetime.now(UTC)) # When the notification was generated
     sentAt = UTCDateTimeAttribute(null=True) # When the notification was actually sent
+    expiresAt = NumberAttribute(null=True) # Epoch seconds; the table's TTL attribute, see dedup.DeliveryLog
+    version = NumberAttribute(default=0) # Bumped by Table.update, for conditional takeovers of stale claims
+    by_user = NotificationsByUserIndex()
 
     def __iter__(self):
         for name, attr in self.get_attributes().items():
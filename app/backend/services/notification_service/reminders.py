@@ -0,0 +1,238 @@
+"""Event reminders (a day and an hour before an event starts), kept in a min-heap by due time."""
+
+import heapq
+import threading
+import time
+from datetime import datetime, UTC
+
+import structlog
+
+from storage import VersionConflict
+from storage.base import VERSION_FIELD
+
+logger = structlog.get_logger()
+
+# Reminder name -> seconds before the event starts
+REMINDER_OFFSETS = {"24h": 24 * 3600, "1h": 3600}
+# Reminders carry the minute they fall due in, an indexed field, so a tick can ask the table for just those
+DUE_BUCKET_SECONDS = 60
+# How far before the last tick a tick looks again, for writes that landed late or came from a skewed clock
+PULL_MARGIN_SECONDS = 60
+# After a longer gap (the first tick, or a stall) a tick reloads every reminder instead
+MAX_PULL_SECONDS = 3600
+
+
+def event_timestamp(value):
+    """An event's ISO 8601 ``dateTime`` as seconds since the epoch (naive times are UTC)."""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=UTC)
+    return parsed.timestamp()
+
+
+def reminder_id(event_id, name):
+    return f"{event_id}#{name}"
+
+
+def due_bucket(timestamp):
+    return int(timestamp // DUE_BUCKET_SECONDS)
+
+
+def _same_reminder(stored, reminder):
+    return stored["dueAt"] == reminder["dueAt"] and stored["dateTime"] == reminder["dateTime"]
+
+
+class ReminderScheduler:
+    """
+    Fires ``send(reminder)`` for each event's reminders when they fall due.
+
+    Pending reminders are kept in ``table`` (so they survive a restart; see
+    ``recover``) and in a min-heap of ``(dueAt, reminderId)``, so ``tick`` only
+    looks at reminders that are due: each costs O(log n), and nothing else is
+    touched. Rescheduling or cancelling doesn't search the heap; the old entry is
+    left in place and skipped when it surfaces, as it no longer matches the
+    pending reminder.
+
+    The table is the source of truth, shared by every instance. Each ``tick``
+    first pulls the reminders that fell due since the last one from it (through
+    the ``dueBucket`` index), so reminders scheduled by other instances fire
+    too, and each reminder is read back before it is sent: one that another
+    instance moved or cancelled meanwhile is skipped as superseded.
+
+    A reminder that fires late (the service was down, or ``send`` failed) is
+    still sent until the next reminder for the same event falls due, or for the
+    last one until the event starts; after that it is dropped as expired, so
+    nobody gets "starts in 24 hours" an hour before the start. ``clock``
+    returns seconds since the epoch and can be replaced in tests.
+    """
+
+    def __init__(self, table, send, clock=time.time, offsets=REMINDER_OFFSETS, retry_delay=60.0):
+        self.table = table
+        self.send = send
+        self.clock = clock
+        self.offsets = dict(offsets)
+        self.retry_delay = retry_delay
+        self.fired = self.expired = self.failures = self.superseded = 0
+        self._pending = {}  # reminderId -> reminder
+        self._heap = []
+        self._pulled_at = clock()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _push(self, reminder):
+        # Caller holds the lock
+        self._pending[reminder["reminderId"]] = reminder
+        heapq.heappush(self._heap, (reminder["dueAt"], reminder["reminderId"]))
+        # Superseded entries are normally dropped as they surface; don't let frequent reschedules pile them up
+        if len(self._heap) > 2 * len(self._pending) + 64:
+            self._heap = [(r["dueAt"], r["reminderId"]) for r in self._pending.values()]
+            heapq.heapify(self._heap)
+
+    def _drop(self, rid):
+        # Caller holds the lock
+        self._pending.pop(rid, None)
+        self.table.pop(rid, None)
+
+    def schedule_event(self, event_id, title, date_time):
+        """Schedules (or moves) an event's reminders; ones already past are not scheduled."""
+        starts_at = event_timestamp(date_time)
+        now = self.clock()
+        # Each reminder expires when the next one (or the event) is due
+        by_due = sorted(self.offsets.items(), key=lambda item: -item[1])
+        expires = [starts_at - offset for _, offset in by_due[1:]] + [starts_at]
+        with self._lock:
+            for (name, offset), expires_at in zip(by_due, expires):
+                rid = reminder_id(event_id, name)
+                due_at = starts_at - offset
+                if due_at <= now:
+                    self._drop(rid)
+                    continue
+                reminder = {"reminderId": rid, "eventId": event_id, "name": name, "title": title, "dateTime": date_time,
+                            "dueAt": due_at, "dueBucket": due_bucket(due_at), "expiresAt": expires_at}
+                if self._pending.get(rid) == reminder:
+                    continue
+                self.table[rid] = reminder
+                self._push(reminder)
+        logger.info("notification.reminder.scheduled", event_id=event_id, date_time=date_time)
+
+    def cancel_event(self, event_id):
+        with self._lock:
+            for name in self.offsets:
+                self._drop(reminder_id(event_id, name))
+        logger.info("notification.reminder.cancelled", event_id=event_id)
+
+    def recover(self):
+        """Reloads pending reminders from the table after a restart; ones missed meanwhile fire on the next tick."""
+        now = self.clock()
+        with self._lock:
+            self._pending.clear()
+            self._heap = []
+            for reminder in self.table.values():
+                self._push(reminder)
+            self._pulled_at = now
+        missed = sum(1 for reminder in self._pending.values() if reminder["dueAt"] <= now)
+        logger.info("notification.reminder.recovered", pending=len(self._pending), missed=missed)
+        return len(self._pending)
+
+    def _pull(self, now):
+        """Adds reminders that fell due since the last pull, wherever they were scheduled, to the heap."""
+        since = self._pulled_at - PULL_MARGIN_SECONDS
+        if now - since > MAX_PULL_SECONDS:
+            self.recover()
+            return
+        stored = self.table.find_many("dueBucket", range(due_bucket(since), due_bucket(now) + 1))
+        with self._lock:
+            for reminder in stored:
+                if reminder["dueAt"] <= now and self._pending.get(reminder["reminderId"]) != reminder:
+                    self._push(reminder)
+            self._pulled_at = now
+
+    def tick(self):
+        """Sends every reminder that is due, earliest first, and returns how many were sent."""
+        now = self.clock()
+        self._pull(now)
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due_at, rid = heapq.heappop(self._heap)
+                reminder = self._pending.get(rid)
+                if reminder is None or reminder["dueAt"] != due_at:
+                    continue  # Cancelled or rescheduled since this entry was pushed
+                del self._pending[rid]
+                due.append(reminder)
+        return sum(self._fire(reminder, now) for reminder in due)
+
+    def _fire(self, reminder, now):
+        rid = reminder["reminderId"]
+        stored = self.table.load(rid)
+        if stored is None or not _same_reminder(stored, reminder):
+            # Cancelled or moved by another instance; a moved one fires at its new time
+            self.superseded += 1
+            logger.info("notification.reminder.superseded", reminder_id=rid)
+            with self._lock:
+                if stored is not None and rid not in self._pending:
+                    self._push(stored)
+            return 0
+        if now >= reminder["expiresAt"]:
+            self.expired += 1
+            logger.warn("notification.reminder.expired", reminder_id=rid, late_by=round(now - reminder["dueAt"], 1))
+            self._forget(reminder)
+            return 0
+        try:
+            self.send(reminder)
+        except Exception as e:
+            self.failures += 1
+            logger.error("notification.reminder.send_failed", reminder_id=rid, error=str(e))
+            self._retry(stored, now)
+            return 0
+        self.fired += 1
+        logger.info("notification.reminder.sent", reminder_id=rid, late_by=round(now - reminder["dueAt"], 1))
+        self._forget(reminder)
+        return 1
+
+    def _retry(self, stored, now):
+        # Stored, so that any instance (or this one after a restart) tries again shortly
+        due_at = now + self.retry_delay
+        try:
+            retry = self.table.update(stored["reminderId"], {"dueAt": due_at, "dueBucket": due_bucket(due_at)},
+                                      expected_version=stored.get(VERSION_FIELD, 0))
+        except (KeyError, VersionConflict):
+            return  # Moved or cancelled while it was being sent
+        with self._lock:
+            if stored["reminderId"] not in self._pending:
+                self._push(retry)
+
+    def _forget(self, reminder):
+        rid = reminder["reminderId"]
+        with self._lock:
+            if rid in self._pending:
+                return  # Rescheduled here while it was being sent: keep the new one
+            stored = self.table.load(rid)
+            if stored is not None and _same_reminder(stored, reminder):  # Or by another instance
+                self.table.pop(rid, None)
+
+    def start(self, interval):
+        """Ticks every ``interval`` seconds on a background thread, until ``stop``."""
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.tick()
+                except Exception as e:
+                    logger.error("notification.reminder.tick_failed", error=str(e))
+
+        self._thread = threading.Thread(target=run, name="reminder-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def stats(self):
+        next_due = min((r["dueAt"] for r in self._pending.values()), default=None)
+        return {"pending": len(self._pending), "fired": self.fired, "expired": self.expired,
+                "failures": self.failures, "superseded": self.superseded, "nextDueAt": next_due}
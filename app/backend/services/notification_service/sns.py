@@ -0,0 +1,67 @@
+"""In-process stand-in for the SNS client, used when no topic is configured and by tests and benchmarks."""
+
+import itertools
+import random
+import threading
+import time
+from collections import deque
+
+
+class LocalSNSClient:
+    """
+    Accepts ``publish`` and ``publish_batch`` calls the way the boto3 ``sns`` client does, without sending anything.
+
+    ``latency`` (seconds, or a ``() -> seconds`` callable for jittered latency)
+    simulates the round trip of every call. ``fail`` is an optional predicate over
+    a message's keyword arguments; matching publishes raise, as a throttled or
+    failed publish would, and matching batch entries come back in ``Failed``.
+    Only the most recent ``max_recorded`` messages are kept.
+    """
+
+    def __init__(self, latency=0.0, fail=None, max_recorded=10_000):
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+        self.published = deque(maxlen=max_recorded)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _wait(self):
+        latency = self.latency() if callable(self.latency) else self.latency
+        if latency:
+            time.sleep(latency)
+
+    def publish(self, **kwargs):
+        self._wait()
+        with self._lock:
+            self.calls += 1
+            if self.fail and self.fail(kwargs):
+                raise RuntimeError("Simulated SNS failure")
+            self.published.append(kwargs)
+            return {"MessageId": f"local-{next(self._ids)}"}
+
+    def publish_batch(self, TopicArn, PublishBatchRequestEntries):
+        entries = PublishBatchRequestEntries
+        if len(entries) > 10:
+            raise ValueError("TooManyEntriesInBatchRequest: at most 10 entries per PublishBatch")
+        if len({entry["Id"] for entry in entries}) != len(entries):
+            raise ValueError("BatchEntryIdsNotDistinct: entry ids must be unique within a batch")
+        self._wait()
+        successful, failed = [], []
+        with self._lock:
+            self.calls += 1
+            for entry in entries:
+                message = {key: value for key, value in entry.items() if key != "Id"}
+                message["TopicArn"] = TopicArn
+                if self.fail and self.fail(message):
+                    failed.append({"Id": entry["Id"], "Code": "InternalError", "SenderFault": False,
+                                   "Message": "Simulated SNS failure"})
+                    continue
+                self.published.append(message)
+                successful.append({"Id": entry["Id"], "MessageId": f"local-{next(self._ids)}"})
+        return {"Successful": successful, "Failed": failed}
+
+
+def jittered(mean, spread=0.5):
+    """A latency callable: uniformly within ``mean * (1 +/- spread)`` seconds."""
+    return lambda: random.uniform(mean * (1 - spread), mean * (1 + spread))
@@ -29,3 +29,312 @@ def test_send_notification(mock_dependency, client):
     })
     assert response.status_code == 202
     assert response.json["message"] == "Adhoc notification processed"
+
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from services.notification_service import app as notification_service
+from services.notification_service.batch import process_batch
+from services.notification_service.dedup import ClaimInFlight, DeliveryLog, TTLCache, delivery_key
+from services.notification_service.sns import LocalSNSClient
+from storage.memory import MemoryTable
+
+def _record(message_id, detail_type="NewEventCreated", **detail):
+    detail = {"eventId": "e1", "title": "Beach Cleanup", "organizerId": "org-1", **detail}
+    return {"messageId": message_id, "body": json.dumps({"detail-type": detail_type, "detail": detail})}
+
+@pytest.fixture
+def sns(monkeypatch):
+    client = LocalSNSClient()
+    monkeypatch.setattr(notification_service, "sns_client", client)
+    # A fresh delivery log, so message ids reused across tests aren't taken for redeliveries
+    log = DeliveryLog(MemoryTable("notifications_log", "notificationId", ("userId",)))
+    monkeypatch.setattr(notification_service, "deliveries", log)
+    return client
+
+def test_only_failed_records_are_reported(sns):
+    sns.fail = lambda call: "Broken" in call["Subject"]
+    records = [_record("ok-1"), _record("bad-json") | {"body": "{not json"}, _record("sns-fails", title="Broken"), _record("ok-2")]
+    result = notification_service.handle_eventbridge_event({"Records": records}, None)
+    assert result == {"batchItemFailures": [{"itemIdentifier": "bad-json"}, {"itemIdentifier": "sns-fails"}]}
+    assert len(sns.published) == 2
+
+def test_records_run_concurrently_and_slow_ones_time_out():
+    release = threading.Event()
+
+    def process(record):
+        if record["messageId"] == "hung":
+            release.wait(5)
+        else:
+            time.sleep(0.1)
+
+    records = [{"messageId": f"m{i}"} for i in range(8)] + [{"messageId": "hung"}]
+    start = time.monotonic()
+    assert process_batch(records, process, max_workers=10, timeout=0.3) == ["hung"]
+    elapsed = time.monotonic() - start
+    release.set()
+    assert 0.3 <= elapsed < 0.8  # Not 8 x 0.1 s serially, and not waiting for the hung record
+
+def test_batch_deadline_fails_unfinished_records():
+    records = [{"messageId": f"m{i}"} for i in range(4)]
+    failed = process_batch(records, lambda record: time.sleep(0.5), max_workers=2, timeout=10, time_left=0.2)
+    assert failed == ["m0", "m1", "m2", "m3"]
+
+def test_fifo_batches_stop_at_the_first_failure():
+    seen = []
+
+    def process(record):
+        seen.append(record["messageId"])
+        if record["messageId"] == "m1":
+            raise RuntimeError("boom")
+
+    records = [{"messageId": f"m{i}", "eventSourceARN": "arn:aws:sqs:us-east-1:1:q.fifo"} for i in range(4)]
+    assert process_batch(records, process) == ["m1", "m2", "m3"]
+    assert seen == ["m0", "m1"]
+
+def _user_ids(messages):
+    return [m["MessageAttributes"]["userId"]["StringValue"] for m in messages]
+
+def test_handlers_are_dispatched_by_detail_type(sns):
+    records = [_record("rsvp", "UserRSVPd", userId="vol-1", status="waitlisted"), _record("other", "SomethingElse")]
+    assert notification_service.handle_eventbridge_event({"Records": records}, None) == {"batchItemFailures": []}
+    assert [(m["Subject"], user) for m, user in zip(sns.published, _user_ids(sns.published))] == [
+        ("New RSVP for your event", "org-1"), ("RSVP Waitlisted", "vol-1")]
+    assert set(notification_service.EVENT_HANDLERS) >= {"NewEventCreated", "UserRSVPd", "EventDeleted"}
+
+def test_event_deleted_fans_out_in_publish_batches(sns):
+    attendees = [f"vol-{i}" for i in range(2_000)]
+    record = _record("cancel", "EventDeleted", attendeeIds=attendees + attendees[:50], part=1, parts=1)
+    assert notification_service.handle_eventbridge_event({"Records": [record]}, None) == {"batchItemFailures": []}
+    assert sns.calls == 200  # 10 per PublishBatch, duplicates skipped
+    assert sorted(_user_ids(sns.published)) == sorted(attendees)
+    assert {m["Subject"] for m in sns.published} == {"Event Cancelled: Beach Cleanup"}
+
+def test_fan_out_retries_failed_entries_then_fails_the_record(sns):
+    failures_left = {"vol-3": 1}
+
+    def fail_once(message):
+        user_id = _user_ids([message])[0]
+        if failures_left.get(user_id):
+            failures_left[user_id] -= 1
+            return True
+        return False
+
+    sns.fail = fail_once
+    record = _record("cancel", "EventDeleted", attendeeIds=[f"vol-{i}" for i in range(25)])
+    assert notification_service.handle_eventbridge_event({"Records": [record]}, None) == {"batchItemFailures": []}
+    assert sns.calls == 4 and len(sns.published) == 25  # 3 batches, then 1 retrying vol-3
+
+    sns.fail = lambda message: _user_ids([message])[0] == "vol-7"
+    result = notification_service.handle_eventbridge_event({"Records": [record | {"messageId": "again"}]}, None)
+    assert result == {"batchItemFailures": [{"itemIdentifier": "again"}]}
+
+from services.notification_service.reminders import ReminderScheduler, event_timestamp
+
+class FakeClock:
+    def __init__(self, when):
+        self.now = event_timestamp(when)
+
+    def __call__(self):
+        return self.now
+
+    def set(self, when):
+        self.now = event_timestamp(when)
+
+def _reminders(clock, sent, table=None, send=None):
+    table = MemoryTable("event_reminders", "reminderId", ("eventId", "dueBucket")) if table is None else table
+    return ReminderScheduler(table, send or (lambda reminder: sent.append(reminder["reminderId"])), clock=clock)
+
+def test_reminders_fire_in_due_order_under_a_simulated_clock():
+    clock, sent = FakeClock("2030-01-01T00:00:00Z"), []
+    scheduler = _reminders(clock, sent)
+    scheduler.schedule_event("late", "Late", "2030-01-10T18:00:00Z")
+    scheduler.schedule_event("early", "Early", "2030-01-10T12:00:00Z")
+    assert scheduler.tick() == 0 and len(scheduler) == 4
+
+    clock.set("2030-01-09T18:00:00Z")
+    assert scheduler.tick() == 2 and sent == ["early#24h", "late#24h"]
+    clock.set("2030-01-10T11:30:00Z")
+    assert scheduler.tick() == 1 and sent[2:] == ["early#1h"]
+    clock.set("2030-01-10T17:00:00Z")
+    assert scheduler.tick() == 1 and sent[3:] == ["late#1h"]
+    assert len(scheduler) == 0 and len(scheduler.table) == 0
+
+def test_changing_the_date_moves_the_reminders():
+    clock, sent = FakeClock("2030-01-01T00:00:00Z"), []
+    scheduler = _reminders(clock, sent)
+    scheduler.schedule_event("e1", "Cleanup", "2030-01-10T12:00:00Z")
+    scheduler.schedule_event("e1", "Cleanup", "2030-01-12T12:00:00Z")
+    clock.set("2030-01-10T11:30:00Z")  # Both of the original reminders would be due by now
+    assert scheduler.tick() == 0
+    clock.set("2030-01-11T12:00:00Z")
+    assert scheduler.tick() == 1 and sent == ["e1#24h"]
+
+    scheduler.schedule_event("e1", "Cleanup", "2030-01-11T20:00:00Z")  # Brought forward: only the 1h reminder is still ahead
+    assert [r["reminderId"] for r in scheduler.table.values()] == ["e1#1h"]
+    scheduler.cancel_event("e1")
+    clock.set("2030-01-11T19:30:00Z")
+    assert scheduler.tick() == 0 and len(scheduler.table) == 0
+
+def test_missed_reminders_are_recovered_after_a_restart():
+    clock, sent = FakeClock("2030-01-01T00:00:00Z"), []
+    table = MemoryTable("event_reminders", "reminderId", ("eventId",))
+    before = _reminders(clock, sent, table)
+    before.schedule_event("e1", "Cleanup", "2030-01-10T12:00:00Z")
+    before.schedule_event("e2", "Planting", "2030-01-10T20:00:00Z")
+
+    clock.set("2030-01-10T11:30:00Z")  # Down through e1's 24h and 1h reminders and e2's 24h one
+    after = _reminders(clock, sent, table)
+    assert after.recover() == 4
+    assert after.tick() == 2
+    assert sorted(sent) == ["e1#1h", "e2#24h"]  # e1's 24h reminder is stale once its 1h one is due
+    assert after.expired == 1 and len(after) == 1
+
+def test_failed_reminders_are_retried():
+    clock, attempts = FakeClock("2030-01-01T00:00:00Z"), []
+
+    def send(reminder):
+        attempts.append(reminder["reminderId"])
+        if len(attempts) == 1:
+            raise RuntimeError("SNS is down")
+
+    scheduler = _reminders(clock, [], send=send)
+    scheduler.schedule_event("e1", "Cleanup", "2030-01-10T12:00:00Z")
+    clock.set("2030-01-09T12:00:00Z")
+    assert scheduler.tick() == 0 and scheduler.failures == 1 and len(scheduler.table) == 2
+    clock.now += scheduler.retry_delay
+    assert scheduler.tick() == 1 and attempts == ["e1#24h", "e1#24h"]
+
+def test_instances_sharing_the_table_see_each_others_schedule_changes():
+    clock, sent = FakeClock("2030-01-09T11:30:00Z"), []
+    table = MemoryTable("event_reminders", "reminderId", ("eventId", "dueBucket"))
+    first, second = _reminders(clock, sent, table), _reminders(clock, sent, table)
+    first.schedule_event("moved", "Cleanup", "2030-01-10T12:00:00Z")
+    first.schedule_event("cancelled", "Planting", "2030-01-10T12:00:00Z")
+    first.schedule_event("kept", "Survey", "2030-01-10T12:00:00Z")
+    second.recover()
+    # The other instance handles the later changes, and an event the first one never heard of
+    second.schedule_event("moved", "Cleanup", "2030-01-12T12:00:00Z")
+    second.cancel_event("cancelled")
+    second.schedule_event("new", "Mapping", "2030-01-10T12:00:00Z")
+
+    clock.set("2030-01-09T11:59:30Z")
+    assert first.tick() == 0
+    clock.set("2030-01-09T12:00:00Z")  # Ticking regularly, the first instance never reloads the whole table
+    assert first.tick() == 2 and sorted(sent) == ["kept#24h", "new#24h"]
+    assert first.superseded == 2  # Its stale entries for "moved" and "cancelled" didn't fire
+    assert second.tick() == 0  # Already sent and removed by the first instance
+    clock.set("2030-01-11T12:00:00Z")
+    assert first.tick() == 1 and sent[-1] == "moved#24h"
+
+def test_reminders_reach_the_attendees_tracked_from_rsvp_events(sns, monkeypatch):
+    clock = FakeClock("2030-01-01T00:00:00Z")
+    notification_service.attendees_db.clear()
+    notification_service.reminders_db.clear()
+    scheduler = ReminderScheduler(notification_service.reminders_db, notification_service.send_reminder, clock=clock)
+    monkeypatch.setattr(notification_service, "reminder_scheduler", scheduler)
+
+    def handle(detail_type, **detail):
+        result = notification_service.handle_eventbridge_event({"Records": [_record("m", detail_type, **detail)]}, None)
+        assert result == {"batchItemFailures": []}
+
+    handle("NewEventCreated", dateTime="2030-01-10T12:00:00Z")
+    handle("UserRSVPd", userId="vol-1", status="confirmed")
+    handle("UserRSVPd", userId="vol-2", status="waitlisted")
+    handle("UserRSVPPromoted", userId="vol-2", status="confirmed")
+    handle("UserRSVPWithdrawn", userId="vol-1", status="withdrawn")
+    handle("EventUpdated", dateTime="2030-01-11T12:00:00Z")
+
+    sns.published.clear()
+    clock.set("2030-01-10T12:00:00Z")
+    assert notification_service.handle_reminder_tick({}, None) == {"sent": 1}
+    assert [(m["Subject"], user) for m, user in zip(sns.published, _user_ids(sns.published))] == [
+        ("Reminder: Beach Cleanup starts in 24 hours", "vol-2")]
+
+    handle("EventDeleted", attendeeIds=["vol-2"])
+    assert len(scheduler) == 0 and len(notification_service.attendees_db) == 0
+
+def _redelivered(record, message_id, event_id="eb-1"):
+    # What SQS hands over again: a new message (or receipt), the same EventBridge event inside
+    body = dict(json.loads(record["body"]), id=event_id)
+    return {"messageId": message_id, "body": json.dumps(body)}
+
+def test_redelivered_events_send_nothing_twice(sns):
+    rsvp = _record("m1", "UserRSVPd", userId="org-1", status="confirmed")  # The organizer RSVPing to their own event
+    for message_id in ("m1", "m1-again"):
+        assert notification_service.handle_eventbridge_event({"Records": [_redelivered(rsvp, message_id)]}, None) == {"batchItemFailures": []}
+    assert [m["Subject"] for m in sns.published] == ["New RSVP for your event", "RSVP Confirmed"]
+    assert notification_service.deliveries.stats()["suppressed"] == 2
+
+    # A cancellation that partly failed is retried for the users who didn't get it, and only them
+    sns.fail = lambda message: _user_ids([message])[0] == "vol-7"
+    cancel = _redelivered(_record("c1", "EventDeleted", attendeeIds=[f"vol-{i}" for i in range(25)]), "c1", "eb-2")
+    assert notification_service.handle_eventbridge_event({"Records": [cancel]}, None) == {"batchItemFailures": [{"itemIdentifier": "c1"}]}
+    sns.fail = None
+    sns.published.clear()
+    assert notification_service.handle_eventbridge_event({"Records": [cancel]}, None) == {"batchItemFailures": []}
+    assert _user_ids(sns.published) == ["vol-7"]
+
+def test_delivery_log_claims_leases_and_cache():
+    clock = FakeClock("2030-01-01T00:00:00Z")
+    log = DeliveryLog(MemoryTable("notifications_log", "notificationId", ("userId",)), ttl=3600, lease=60, clock=clock)
+    assert log.claim("k1", "u1", "Test", "Hello")
+    with pytest.raises(ClaimInFlight):
+        log.claim("k1", "u1", "Test", "Hello")  # Still being sent elsewhere, and that send may fail
+    log.sent("k1")
+    assert not log.claim("k1", "u1", "Test", "Hello")
+    assert log.table["k1"]["status"] == "sent" and log.stats()["cacheHits"] == 1
+
+    assert log.claim("k2", "u1", "Test", "Hello")
+    log.release("k2")  # The send failed
+    assert log.claim("k2", "u1", "Test", "Hello")
+    clock.now += 61  # ...and that worker died before settling its claim
+    assert log.claim("k2", "u1", "Test", "Hello") and log.takeovers == 1
+
+    log.recent = TTLCache(max_entries=10, ttl=3600, clock=clock)
+    clock.now += 3601  # k1's dedup window has passed
+    assert log.claim("k1", "u1", "Test", "Hello")
+    assert log.stats()["suppressed"] == 1 and log.stats()["inFlight"] == 1
+
+def test_concurrent_claims_have_one_winner():
+    log = DeliveryLog(MemoryTable("notifications_log", "notificationId", ("userId",)))
+
+    def claim(_):
+        try:
+            return log.claim("k", "u1", "Test", "Hello")
+        except ClaimInFlight:
+            return None
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        won = list(pool.map(claim, range(32)))
+    assert won.count(True) == 1 and won.count(None) == 31 and log.in_flight == 31
+
+def test_ttl_cache_is_bounded_and_expires():
+    clock = FakeClock("2030-01-01T00:00:00Z")
+    cache = TTLCache(max_entries=3, ttl=10, clock=clock)
+    for key in "abcd":
+        cache.add(key)
+    assert "a" not in cache and "d" in cache and len(cache) == 3
+    clock.now += 10
+    assert "d" not in cache
+
+def test_redelivery_during_another_workers_send_is_retried_not_dropped(sns):
+    rsvp = _redelivered(_record("m1", "UserRSVPd", userId="vol-1", status="waitlisted"), "m1")
+    cancel = _redelivered(_record("c1", "EventDeleted", attendeeIds=["vol-1", "vol-2"]), "c1", "eb-2")
+    log = notification_service.deliveries
+    # Another worker has claimed these sends (e.g. its copy of the record is about to time out)
+    assert log.claim(delivery_key("eb-1", "vol-1", "UserRSVPd"), "vol-1", "UserRSVPd", "RSVP Waitlisted")
+    assert log.claim(delivery_key("eb-2", "vol-2", "EventDeleted"), "vol-2", "EventDeleted", "Event Cancelled")
+
+    result = notification_service.handle_eventbridge_event({"Records": [rsvp, cancel]}, None)
+    assert result == {"batchItemFailures": [{"itemIdentifier": "m1"}, {"itemIdentifier": "c1"}]}
+    assert _user_ids(sns.published) == ["org-1", "vol-1"]  # The organizer's notice and vol-1's cancellation
+
+    # That worker's sends fail, so it releases its claims; the redeliveries now send them
+    log.release(delivery_key("eb-1", "vol-1", "UserRSVPd"))
+    log.release(delivery_key("eb-2", "vol-2", "EventDeleted"))
+    sns.published.clear()
+    assert notification_service.handle_eventbridge_event({"Records": [rsvp, cancel]}, None) == {"batchItemFailures": []}
+    assert sorted(_user_ids(sns.published)) == ["vol-1", "vol-2"]
@@ -2,18 +2,21 @@
 
 from flask import Flask, request, jsonify
 from flask_restful import Api, Resource
-from flask_jwt_extended import jwt_required, get_jwt_identity, JWTManager # To protect endpoints and get user identity
+from flask_jwt_extended import jwt_required, get_jwt_identity # To protect endpoints and get user identity
 import os
 import structlog
 from datetime import datetime, UTC
 import uuid # For generating reportId
 
 from config import config
+from tokens import init_jwt
 
-# from .models import ReportModel # Placeholder for PynamoDB or similar
+from storage import open_table
+from .models import ReportModel
 
 app = Flask(__name__)
 api = Api(app)
+jwt = init_jwt(app)
 logger = structlog.get_logger()
 
 # Example usage of the config module
@@ -21,7 +24,7 @@ SECRET_KEY = config.SECRET_KEY
 DATABASE_URL = config.DATABASE_URL
 
 # In-memory data store for demonstration (replace with DynamoDB as per PRD)
-reports_db = {}
+reports_db = open_table("reports", key_field="reportId", indexes=("eventId",), model=ReportModel)
 # Example: reports_db = {"report_uuid_1": {"reportId": "report_uuid_1", "eventId": "event_uuid_1", "submittedBy": "cognito_sub_xyz", "bagsCollected": 10, "photoUrls": ["http://example.com/photo1.jpg"], "submittedAt": "2025-07-16T10:00:00Z"}}
 
 class EventReport(Resource):
@@ -92,7 +95,5 @@ def health_check():
     return jsonify({"status": "Reporting service is healthy", "version": "0.1.0"}), 200
 
 if __name__ == "__main__":
-    app.config["JWT_SECRET_KEY"] = os.environ.get("JWT_SECRET_KEY", "super-secret-key-for-dev-only") 
-    jwt = JWTManager(app) # Initialize JWTManager if running standalone for testing
     app.run(host="0.0.0.0", port=5005, debug=True)
 
@@ -1,4 +1,5 @@
 from pynamodb.models import Model
+from pynamodb.indexes import GlobalSecondaryIndex, AllProjection
 from pynamodb.attributes import UnicodeAttribute, MapAttribute, UTCDateTimeAttribute, NumberAttribute, ListAttribute
 import os
 from datetime import datetime
@@ -9,6 +10,16 @@ from datetime import datetime
 # PK: reportId
 # Attributes: eventId, submittedBy, bagsCollected, photoUrls, submittedAt
 
+class ReportsByEventIndex(GlobalSecondaryIndex):
+    """
+    Reports by event; what ``reports_db.find("eventId", ...)`` queries.
+    """
+    class Meta:
+        index_name = "eventId-index"
+        projection = AllProjection()
+
+    eventId = UnicodeAttribute(hash_key=True)
+
 class ReportModel(Model):
     """
     Represents a post-event report submitted by a user.
@@ -18,6 +29,7 @@ class ReportModel(Model):
         region = os.environ.get("AWS_REGION", "us-east-1")
         aws_access_key_id = os.environ.get("AWS_ACCESS_KEY_ID_DUMMY", "dummy")
         aws_secret_access_key = os.environ.get("AWS_SECRET_ACCESS_KEY_DUMMY", "dummy")
+        host = os.environ.get("DYNAMODB_ENDPOINT_URL") # DynamoDB Local / moto in development
 
     reportId = UnicodeAttribute(hash_key=True)
     eventId = UnicodeAttribute(null=False)
@@ -26,6 +38,7 @@ class ReportModel(Model):
     photoUrls = ListAttribute(of=UnicodeAttribute, null=False) # List of S3 URLs for photos
     otherMetrics = MapAttribute(null=True) # For any additional metrics collected
     submittedAt = UTCDateTimeAttribute(default=datetime.utcnow)
+    by_event = ReportsByEventIndex()
 
     def __iter__(self):
         for name, attr in self.get_attributes().items():
@@ -1,17 +1,24 @@
 """User service application."""
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, send_file
 from flask_restful import Api, Resource
-from flask_jwt_extended import jwt_required, get_jwt_identity, JWTManager # To protect endpoints and get user identity
+from flask_jwt_extended import jwt_required, get_jwt_identity # To protect endpoints and get user identity
+import atexit
 import os
 import structlog
-from datetime import datetime, UTC
 from config import config
+from tokens import init_jwt
 
-# from .models import ProfileModel # Placeholder for PynamoDB or similar
+from storage import VersionConflict, open_table
+from storage.base import VERSION_FIELD
+from storage.blobs import LocalBlobStore, open_blob_store
+from storage.cache import CachedTable
+from .avatars import AvatarPipeline, AvatarPipelineBusy, AvatarRejected
+from .models import ProfileModel
 
 app = Flask(__name__)
 api = Api(app)
+jwt = init_jwt(app)
 logger = structlog.get_logger()
 
 # Example usage of the config module
@@ -21,9 +28,166 @@ DATABASE_URL = config.DATABASE_URL
 # In-memory user profiles store for demonstration (replace with DynamoDB as per PRD)
 # This will be replaced with DynamoDB for user profile data persistence.
 # Keyed by userId (which would typically be the Cognito sub)
-profiles_db = {}
+# Profiles are read on every render and rarely written, so reads go through a read-through cache.
+# Writes through profiles_db invalidate it; other workers' writes show up within PROFILE_CACHE_TTL.
+profiles_db = CachedTable(
+    open_table("profiles", key_field="userId", model=ProfileModel),
+    max_entries=int(os.environ.get("PROFILE_CACHE_SIZE", "10000")),
+    ttl=float(os.environ.get("PROFILE_CACHE_TTL", "60")),
+)
 # Example: profiles_db = {"cognito_sub_123": {"userId": "cognito_sub_123", "name": "Jane Doe", "joinedAt": "2024-01-15T10:00:00Z", "preferences": {"notifications": True}, "avatarUrl": "http://example.com/avatar.jpg"}}
 
+# Uploaded avatars: thumbnailed in worker processes and stored by content hash, in S3
+# (AVATAR_STORE=s3://bucket/prefix) or, by default, in a local directory served by AvatarFile below.
+# AVATAR_BASE_URL is where the store's root is served; behind the gateway use /api/users for the local store.
+# Unset, S3 links to the bucket itself and the local store to AvatarFile.
+AVATAR_STORE = os.environ.get("AVATAR_STORE", "uploads")
+avatar_store = open_blob_store(
+    AVATAR_STORE,
+    base_url=os.environ.get("AVATAR_BASE_URL") or (None if AVATAR_STORE.startswith("s3://") else "/users"),
+    cache_control="public, max-age=31536000, immutable",  # A key's content never changes
+)
+avatar_pipeline = AvatarPipeline(
+    avatar_store,
+    workers=int(os.environ.get("AVATAR_WORKERS", "1")),
+    max_queue=int(os.environ.get("AVATAR_QUEUE", "4")),
+    timeout=float(os.environ.get("AVATAR_TIMEOUT", "10")),
+    max_bytes=int(os.environ.get("AVATAR_MAX_BYTES", str(10 * 1024 * 1024))),
+)
+atexit.register(avatar_pipeline.shutdown)
+AVATAR_RETRY_AFTER_SECONDS = 1
+
+# Fields any signed-in user may see on someone else's profile (preferences stay private)
+PUBLIC_PROFILE_FIELDS = ("userId", "name", "avatarUrl", "joinedAt")
+MAX_BATCH_IDS = 100  # One DynamoDB BatchGetItem request
+
+def _as_list(value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return [part.strip() for part in value.split(",") if part.strip()]
+    if isinstance(value, list) and all(isinstance(part, str) for part in value):
+        return value
+    raise ValueError
+
+class UserProfileBatch(Resource):
+    """
+    Public profile fields for many users in one call, e.g. for an attendee list.
+
+    ``GET /users?ids=a,b,c&fields=name,avatarUrl``, or ``POST /users`` with
+    ``{"ids": [...], "fields": [...]}`` when the id list is too long for a URL.
+    Profiles come back in request order; ids without a profile are listed in ``missing``.
+    """
+
+    @jwt_required()
+    def get(self):
+        return self._lookup(request.args.get("ids"), request.args.get("fields"))
+
+    @jwt_required()
+    def post(self):
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            logger.warn("user.profile.batch.missing_payload")
+            return {"message": "Payload missing"}, 400
+        return self._lookup(data.get("ids"), data.get("fields"))
+
+    def _lookup(self, ids, fields):
+        try:
+            ids, fields = _as_list(ids), _as_list(fields)
+        except ValueError:
+            return {"message": "ids and fields must be comma-separated strings or lists of strings"}, 400
+        if not ids:
+            return {"message": "ids is required"}, 400
+        ids = list(dict.fromkeys(ids))
+        if len(ids) > MAX_BATCH_IDS:
+            return {"message": f"At most {MAX_BATCH_IDS} ids per request"}, 400
+        if fields is None:
+            fields = list(PUBLIC_PROFILE_FIELDS)
+        elif not set(fields) <= set(PUBLIC_PROFILE_FIELDS):
+            return {"message": f"fields must be among {', '.join(PUBLIC_PROFILE_FIELDS)}"}, 400
+        elif "userId" not in fields:
+            fields = ["userId", *fields]  # Callers need it to match profiles to their ids
+
+        found = profiles_db.get_many(ids, fields=fields)
+        missing = [user_id for user_id in ids if user_id not in found]
+        logger.info("user.profile.batch.success", requested=len(ids), found=len(found))
+        return {"profiles": list(found.values()), "missing": missing}, 200
+
+# Fields the owner can change with PUT or PATCH (as per PRD: name, preferences, avatarUrl)
+EDITABLE_PROFILE_FIELDS = ("name", "preferences", "avatarUrl")
+# Attempts at an update without If-Match before giving up on a profile that keeps changing
+MAX_UPDATE_ATTEMPTS = 3
+
+def profile_etag(profile):
+    # Every change bumps the version, so it identifies the representation
+    return str(profile.get(VERSION_FIELD, 0))
+
+def profile_response(profile):
+    response = jsonify(profile)
+    response.set_etag(profile_etag(profile))
+    return response
+
+def merge_patch(target, patch):
+    """Applies an RFC 7396 JSON Merge Patch: objects merge key by key, null deletes, anything else replaces."""
+    if not isinstance(patch, dict):
+        return patch
+    merged = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            merged.pop(key, None)
+        else:
+            merged[key] = merge_patch(merged.get(key), value)
+    return merged
+
+def invalid_profile_fields(fields):
+    """An error message for field values a profile can't hold, or None."""
+    if fields.get("preferences") is not None and not isinstance(fields["preferences"], dict):
+        return "Preferences must be an object"
+    for field in ("name", "avatarUrl"):
+        if fields.get(field) is not None and not isinstance(fields[field], str):
+            return f"{field} must be a string"
+    # Avatars are set by uploading one, so profiles never link to full-size images elsewhere
+    if fields.get("avatarUrl") is not None and not fields["avatarUrl"].startswith(avatar_store.url("avatars/")):
+        return "avatarUrl can only be removed here; upload a new avatar with PUT /users/<userId>/avatar"
+    return None
+
+def update_profile(userId, changes, event_name):
+    """
+    Applies ``changes(profile) -> (set_fields, remove_fields)`` to the stored profile, honouring If-Match.
+
+    The changes are computed from the latest stored profile and written with a
+    condition on its version, so concurrent updates can't overwrite each other.
+    With If-Match, a profile at another version gets 412. Without it, the update
+    is recomputed against the newer profile and retried.
+    """
+    for _ in range(MAX_UPDATE_ATTEMPTS):
+        profile = profiles_db.load(userId)
+        if profile is None:
+            logger.warn(f"{event_name}.not_found", userId=userId)
+            return {"message": "User profile not found to update"}, 404
+        if request.if_match and not request.if_match.contains(profile_etag(profile)):
+            logger.warn(f"{event_name}.precondition_failed", userId=userId, version=profile.get(VERSION_FIELD, 0))
+            return {"message": "Profile has changed; fetch it again and retry"}, 412, {"ETag": f'"{profile_etag(profile)}"'}
+        set_fields, remove_fields = changes(profile)
+        error = invalid_profile_fields(set_fields)
+        if error:
+            return {"message": error}, 400
+        if not set_fields and not remove_fields:
+            return profile_response(profile)
+        try:
+            updated = profiles_db.update(userId, set_fields, remove_fields, expected_version=profile.get(VERSION_FIELD, 0))
+        except VersionConflict:
+            if request.if_match:
+                logger.warn(f"{event_name}.precondition_failed", userId=userId)
+                return {"message": "Profile has changed; fetch it again and retry"}, 412
+            continue
+        except KeyError:
+            continue  # Deleted in between; the next attempt answers 404
+        logger.info(f"{event_name}.success", userId=userId, updated_fields=sorted(set_fields), removed_fields=sorted(remove_fields))
+        return profile_response(updated)
+    logger.warn(f"{event_name}.contended", userId=userId)
+    return {"message": "Profile is being updated concurrently; please retry"}, 409
+
 class UserProfile(Resource):
     @jwt_required()
     def get(self, userId):
@@ -34,11 +198,10 @@ class UserProfile(Resource):
             logger.warn("user.profile.get.auth_error", requested_userId=userId, requester_identity=current_user_identity)
             return {"message": "You are not authorized to view this profile"}, 403
 
-        # TODO: Replace with DynamoDB lookup using ProfileModel.get(userId)
         profile = profiles_db.get(userId)
         if profile:
             logger.info("user.profile.get.success", userId=userId)
-            return jsonify(profile)
+            return profile_response(profile)
         else:
             logger.warn("user.profile.get.not_found", userId=userId)
             return {"message": "User profile not found"}, 404
@@ -54,52 +217,113 @@ class UserProfile(Resource):
         if not data:
             logger.warn("user.profile.put.missing_payload", userId=userId)
             return {"message": "Payload missing"}, 400
+        if "preferences" in data and not isinstance(data["preferences"], dict):
+            return {"message": "Preferences must be an object"}, 400
+
+        # Each given field is replaced whole; userId, joinedAt and version can't be set by the client
+        set_fields = {field: data[field] for field in EDITABLE_PROFILE_FIELDS if field in data}
+        return update_profile(userId, lambda profile: (set_fields, ()), "user.profile.put")
+
+    @jwt_required()
+    def patch(self, userId):
+        """
+        Partial update with JSON Merge Patch (RFC 7396), e.g. ``{"preferences": {"digest": null}}``
+        removes one preference and keeps the rest. Send the profile's ETag as If-Match
+        to get 412 instead of overwriting a change made since it was read.
+        """
+        current_user_identity = get_jwt_identity()
+        if current_user_identity != userId:
+            logger.warn("user.profile.patch.auth_error", requested_userId=userId, requester_identity=current_user_identity)
+            return {"message": "You are not authorized to update this profile"}, 403
+
+        patch = request.get_json(silent=True)
+        if not isinstance(patch, dict):
+            logger.warn("user.profile.patch.invalid_payload", userId=userId)
+            return {"message": "Payload must be a JSON merge patch object"}, 400
+        read_only = sorted(set(patch) - set(EDITABLE_PROFILE_FIELDS))
+        if read_only:
+            return {"message": f"These fields can't be changed: {', '.join(read_only)}"}, 400
+
+        def changes(profile):
+            set_fields, remove_fields = {}, []
+            for field, value in patch.items():
+                merged = merge_patch(profile.get(field), value)
+                if merged is None:
+                    if field in profile:
+                        remove_fields.append(field)
+                elif merged != profile.get(field):
+                    set_fields[field] = merged
+            return set_fields, remove_fields
+
+        return update_profile(userId, changes, "user.profile.patch")
+
+class UserAvatar(Resource):
+    @jwt_required()
+    def put(self, userId):
+        """
+        Uploads a new avatar as the raw request body (``Content-Type: image/jpeg``, ``image/png`` or
+        ``image/webp``) and points the profile's avatarUrl at its small rendition.
+        """
+        current_user_identity = get_jwt_identity()
+        if current_user_identity != userId:
+            logger.warn("user.avatar.put.auth_error", requested_userId=userId, requester_identity=current_user_identity)
+            return {"message": "You are not authorized to update this profile"}, 403
+        if not request.mimetype.startswith("image/"):
+            return {"message": "Send the image as the request body with an image/* Content-Type"}, 415
+        if request.content_length and request.content_length > avatar_pipeline.max_bytes:
+            return {"message": f"Avatars are limited to {avatar_pipeline.max_bytes} bytes"}, 413
+        if profiles_db.get(userId) is None:
+            logger.warn("user.avatar.put.not_found", userId=userId)
+            return {"message": "User profile not found to update"}, 404
+
+        try:
+            renditions = avatar_pipeline.ingest(request.stream)
+        except AvatarRejected as e:
+            logger.warn("user.avatar.put.rejected", userId=userId, reason=e.message)
+            return {"message": e.message}, e.status
+        except AvatarPipelineBusy:
+            logger.warn("user.avatar.put.busy", userId=userId)
+            return {"message": "Too many uploads, please retry shortly"}, 503, {"Retry-After": str(AVATAR_RETRY_AFTER_SECONDS)}
+        try:
+            updated = profiles_db.update(userId, {"avatarUrl": renditions["small"]})
+        except KeyError:
+            return {"message": "User profile not found to update"}, 404
+        logger.info("user.avatar.put.success", userId=userId, avatarUrl=renditions["small"])
+        response = jsonify({"avatarUrl": renditions["small"], "renditions": renditions})
+        response.set_etag(profile_etag(updated))
+        return response
+
+class AvatarFile(Resource):
+    """Serves avatars from the local store; with S3, avatar URLs point at the bucket instead."""
 
-        # TODO: Replace with DynamoDB lookup and update
-        # profile = ProfileModel.get(userId)
-        # if not profile: return {"message": "User profile not found"}, 404
-        # profile.update(actions=[...])
-
-        if userId not in profiles_db: # Check if profile exists before update
-             logger.warn("user.profile.put.not_found", userId=userId)
-             return {"message": "User profile not found to update"}, 404
-
-        # Allowed fields for update (as per PRD: name, preferences, avatarUrl)
-        updated_profile_data = profiles_db.get(userId, {}).copy() # Get existing or empty dict
-        if "name" in data:
-            updated_profile_data["name"] = data["name"]
-        if "preferences" in data: # Assuming preferences is a dict
-            if not isinstance(data["preferences"], dict):
-                return {"message": "Preferences must be an object"}, 400
-            updated_profile_data["preferences"] = data["preferences"]
-        if "avatarUrl" in data:
-            updated_profile_data["avatarUrl"] = data["avatarUrl"]
-        
-        # Ensure userId and joinedAt are not overwritten by PUT request directly
-        # They are set at creation (joinedAt would be when profile is first made, likely post-Cognito signup)
-        if not updated_profile_data.get("userId"): # If it's a new profile being created via PUT (less common for PUT)
-            updated_profile_data["userId"] = userId
-            updated_profile_data["joinedAt"] = datetime.now(UTC).isoformat()
-
-        profiles_db[userId] = updated_profile_data
-        logger.info("user.profile.put.success", userId=userId, updated_fields=list(data.keys()))
-        return jsonify(profiles_db[userId])
+    def get(self, key):
+        if not isinstance(avatar_store, LocalBlobStore):
+            return {"message": "Not found"}, 404
+        try:
+            path = avatar_store.path(f"avatars/{key}")
+        except ValueError:
+            return {"message": "Not found"}, 404
+        if not os.path.isfile(path):
+            return {"message": "Not found"}, 404
+        response = send_file(path, mimetype="image/jpeg", conditional=True)
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
 
 # API Resources
+api.add_resource(UserProfileBatch, "/users")
 api.add_resource(UserProfile, "/users/<string:userId>")
+api.add_resource(UserAvatar, "/users/<string:userId>/avatar")
+api.add_resource(AvatarFile, "/users/avatars/<path:key>")
 
 # Basic health check endpoint
 @app.route("/users/health", methods=["GET"])
 def health_check():
     logger.info("user.health.check")
-    return jsonify({"status": "User service is healthy", "version": "0.1.0"}), 200
+    return jsonify({"status": "User service is healthy", "version": "0.1.0", "profileCache": profiles_db.stats()}), 200
 
 if __name__ == "__main__":
     # This is for local development/testing only.
     # In a serverless deployment (Lambda), a WSGI handler (e.g., serverless-wsgi) would be used.
-    # Requires JWT_SECRET_KEY from Auth service for @jwt_required to work if running standalone.
-    # For integrated testing, this service would rely on JWTs issued by the Auth service.
-    app.config["JWT_SECRET_KEY"] = os.environ.get("JWT_SECRET_KEY", "super-secret-key-for-dev-only") 
-    jwt = JWTManager(app) # Initialize JWTManager if running standalone for testing
+    # Requires the same JWT_SECRET_KEY as the Auth service for @jwt_required to accept its tokens.
     app.run(host="0.0.0.0", port=5002, debug=True)
 
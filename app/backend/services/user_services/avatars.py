@@ -0,0 +1,139 @@
+"""Avatar uploads: streamed to disk, thumbnailed in worker processes, stored under content-addressed keys."""
+
+import hashlib
+import os
+import shutil
+import tempfile
+
+import structlog
+
+from procpool import BoundedProcessPool, PoolBusy
+
+logger = structlog.get_logger()
+
+# Square renditions, by name. Profiles link to "small", which is what attendee lists show.
+RENDITIONS = {"small": 128, "large": 512}
+ACCEPTED_FORMATS = {"JPEG", "PNG", "WEBP"}
+# Refuse images that would decompress to more than this many pixels (a few KB can claim gigapixels)
+MAX_PIXELS = 40_000_000
+CHUNK_SIZE = 64 * 1024
+
+
+class AvatarRejected(Exception):
+    """The upload isn't an image we accept; ``status`` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message, status)  # Both in args, so the status survives the trip back from a worker
+        self.message = message
+        self.status = status
+
+    def __str__(self):
+        return self.message
+
+
+class AvatarPipelineBusy(PoolBusy):
+    """Raised when the thumbnail workers are saturated (or too slow) and the request should get a 503."""
+
+
+def render_thumbnails(source_path, output_dir, renditions):
+    """
+    Writes a square JPEG per rendition into ``output_dir`` and returns ``{name: path}``.
+
+    Runs in a worker process. The image is rotated upright from its EXIF
+    orientation and then re-encoded from pixels only, so no EXIF (camera, GPS
+    position) or other metadata survives into the thumbnails.
+    """
+    from PIL import Image, ImageOps
+
+    Image.MAX_IMAGE_PIXELS = MAX_PIXELS
+    try:
+        with Image.open(source_path) as image:
+            if image.format not in ACCEPTED_FORMATS:
+                raise AvatarRejected(f"Unsupported image format: {image.format}", status=415)
+            if image.width * image.height > MAX_PIXELS:
+                raise AvatarRejected("Image dimensions are too large", status=413)
+            image = ImageOps.exif_transpose(image)
+            image = image.convert("RGB")
+    except (Image.UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError) as e:
+        raise AvatarRejected(f"Not a readable image: {e}", status=415) from None
+
+    paths = {}
+    for name, size in renditions.items():
+        path = os.path.join(output_dir, f"{name}.jpg")
+        ImageOps.fit(image, (size, size), method=Image.Resampling.LANCZOS).save(path, "JPEG", quality=85, optimize=True)
+        paths[name] = path
+    return paths
+
+
+def avatar_key(digest, name):
+    return f"avatars/{digest}/{name}.jpg"
+
+
+class ThumbnailPool(BoundedProcessPool):
+    busy = AvatarPipelineBusy
+    log_name = "user.avatar"
+    description = "Avatar processing"
+
+
+class AvatarPipeline:
+    """
+    Stores an uploaded avatar's renditions in ``store`` and returns their URLs.
+
+    The request body is copied to a temporary file in chunks (hashing it on the
+    way), so at most ``CHUNK_SIZE`` bytes of it are in memory at a time. Keys are
+    derived from the SHA-256 of the upload. If another upload with the same bytes
+    already produced the renditions, nothing is rendered or stored again.
+
+    Decoding and resizing run in a ``ThumbnailPool`` of ``workers`` processes: at
+    most ``workers + max_queue`` uploads at once, beyond which AvatarPipelineBusy
+    is raised immediately, as it is after ``timeout`` seconds. ``workers=0``
+    renders inline.
+    """
+
+    def __init__(self, store, workers=1, max_queue=4, timeout=10.0, max_bytes=10 * 1024 * 1024, renditions=RENDITIONS):
+        self.store = store
+        self.max_bytes = max_bytes
+        self.renditions = dict(renditions)
+        self.rendered = 0
+        self.deduplicated = 0
+        self.pool = ThumbnailPool(workers, max_queue, timeout)
+
+    def _spool(self, stream, path):
+        digest = hashlib.sha256()
+        size = 0
+        with open(path, "wb") as spooled:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > self.max_bytes:
+                    raise AvatarRejected(f"Avatars are limited to {self.max_bytes} bytes", status=413)
+                digest.update(chunk)
+                spooled.write(chunk)
+        if not size:
+            raise AvatarRejected("Empty upload")
+        return digest.hexdigest()
+
+    def ingest(self, stream):
+        """Reads an image from ``stream`` and returns ``{rendition name: URL}``."""
+        work_dir = tempfile.mkdtemp(prefix="avatar-")
+        try:
+            upload_path = os.path.join(work_dir, "upload")
+            digest = self._spool(stream, upload_path)
+            keys = {name: avatar_key(digest, name) for name in self.renditions}
+            if all(self.store.exists(key) for key in keys.values()):
+                self.deduplicated += 1
+                logger.info("user.avatar.deduplicated", digest=digest)
+            else:
+                rendered = self.pool.run(render_thumbnails, upload_path, work_dir, self.renditions)
+                for name, key in keys.items():
+                    self.store.put_file(key, rendered[name], content_type="image/jpeg")
+                self.rendered += 1
+                logger.info("user.avatar.rendered", digest=digest)
+            return {name: self.store.url(key) for name, key in keys.items()}
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def shutdown(self):
+        self.pool.shutdown()
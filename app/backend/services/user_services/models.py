@@ -1,6 +1,6 @@
 
 from pynamodb.models import Model
-from pynamodb.attributes import UnicodeAttribute, MapAttribute, UTCDateTimeAttribute
+from pynamodb.attributes import NumberAttribute, UnicodeAttribute, MapAttribute, UTCDateTimeAttribute
 import os
 from datetime import datetime
 
@@ -21,12 +21,14 @@ class ProfileModel(Model):
         # host = "http://localhost:8000"
         aws_access_key_id = os.environ.get("AWS_ACCESS_KEY_ID_DUMMY", "dummy")
         aws_secret_access_key = os.environ.get("AWS_SECRET_ACCESS_KEY_DUMMY", "dummy")
+        host = os.environ.get("DYNAMODB_ENDPOINT_URL") # DynamoDB Local / moto in development
 
     userId = UnicodeAttribute(hash_key=True) # Typically the Cognito User SUB, links to AuthUserModel.userId
     name = UnicodeAttribute(null=True) # User can set their display name
     joinedAt = UTCDateTimeAttribute(default=datetime.utcnow) # Timestamp when the profile was created
     preferences = MapAttribute(null=True) # e.g., {"notifications_enabled": True, "email_frequency": "daily"}
     avatarUrl = UnicodeAttribute(null=True)
+    version = NumberAttribute(default=0) # Bumped by every update; clients send it back as If-Match
     # email = UnicodeAttribute(null=False) # Email is primarily in AuthUser, but might be duplicated here for query convenience if needed.
                                          # For now, assuming email is fetched via Auth service or Cognito directly.
 
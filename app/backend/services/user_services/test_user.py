@@ -34,4 +34,159 @@ def test_health(mock_dependency, client):
     mock_dependency.return_value = True
     response = client.get("/users/health")
     assert response.status_code == 200
-    assert response.json["status"] == "User service is healthy"
\ No newline at end of file
+    assert response.json["status"] == "User service is healthy"
+
+from flask_jwt_extended import create_access_token
+from services.user_services import app as user_service
+
+@pytest.fixture
+def user_client():
+    user_service.profiles_db.clear()
+    with user_service.app.app_context():
+        token = create_access_token(identity="viewer")
+    with user_service.app.test_client() as client:
+        client.environ_base["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+        yield client
+    user_service.profiles_db.clear()
+
+def _profile(user_id):
+    return {"userId": user_id, "name": f"User {user_id}", "avatarUrl": f"https://cdn/{user_id}.jpg",
+            "joinedAt": "2024-01-15T10:00:00+00:00", "preferences": {"notifications": True}}
+
+def test_batch_lookup_returns_public_fields_in_request_order(user_client):
+    user_service.profiles_db.put_many(_profile(user_id) for user_id in ("a", "b", "c"))
+    response = user_client.get("/users?ids=c,missing,a,c")
+    assert response.status_code == 200
+    assert [profile["userId"] for profile in response.json["profiles"]] == ["c", "a"]
+    assert response.json["missing"] == ["missing"]
+    assert "preferences" not in response.json["profiles"][0]
+
+    response = user_client.post("/users", json={"ids": ["b"], "fields": ["name"]})
+    assert response.json["profiles"] == [{"userId": "b", "name": "User b"}]
+
+def test_batch_lookup_validates_its_input(user_client):
+    assert user_client.get("/users").status_code == 400
+    assert user_client.get("/users?ids=a&fields=preferences").status_code == 400
+    assert user_client.post("/users", json={"ids": [f"u{i}" for i in range(101)]}).status_code == 400
+    assert user_client.post("/users", json={"ids": [1, 2]}).status_code == 400
+    user_client.environ_base.pop("HTTP_AUTHORIZATION")
+    assert user_client.get("/users?ids=a").status_code == 401
+
+@pytest.fixture
+def owner_client():
+    user_service.profiles_db.clear()
+    user_service.profiles_db["owner"] = _profile("owner")
+    with user_service.app.app_context():
+        token = create_access_token(identity="owner")
+    with user_service.app.test_client() as client:
+        client.environ_base["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+        yield client
+    user_service.profiles_db.clear()
+
+def test_patch_merges_into_the_stored_profile(owner_client):
+    user_service.profiles_db.update("owner", {"preferences": {"notifications": True, "digest": "daily"}})
+    etag = owner_client.get("/users/owner").headers["ETag"]
+    response = owner_client.patch("/users/owner", json={"name": "New", "avatarUrl": None, "preferences": {"digest": None, "sms": False}},
+                                  headers={"Content-Type": "application/merge-patch+json", "If-Match": etag})
+    assert response.status_code == 200
+    assert response.json["preferences"] == {"notifications": True, "sms": False}
+    assert response.json["name"] == "New" and "avatarUrl" not in response.json
+    assert response.json["joinedAt"] == "2024-01-15T10:00:00+00:00"
+    assert response.headers["ETag"] != etag
+
+    assert owner_client.patch("/users/owner", json={"version": 7}).status_code == 400
+    assert owner_client.patch("/users/owner", json=["name"]).status_code == 400
+    assert owner_client.patch("/users/owner", json={"preferences": "none"}).status_code == 400
+
+def test_stale_if_match_gets_412(owner_client):
+    etag = owner_client.get("/users/owner").headers["ETag"]
+    assert owner_client.patch("/users/owner", json={"name": "Web"}, headers={"If-Match": etag}).status_code == 200
+    stale = owner_client.patch("/users/owner", json={"name": "Mobile"}, headers={"If-Match": etag})
+    assert stale.status_code == 412
+    assert owner_client.put("/users/owner", json={"name": "Mobile"}, headers={"If-Match": etag}).status_code == 412
+    assert owner_client.get("/users/owner").json["name"] == "Web"
+    assert owner_client.patch("/users/owner", json={"name": "Mobile"}, headers={"If-Match": stale.headers["ETag"]}).status_code == 200
+
+def test_update_without_if_match_retries_on_a_concurrent_change(owner_client, monkeypatch):
+    table = user_service.profiles_db
+    real_update = type(table).update
+    raced = []
+
+    def racing_update(self, key, set_fields=None, remove_fields=(), expected_version=None):
+        if not raced:  # Another client changes the profile between our read and our write
+            raced.append(real_update(self, key, {"preferences": {"sms": True}}))
+        return real_update(self, key, set_fields, remove_fields, expected_version)
+
+    monkeypatch.setattr(type(table), "update", racing_update)
+    response = owner_client.patch("/users/owner", json={"preferences": {"digest": "weekly"}})
+    assert response.status_code == 200
+    assert response.json["preferences"] == {"sms": True, "digest": "weekly"}  # Neither change was lost
+    assert response.json["version"] == 2
+
+import io
+import os
+from PIL import Image
+from storage.blobs import LocalBlobStore
+from services.user_services.avatars import AvatarPipeline, AvatarRejected
+
+def _photo(color="red", size=(800, 600)):
+    image = Image.new("RGB", size, color)
+    exif = Image.Exif()
+    exif[0x010F] = "CameraMaker"  # Make
+    exif[0x0112] = 6  # Orientation: rotate 90 degrees to display
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", exif=exif)
+    return buffer.getvalue()
+
+@pytest.fixture
+def avatar_client(owner_client, tmp_path, monkeypatch):
+    store = LocalBlobStore(str(tmp_path / "blobs"), base_url="/users")
+    monkeypatch.setattr(user_service, "avatar_store", store)
+    monkeypatch.setattr(user_service, "avatar_pipeline", AvatarPipeline(store, workers=0, max_bytes=200_000))
+    yield owner_client
+
+def test_avatar_upload_stores_stripped_thumbnails(avatar_client):
+    response = avatar_client.put("/users/owner/avatar", data=_photo(), content_type="image/jpeg")
+    assert response.status_code == 200
+    small = response.json["avatarUrl"]
+    assert small == response.json["renditions"]["small"] and small.endswith("/small.jpg")
+    assert avatar_client.get("/users/owner").json["avatarUrl"] == small
+
+    served = avatar_client.get(small)
+    assert served.status_code == 200 and "immutable" in served.headers["Cache-Control"]
+    thumbnail = Image.open(io.BytesIO(served.data))
+    assert thumbnail.size == (128, 128)
+    assert not thumbnail.getexif()
+    assert avatar_client.get("/users/avatars/..%2F..%2Fsecret").status_code == 404
+
+def test_identical_avatar_uploads_are_deduplicated(avatar_client):
+    first = avatar_client.put("/users/owner/avatar", data=_photo(), content_type="image/jpeg").json
+    second = avatar_client.put("/users/owner/avatar", data=_photo(), content_type="image/jpeg").json
+    assert first == second
+    pipeline = user_service.avatar_pipeline
+    assert (pipeline.rendered, pipeline.deduplicated) == (1, 1)
+    other = avatar_client.put("/users/owner/avatar", data=_photo("blue"), content_type="image/jpeg").json
+    assert other["avatarUrl"] != first["avatarUrl"]
+
+def test_avatar_upload_rejects_bad_input(avatar_client):
+    assert avatar_client.put("/users/owner/avatar", data=b"not an image", content_type="image/png").status_code == 415
+    assert avatar_client.put("/users/owner/avatar", data=b"{}", content_type="application/json").status_code == 415
+    noise = Image.frombytes("RGB", (400, 400), os.urandom(400 * 400 * 3))
+    buffer = io.BytesIO()
+    noise.save(buffer, "PNG")
+    assert avatar_client.put("/users/owner/avatar", data=buffer.getvalue(), content_type="image/png").status_code == 413
+    # Hotlinking arbitrary images is no longer possible; removing the avatar still is
+    assert avatar_client.patch("/users/owner", json={"avatarUrl": "https://example.com/huge.jpg"}).status_code == 400
+    assert avatar_client.patch("/users/owner", json={"avatarUrl": None}).status_code == 200
+
+def test_avatar_renders_in_a_worker_process(tmp_path):
+    store = LocalBlobStore(str(tmp_path))
+    pipeline = AvatarPipeline(store, workers=1)
+    try:
+        urls = pipeline.ingest(io.BytesIO(_photo()))
+        assert store.exists(urls["large"][len("/files/"):])
+        with pytest.raises(AvatarRejected) as rejected:
+            pipeline.ingest(io.BytesIO(b"GIF89a not really"))
+        assert rejected.value.status == 415
+    finally:
+        pipeline.shutdown()
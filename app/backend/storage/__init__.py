@@ -0,0 +1,43 @@
+"""
+Storage backends for service state, selected by ``DATABASE_URL``.
+
+* ``memory://``            in-process dicts (state is lost on restart, not shared between workers)
+* ``sqlite:///path.db``    SQLite in WAL mode; every worker on the host can share the file
+* ``dynamodb://``          DynamoDB through the services' PynamoDB models, with a global
+                           secondary index ``<field>-index`` per indexed field
+"""
+
+import os
+
+from config import config
+from .base import Table, VersionConflict
+from .memory import MemoryTable
+from .sqlite import SQLiteTable, pool_for
+
+SQLITE_SHARED_MEMORY = "file:bloomrefresh?mode=memory&cache=shared"
+
+
+def sqlite_path(url):
+    """``sqlite:///relative.db`` -> ``relative.db``, ``sqlite:////abs/x.db`` -> ``/abs/x.db``."""
+    path = url[len("sqlite:///"):] if url.startswith("sqlite:///") else url[len("sqlite://"):]
+    return SQLITE_SHARED_MEMORY if path in ("", ":memory:") else path
+
+
+def open_table(name, key_field, indexes=(), model=None, url=None):
+    """
+    Opens the named table on the configured backend.
+
+    ``indexes`` lists top-level fields that ``find`` should be able to look up
+    without a scan. ``model`` is the PynamoDB model used on the DynamoDB backend;
+    without one, documents are stored whole in a generic table.
+    """
+    url = url or config.DATABASE_URL
+    if url.startswith("memory:"):
+        return MemoryTable(name, key_field, indexes)
+    if url.startswith("sqlite:"):
+        pool = pool_for(sqlite_path(url), size=int(os.getenv("DATABASE_POOL_SIZE", "8")))
+        return SQLiteTable(pool, name, key_field, indexes)
+    if url.startswith("dynamodb:"):
+        from .dynamo import PynamoTable
+        return PynamoTable(name, key_field, indexes, model=model)
+    raise ValueError(f"Unsupported DATABASE_URL scheme: {url}")
@@ -0,0 +1,114 @@
+"""Common interface for the key/document stores behind each service."""
+
+from collections.abc import MutableMapping
+
+
+def project(doc, fields):
+    """The document cut down to ``fields`` (those it has), or the whole document when ``fields`` is None."""
+    return doc if fields is None else {field: doc[field] for field in fields if field in doc}
+
+
+# Counter that update() bumps on every change, for optimistic concurrency (documents without one are at 0)
+VERSION_FIELD = "version"
+
+
+class VersionConflict(Exception):
+    """The document changed since the version an update was conditioned on."""
+
+
+def updated_document(doc, key, set_fields=None, remove_fields=(), expected_version=None):
+    """
+    ``doc`` with ``set_fields`` written, ``remove_fields`` dropped and its version bumped.
+
+    Raises KeyError when there is no document, and VersionConflict when
+    ``expected_version`` is given and isn't the document's current version.
+    """
+    if doc is None:
+        raise KeyError(key)
+    version = doc.get(VERSION_FIELD, 0)
+    if expected_version is not None and version != expected_version:
+        raise VersionConflict(f"{key} is at version {version}, not {expected_version}")
+    updated = {field: value for field, value in doc.items() if field not in remove_fields}
+    updated.update(set_fields or {})
+    updated[VERSION_FIELD] = version + 1
+    return updated
+
+
+class Table(MutableMapping):
+    """
+    A named collection of JSON documents keyed by a string id.
+
+    Tables behave like the dicts the services started out with (``db[key]``,
+    ``db.get(key)``, ``del db[key]``, ``db.values()``), plus a few methods that
+    backends can implement more efficiently than a Python loop:
+
+    * ``put_many(docs)`` writes many documents in one round trip / transaction
+    * ``get_many(keys, fields=None)`` reads many documents, skipping missing keys;
+      with ``fields``, only those top-level fields are returned (the backend may read less)
+    * ``find(field, value)`` returns documents whose top-level ``field`` equals ``value``
+    * ``find_many(field, values)`` does the same for any of several values
+    * ``load(key)`` reads the latest stored document, bypassing caches and eventually consistent reads
+    * ``insert(doc)`` writes a document only if its key is free, and says whether it did
+    * ``update(key, set_fields, remove_fields, expected_version)`` changes some fields of a
+      document in place and bumps its ``version``; see ``updated_document``
+
+    Fields named in ``indexes`` are looked up without a scan. Their values must be
+    hashable, and only change when the document is written back.
+
+    Documents returned by persistent backends are fresh copies: callers must
+    write a changed document back (``db[key] = doc``) for the change to stick.
+    """
+
+    def __init__(self, name, key_field, indexes=()):
+        self.name = name
+        self.key_field = key_field
+        self.indexes = tuple(indexes)
+
+    def put_many(self, docs):
+        for doc in docs:
+            self[doc[self.key_field]] = doc
+
+    def get_many(self, keys, fields=None):
+        found = {}
+        for key in keys:
+            doc = self.get(key)
+            if doc is not None:
+                found[key] = project(doc, fields)
+        return found
+
+    def load(self, key):
+        return self.get(key)
+
+    def insert(self, doc):
+        """
+        Writes ``doc`` unless a document with its key exists; returns whether it was written.
+
+        This fallback checks and then writes, and is only safe against concurrent
+        writers where the backend overrides it.
+        """
+        key = doc[self.key_field]
+        if key in self:
+            return False
+        self[key] = doc
+        return True
+
+    def update(self, key, set_fields=None, remove_fields=(), expected_version=None):
+        """
+        Applies a partial update and returns the new document.
+
+        This fallback reads and rewrites the whole document, and is only safe
+        against concurrent writers where the backend overrides it.
+        """
+        updated = updated_document(self.get(key), key, set_fields, remove_fields, expected_version)
+        self[key] = updated
+        return updated
+
+    def find(self, field, value):
+        return [doc for doc in self.values() if doc.get(field) == value]
+
+    def find_many(self, field, values):
+        values = set(values)
+        return [doc for doc in self.values() if doc.get(field) in values]
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.name!r}>"
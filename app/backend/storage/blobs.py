@@ -0,0 +1,87 @@
+"""
+Binary object storage (avatars and other uploads), selected by a URL like ``DATABASE_URL``.
+
+* ``s3://bucket/prefix``         an S3 bucket
+* ``file:///abs/dir`` or a path  a local directory, standing in for S3 in development and tests
+
+Objects are written from files on disk, never from in-memory bytes, so large
+uploads don't have to be held in memory.
+"""
+
+import os
+import shutil
+import tempfile
+
+
+class LocalBlobStore:
+    """Objects as files under ``root``; ``base_url`` is where the app serves them from."""
+
+    def __init__(self, root, base_url="/files"):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip("/")
+
+    def path(self, key):
+        path = os.path.abspath(os.path.join(self.root, key))
+        if os.path.commonpath([path, self.root]) != self.root:
+            raise ValueError(f"Key escapes the store: {key!r}")
+        return path
+
+    def exists(self, key):
+        return os.path.isfile(self.path(key))
+
+    def put_file(self, key, source_path, content_type=None):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Copy then rename, so readers never see a half-written object
+        fd, partial = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".partial-")
+        with os.fdopen(fd, "wb") as target, open(source_path, "rb") as source:
+            shutil.copyfileobj(source, target)
+        os.replace(partial, path)
+
+    def url(self, key):
+        return f"{self.base_url}/{key}"
+
+
+class S3BlobStore:
+    """Objects in an S3 bucket under ``prefix``, served from ``base_url`` (the bucket or a CDN in front of it)."""
+
+    def __init__(self, bucket, prefix="", base_url=None, client=None, cache_control=None):
+        import boto3
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.base_url = (base_url or f"https://{bucket}.s3.amazonaws.com").rstrip("/")
+        self.cache_control = cache_control
+        self.client = client or boto3.client("s3")
+
+    def _key(self, key):
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def exists(self, key):
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def put_file(self, key, source_path, content_type=None):
+        extra = {}
+        if content_type:
+            extra["ContentType"] = content_type
+        if self.cache_control:
+            extra["CacheControl"] = self.cache_control
+        # upload_file streams from disk, switching to a multipart upload for large files
+        self.client.upload_file(source_path, self.bucket, self._key(key), ExtraArgs=extra or None)
+
+    def url(self, key):
+        return f"{self.base_url}/{self._key(key)}"
+
+
+def open_blob_store(url, base_url=None, cache_control=None):
+    if url.startswith("s3://"):
+        bucket, _, prefix = url[len("s3://"):].partition("/")
+        return S3BlobStore(bucket, prefix, base_url=base_url, cache_control=cache_control)
+    path = url[len("file://"):] if url.startswith("file://") else url
+    return LocalBlobStore(path, base_url=base_url or "/files")
@@ -0,0 +1,210 @@
+"""Read-through cache in front of a Table, for documents that are read far more often than written."""
+
+import threading
+import time
+from collections import OrderedDict
+
+from .base import Table, project
+
+
+class _Flight:
+    """One in-progress load of a key, which concurrent readers of the same key wait for."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.doc = None
+        self.error = None
+
+
+class CachedTable(Table):
+    """
+    Wraps a Table and serves ``get``/``get_many`` from a bounded LRU of recent reads.
+
+    Entries live for ``ttl`` seconds; keys that weren't found are remembered
+    for ``negative_ttl``. Concurrent misses on one key are single-flight: the
+    first loads it from the table and the rest wait for its result. Writes and
+    deletes go through to the table and then drop the cached entry, and a load
+    that overlapped a write isn't cached, so this process never serves a value
+    older than its own last write. Writes by other processes are only seen once
+    the entry expires, so ``ttl`` bounds how stale a read can be.
+
+    ``hits``, ``misses``, ``loads`` (table reads actually made), ``evictions``
+    (entries dropped to stay within ``max_entries``) and ``expirations`` are
+    counted for tuning; see ``stats()``.
+    """
+
+    def __init__(self, table, max_entries=10_000, ttl=60.0, negative_ttl=5.0, clock=time.monotonic):
+        super().__init__(table.name, table.key_field, table.indexes)
+        self.table = table
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        self.hits = self.misses = self.loads = self.evictions = self.expirations = 0
+        self._entries = OrderedDict()  # key -> (doc or None, expires_at)
+        self._flights = {}
+        self._writes = 0  # Bumped by every write, so a load that raced one knows not to cache its result
+        self._lock = threading.Lock()
+
+    def _cached(self, key, now):
+        # Caller holds the lock. Returns (found, doc)
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        if entry[1] <= now:
+            del self._entries[key]
+            self.expirations += 1
+            return False, None
+        self._entries.move_to_end(key)
+        return True, entry[0]
+
+    def _store(self, key, doc, now):
+        # Caller holds the lock
+        self._entries[key] = (doc, now + (self.ttl if doc is not None else self.negative_ttl))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _invalidate(self, keys):
+        with self._lock:
+            self._writes += 1
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def get(self, key, default=None):
+        with self._lock:
+            found, doc = self._cached(key, self.clock())
+            if found:
+                self.hits += 1
+                return default if doc is None else dict(doc)
+            self.misses += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                writes = self._writes
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return default if flight.doc is None else dict(flight.doc)
+
+        try:
+            flight.doc = self.table.get(key)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                self.loads += 1
+                if flight.error is None and self._writes == writes:
+                    self._store(key, None if flight.doc is None else dict(flight.doc), self.clock())
+            flight.done.set()
+        return default if flight.doc is None else dict(flight.doc)
+
+    def __getitem__(self, key):
+        doc = self.get(key)
+        if doc is None:
+            raise KeyError(key)
+        return doc
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def get_many(self, keys, fields=None):
+        """Cached documents from the cache, the rest in one ``get_many`` on the table (not single-flight)."""
+        keys = list(dict.fromkeys(keys))
+        found, missing = {}, []
+        with self._lock:
+            now = self.clock()
+            for key in keys:
+                hit, doc = self._cached(key, now)
+                if hit:
+                    self.hits += 1
+                    if doc is not None:
+                        found[key] = doc
+                else:
+                    self.misses += 1
+                    missing.append(key)
+            writes = self._writes
+        if missing:
+            # Whole documents, so they can be cached for every kind of read
+            loaded = self.table.get_many(missing)
+            with self._lock:
+                self.loads += len(missing)
+                if self._writes == writes:
+                    now = self.clock()
+                    for key in missing:
+                        doc = loaded.get(key)
+                        self._store(key, None if doc is None else dict(doc), now)
+            found.update(loaded)
+        return {key: project(dict(found[key]), fields) for key in keys if key in found}
+
+    def __setitem__(self, key, doc):
+        self.table[key] = doc
+        self._invalidate([key])
+
+    def __delitem__(self, key):
+        try:
+            del self.table[key]
+        finally:
+            self._invalidate([key])
+
+    def load(self, key):
+        return self.table.load(key)
+
+    def insert(self, doc):
+        try:
+            return self.table.insert(doc)
+        finally:
+            self._invalidate([doc[self.key_field]])
+
+    def update(self, key, set_fields=None, remove_fields=(), expected_version=None):
+        try:
+            return self.table.update(key, set_fields, remove_fields, expected_version)
+        finally:
+            self._invalidate([key])
+
+    def put_many(self, docs):
+        docs = list(docs)
+        self.table.put_many(docs)
+        self._invalidate([doc[self.key_field] for doc in docs])
+
+    def clear(self):
+        self.table.clear()
+        with self._lock:
+            self._writes += 1
+            self._entries.clear()
+
+    # Scans and queries go straight to the table
+    def __iter__(self):
+        return iter(self.table)
+
+    def __len__(self):
+        return len(self.table)
+
+    def values(self):
+        return self.table.values()
+
+    def items(self):
+        return self.table.items()
+
+    def find(self, field, value):
+        return self.table.find(field, value)
+
+    def find_many(self, field, values):
+        return self.table.find_many(field, values)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hitRatio": round(self.hits / lookups, 4) if lookups else None,
+        }
@@ -0,0 +1,243 @@
+"""DynamoDB storage through the services' PynamoDB models."""
+
+import json
+import os
+from datetime import datetime, UTC
+
+from pynamodb.attributes import UnicodeAttribute, UTCDateTimeAttribute
+from pynamodb.exceptions import PutError, UpdateError
+from pynamodb.indexes import AllProjection, GlobalSecondaryIndex
+from pynamodb.models import Model
+
+from .base import VERSION_FIELD, Table, VersionConflict, project, updated_document
+from .dynamo_batch import batch_get, batch_write
+
+# The format UTCDateTimeAttribute reads and writes in its simple-dict form
+PYNAMODB_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f+0000"
+
+
+def _to_model_datetime(value):
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=UTC)
+    return parsed.astimezone(UTC).strftime(PYNAMODB_DATETIME_FORMAT)
+
+
+def index_name(field):
+    """The name of the global secondary index that ``find`` queries for an indexed field."""
+    return f"{field}-index"
+
+
+def field_index(field, attribute):
+    """A global secondary index hashed on ``field`` (declared on the model as ``attribute``), projecting whole items."""
+
+    class Meta:
+        projection = AllProjection()
+
+    Meta.index_name = index_name(field)
+    return type(f"{field}Index", (GlobalSecondaryIndex,), {"Meta": Meta, field: attribute})()
+
+
+def document_model(name, indexes=()):
+    """
+    A generic ``(key, doc)`` PynamoDB model for stores that have no typed model.
+
+    Each field in ``indexes`` is copied out of the JSON into a string attribute
+    of its own, with a global secondary index on it.
+    """
+
+    class Meta:
+        table_name = os.environ.get(f"{name.upper()}_DYNAMODB_TABLE", f"BloomRefresh-{name}")
+        region = os.environ.get("AWS_REGION", "us-east-1")
+        aws_access_key_id = os.environ.get("AWS_ACCESS_KEY_ID_DUMMY", "dummy")
+        aws_secret_access_key = os.environ.get("AWS_SECRET_ACCESS_KEY_DUMMY", "dummy")
+        host = os.environ.get("DYNAMODB_ENDPOINT_URL")
+
+    namespace = {"Meta": Meta, "key": UnicodeAttribute(hash_key=True), "doc": UnicodeAttribute(null=False)}
+    for field in indexes:
+        namespace[field] = UnicodeAttribute(null=True)
+        namespace[f"{field}_index"] = field_index(field, UnicodeAttribute(hash_key=True))
+    return type(f"{name.title()}DocumentModel", (Model,), namespace)
+
+
+class PynamoTable(Table):
+    """
+    Maps documents onto a PynamoDB model.
+
+    With a typed model, document fields become model attributes (fields the model
+    doesn't declare are not stored). Without one, each document is stored whole
+    as JSON in a generic ``(key, doc)`` table. Iteration and ``len`` need a full
+    table scan; hot paths should use ``get``/``get_many`` instead.
+
+    ``find``/``find_many`` Query a global secondary index named ``<field>-index``
+    for each field in ``indexes``. Generic tables declare theirs; a typed model
+    must declare one hashed on each indexed field, or the table refuses to open
+    rather than fall back to scans. Index reads are eventually consistent.
+    """
+
+    def __init__(self, name, key_field, indexes=(), model=None):
+        super().__init__(name, key_field, indexes)
+        self.typed = model is not None
+        self.model = model or document_model(name, self.indexes)
+        self._field_indexes = {}
+        for field in self.indexes:
+            index = self.model._indexes.get(index_name(field))
+            hash_key = index._hash_key_attribute() if index is not None else None
+            if hash_key is None or hash_key.attr_name != field:
+                raise ValueError(f"{self.model.__name__} has no global secondary index {index_name(field)!r} on {field}")
+            self._field_indexes[field] = index
+        self._datetime_fields = {
+            attr_name for attr_name, attr in self.model.get_attributes().items() if isinstance(attr, UTCDateTimeAttribute)
+        } if self.typed else set()
+
+    def to_item(self, doc):
+        item = self.model()
+        if self.typed:
+            simple = {k: v for k, v in doc.items() if v is not None}
+            for field in self._datetime_fields & simple.keys():
+                if isinstance(simple[field], str):
+                    simple[field] = _to_model_datetime(simple[field])
+            item.from_simple_dict(simple)
+        else:
+            item.key = doc[self.key_field]
+            item.doc = json.dumps(doc)
+            for field in self.indexes:
+                if doc.get(field) is not None:
+                    setattr(item, field, str(doc[field]))
+        return item
+
+    def to_doc(self, item):
+        return item.to_simple_dict() if self.typed else json.loads(item.doc)
+
+    def __getitem__(self, key):
+        try:
+            return self.to_doc(self.model.get(key))
+        except self.model.DoesNotExist:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __setitem__(self, key, doc):
+        self.to_item(doc).save()
+
+    def __delitem__(self, key):
+        item = self.model()
+        setattr(item, self.model._hash_keyname, key)
+        item.delete()
+
+    def __iter__(self):
+        hash_key = self.model._hash_keyname
+        return (getattr(item, hash_key) for item in self.model.scan(attributes_to_get=[hash_key]))
+
+    def __len__(self):
+        return self.model.count()
+
+    def values(self):
+        return [self.to_doc(item) for item in self.model.scan()]
+
+    def items(self):
+        return [(doc[self.key_field], doc) for doc in self.values()]
+
+    def clear(self):
+        batch_write(self.model, deletes=list(self))
+
+    def put_many(self, docs):
+        batch_write(self.model, puts=[self.to_item(doc) for doc in docs])
+
+    def load(self, key):
+        try:
+            return self.to_doc(self.model.get(key, consistent_read=True))
+        except self.model.DoesNotExist:
+            return None
+
+    def insert(self, doc):
+        """A PutItem conditioned on the key not existing yet."""
+        try:
+            self.to_item(doc).save(condition=self.model.get_attributes()[self.model._hash_keyname].does_not_exist())
+        except PutError as e:
+            if e.cause_response_code != "ConditionalCheckFailedException":
+                raise
+            return False
+        return True
+
+    def update(self, key, set_fields=None, remove_fields=(), expected_version=None):
+        """
+        One conditional UpdateItem that touches only the given fields (and ADDs 1 to ``version``).
+
+        Typed models must declare a ``version`` NumberAttribute; fields the model
+        doesn't declare are ignored, as in ``to_item``. Generic document tables
+        rewrite the JSON with a condition on its previous value instead.
+        """
+        if not self.typed:
+            return self._update_document(key, set_fields, remove_fields, expected_version)
+        attributes = self.model.get_attributes()
+        actions = []
+        for field, value in (set_fields or {}).items():
+            if field in attributes and field != VERSION_FIELD:
+                if field in self._datetime_fields and isinstance(value, str):
+                    value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+                actions.append(attributes[field].remove() if value is None else attributes[field].set(value))
+        actions.extend(attributes[field].remove() for field in remove_fields if field in attributes)
+        actions.append(attributes[VERSION_FIELD].add(1))
+
+        version = attributes[VERSION_FIELD]
+        condition = attributes[self.model._hash_keyname].exists()
+        if expected_version is not None:
+            # Items written before versioning have no version attribute, which counts as 0
+            matches = version == expected_version
+            condition &= (matches | version.does_not_exist()) if expected_version == 0 else matches
+        item = self.model()
+        setattr(item, self.model._hash_keyname, key)
+        try:
+            item.update(actions=actions, condition=condition)
+        except UpdateError as e:
+            if e.cause_response_code != "ConditionalCheckFailedException":
+                raise
+            self._raise_condition_failure(key, expected_version)
+        return self.to_doc(item)
+
+    def _update_document(self, key, set_fields, remove_fields, expected_version):
+        current = self.load(key)
+        updated = updated_document(current, key, set_fields, remove_fields, expected_version)
+        item = self.to_item(updated)
+        try:
+            item.save(condition=self.model.doc == json.dumps(current))
+        except PutError as e:
+            if e.cause_response_code != "ConditionalCheckFailedException":
+                raise
+            self._raise_condition_failure(key, expected_version)
+        return updated
+
+    def _raise_condition_failure(self, key, expected_version):
+        if self.load(key) is None:
+            raise KeyError(key) from None
+        raise VersionConflict(f"{key} changed during the update (expected version {expected_version})") from None
+
+    def get_many(self, keys, fields=None):
+        if not self.typed:
+            # Generic tables store the document as one JSON attribute, so there is nothing to project on the server
+            return {key: project(self.to_doc(item), fields) for key, item in batch_get(self.model, keys).items()}
+        items = batch_get(self.model, keys, attributes=fields)
+        return {key: project(self.to_doc(item), fields) for key, item in items.items()}
+
+    def find(self, field, value):
+        index = self._field_indexes.get(field)
+        if index is None:
+            return super().find(field, value)
+        if value is None:
+            return []
+        # Generic tables index the value as a string, so "5" and 5 share a partition; keep exact matches
+        docs = (self.to_doc(item) for item in index.query(value if self.typed else str(value)))
+        return [doc for doc in docs if doc.get(field) == value]
+
+    def find_many(self, field, values):
+        if field not in self._field_indexes:
+            return super().find_many(field, values)
+        return [doc for value in dict.fromkeys(values) for doc in self.find(field, value)]
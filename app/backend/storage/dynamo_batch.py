@@ -0,0 +1,147 @@
+"""
+Batched DynamoDB reads and writes for the services' PynamoDB models.
+
+PynamoDB's own ``Model.batch_get``/``batch_write`` resend unprocessed keys in a
+tight loop with no backoff, and writes give up after three rounds. These
+helpers talk to one shared boto3 client instead, so every model reuses the same
+HTTP connection pool, and they:
+
+* split requests at the API limits (100 keys per BatchGetItem, 25 requests per
+  BatchWriteItem) and drop duplicate keys, which DynamoDB rejects outright
+* resend only the ``UnprocessedKeys``/``UnprocessedItems`` DynamoDB hands back,
+  with exponential backoff and jitter, and raise once ``max_attempts`` runs out
+* optionally fetch only some attributes, via a ProjectionExpression
+
+Set ``DYNAMODB_ENDPOINT_URL`` to point the client at DynamoDB Local or moto.
+"""
+
+import os
+import random
+import threading
+import time
+
+import boto3
+import structlog
+from botocore.config import Config
+
+logger = structlog.get_logger()
+
+BATCH_GET_LIMIT = 100
+BATCH_WRITE_LIMIT = 25
+
+
+class BatchIncomplete(Exception):
+    """Raised when DynamoDB still reports unprocessed keys or items after every attempt."""
+
+    def __init__(self, message, unprocessed):
+        super().__init__(message)
+        self.unprocessed = unprocessed
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def dynamodb_client():
+    """The process-wide DynamoDB client; boto3 clients are thread-safe and pool their connections."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = boto3.client(
+                "dynamodb",
+                region_name=os.environ.get("AWS_REGION", "us-east-1"),
+                endpoint_url=os.environ.get("DYNAMODB_ENDPOINT_URL") or None,
+                config=Config(
+                    max_pool_connections=int(os.environ.get("DYNAMODB_MAX_POOL_CONNECTIONS", "50")),
+                    retries={"mode": "adaptive", "max_attempts": 5},  # Throttling errors on the call itself
+                ),
+            )
+        return _client
+
+
+def _hash_key(model):
+    for name, attr in model.get_attributes().items():
+        if attr.is_hash_key:
+            return name, attr
+    raise ValueError(f"{model.__name__} has no hash key")
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _backoff(attempt, base_backoff):
+    # Full jitter: concurrent callers that were throttled together don't retry together
+    time.sleep(random.uniform(0, base_backoff * 2 ** attempt))
+
+
+def _projection(attributes, key_name):
+    names = list(dict.fromkeys([key_name, *attributes]))
+    placeholders = {f"#p{i}": name for i, name in enumerate(names)}
+    return {"ProjectionExpression": ", ".join(placeholders), "ExpressionAttributeNames": placeholders}
+
+
+def batch_get(model, keys, attributes=None, consistent_read=False, client=None, max_attempts=8, base_backoff=0.05):
+    """
+    Fetches the items with the given hash keys as ``{key: model instance}``, in request order.
+
+    Missing keys are left out. With ``attributes``, only those attributes (and the
+    hash key) are read, and the other attributes of the returned instances are unset.
+    """
+    client = client or dynamodb_client()
+    table_name = model.Meta.table_name
+    key_name, key_attr = _hash_key(model)
+    keys = list(dict.fromkeys(keys))
+    request_options = {"ConsistentRead": consistent_read}
+    if attributes:
+        request_options.update(_projection(attributes, key_name))
+
+    found = {}
+    for chunk in _chunks(keys, BATCH_GET_LIMIT):
+        pending = [{key_name: {key_attr.attr_type: key_attr.serialize(key)}} for key in chunk]
+        for attempt in range(max_attempts):
+            response = client.batch_get_item(RequestItems={table_name: {"Keys": pending, **request_options}})
+            for raw in response.get("Responses", {}).get(table_name, []):
+                item = model.from_raw_data(raw)
+                found[getattr(item, key_name)] = item
+            pending = response.get("UnprocessedKeys", {}).get(table_name, {}).get("Keys", [])
+            if not pending:
+                break
+            logger.info("dynamodb.batch_get.unprocessed", table=table_name, keys=len(pending), attempt=attempt + 1)
+            if attempt + 1 < max_attempts:
+                _backoff(attempt, base_backoff)
+        else:
+            raise BatchIncomplete(f"BatchGetItem on {table_name} left {len(pending)} keys unprocessed", pending)
+    return {key: found[key] for key in keys if key in found}
+
+
+def batch_write(model, puts=(), deletes=(), client=None, max_attempts=8, base_backoff=0.05):
+    """
+    Saves the ``puts`` (model instances) and deletes the items with the ``deletes`` hash keys.
+
+    If one key appears several times, only its last operation is sent. Writes are
+    not atomic: on BatchIncomplete, some of them may already have been applied.
+    """
+    client = client or dynamodb_client()
+    table_name = model.Meta.table_name
+    key_name, key_attr = _hash_key(model)
+    requests = {}
+    for key in deletes:
+        requests[key] = {"DeleteRequest": {"Key": {key_name: {key_attr.attr_type: key_attr.serialize(key)}}}}
+    for item in puts:
+        requests[getattr(item, key_name)] = {"PutRequest": {"Item": item.serialize()}}
+    requests = list(requests.values())
+
+    for chunk in _chunks(requests, BATCH_WRITE_LIMIT):
+        pending = chunk
+        for attempt in range(max_attempts):
+            response = client.batch_write_item(RequestItems={table_name: pending})
+            pending = response.get("UnprocessedItems", {}).get(table_name, [])
+            if not pending:
+                break
+            logger.info("dynamodb.batch_write.unprocessed", table=table_name, items=len(pending), attempt=attempt + 1)
+            if attempt + 1 < max_attempts:
+                _backoff(attempt, base_backoff)
+        else:
+            raise BatchIncomplete(f"BatchWriteItem on {table_name} left {len(pending)} items unprocessed", pending)
@@ -0,0 +1,100 @@
+"""In-process dict storage; the original behaviour of every service."""
+
+import threading
+
+from .base import Table, updated_document
+
+
+class MemoryTable(Table):
+    """
+    Stores documents in a dict. Documents are returned by reference, as before.
+
+    Each indexed field has a ``value -> {key: None}`` map (an insertion-ordered set).
+    The values a document was indexed under are remembered per key, so a document
+    that was mutated in place and then written back is still unindexed correctly.
+    """
+
+    def __init__(self, name, key_field, indexes=()):
+        super().__init__(name, key_field, indexes)
+        self._docs = {}
+        self._index = {field: {} for field in self.indexes}
+        self._indexed_values = {}  # key -> ((field, value), ...) it is indexed under
+        self._update_lock = threading.Lock()
+
+    def _unindex(self, key):
+        for field, value in self._indexed_values.pop(key, ()):
+            bucket = self._index[field][value]
+            del bucket[key]
+            if not bucket:
+                del self._index[field][value]
+
+    def _add_to_index(self, key, doc):
+        entries = tuple((field, doc[field]) for field in self.indexes if doc.get(field) is not None)
+        for field, value in entries:
+            self._index[field].setdefault(value, {})[key] = None
+        if entries:
+            self._indexed_values[key] = entries
+
+    def __getitem__(self, key):
+        return self._docs[key]
+
+    def __setitem__(self, key, doc):
+        if self._index:
+            self._unindex(key)
+            self._add_to_index(key, doc)
+        self._docs[key] = doc
+
+    def __delitem__(self, key):
+        del self._docs[key]
+        if self._index:
+            self._unindex(key)
+
+    def __iter__(self):
+        return iter(list(self._docs))
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, key):
+        return key in self._docs
+
+    def get(self, key, default=None):
+        return self._docs.get(key, default)
+
+    def values(self):
+        return list(self._docs.values())
+
+    def items(self):
+        return list(self._docs.items())
+
+    def insert(self, doc):
+        with self._update_lock:
+            if doc[self.key_field] in self._docs:
+                return False
+            self[doc[self.key_field]] = doc
+        return True
+
+    def update(self, key, set_fields=None, remove_fields=(), expected_version=None):
+        # The lock makes the version check and the write one step for concurrent updates
+        with self._update_lock:
+            updated = updated_document(self._docs.get(key), key, set_fields, remove_fields, expected_version)
+            self[key] = updated
+        return updated
+
+    def clear(self):
+        self._docs.clear()
+        for index in self._index.values():
+            index.clear()
+        self._indexed_values.clear()
+
+    def find(self, field, value):
+        index = self._index.get(field)
+        if index is None:
+            return super().find(field, value)
+        return [self._docs[key] for key in index.get(value, ())]
+
+    def find_many(self, field, values):
+        index = self._index.get(field)
+        if index is None:
+            return super().find_many(field, values)
+        return [self._docs[key] for value in dict.fromkeys(values) for key in index.get(value, ())]
@@ -0,0 +1,216 @@
+"""SQLite storage in WAL mode, shareable by several worker processes on one host."""
+
+import json
+import queue
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from .base import Table, project, updated_document
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _identifier(name):
+    # Table and field names are interpolated into SQL, so only plain identifiers are accepted
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid identifier for SQLite storage: {name!r}")
+    return name
+
+
+class ConnectionPool:
+    """
+    A fixed set of connections to one database file, handed out one per caller.
+
+    Every connection is opened in WAL mode, so readers never block the single
+    writer and several processes can share the file. sqlite3 keeps a per-connection
+    cache of compiled statements; because the tables issue a fixed set of SQL
+    strings, reusing pooled connections means those statements are prepared once
+    and then only re-bound.
+    """
+
+    def __init__(self, path, size=8, timeout=5.0):
+        self.path = path
+        self.timeout = timeout
+        self._uri = path.startswith("file:")
+        self._idle = queue.LifoQueue(maxsize=size)
+        for _ in range(size):
+            self._idle.put(self._connect())
+
+    def _connect(self):
+        connection = sqlite3.connect(
+            self.path,
+            timeout=self.timeout,
+            check_same_thread=False,  # Connections move between threads, but only one uses each at a time
+            isolation_level=None,  # Transactions are explicit, see transaction()
+            cached_statements=256,
+            uri=self._uri,
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+        return connection
+
+    @contextmanager
+    def connection(self):
+        connection = self._idle.get(timeout=self.timeout)
+        try:
+            yield connection
+        finally:
+            self._idle.put(connection)
+
+    @contextmanager
+    def transaction(self):
+        """A connection inside BEGIN IMMEDIATE ... COMMIT, rolled back on error."""
+        with self.connection() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class SQLiteTable(Table):
+    """
+    Documents stored as JSON text in a ``(key TEXT PRIMARY KEY, doc TEXT)`` table.
+
+    Fields listed in ``indexes`` get an expression index on ``json_extract(doc, '$.field')``,
+    which ``find`` uses for equality lookups.
+    """
+
+    def __init__(self, pool, name, key_field, indexes=()):
+        super().__init__(_identifier(name), key_field, [_identifier(f) for f in indexes])
+        self.pool = pool
+        table = self.name
+        self._sql_get = f"SELECT doc FROM {table} WHERE key = ?"
+        self._sql_exists = f"SELECT 1 FROM {table} WHERE key = ?"
+        self._sql_put = f"INSERT INTO {table} (key, doc) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET doc = excluded.doc"
+        self._sql_insert = f"INSERT INTO {table} (key, doc) VALUES (?, ?) ON CONFLICT(key) DO NOTHING"
+        self._sql_delete = f"DELETE FROM {table} WHERE key = ?"
+        self._sql_keys = f"SELECT key FROM {table} ORDER BY rowid"
+        self._sql_items = f"SELECT key, doc FROM {table} ORDER BY rowid"
+        self._sql_count = f"SELECT COUNT(*) FROM {table}"
+        self._sql_clear = f"DELETE FROM {table}"
+        self._sql_find = {f: f"SELECT doc FROM {table} WHERE json_extract(doc, '$.{f}') = ?" for f in self.indexes}
+        with pool.transaction() as connection:
+            connection.execute(f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, doc TEXT NOT NULL)")
+            for field in self.indexes:
+                connection.execute(f"CREATE INDEX IF NOT EXISTS {table}_{field} ON {table} (json_extract(doc, '$.{field}'))")
+
+    def __getitem__(self, key):
+        with self.pool.connection() as connection:
+            row = connection.execute(self._sql_get, (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return json.loads(row[0])
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        with self.pool.connection() as connection:
+            return connection.execute(self._sql_exists, (key,)).fetchone() is not None
+
+    def __setitem__(self, key, doc):
+        with self.pool.connection() as connection:
+            connection.execute(self._sql_put, (key, json.dumps(doc)))
+
+    def __delitem__(self, key):
+        with self.pool.connection() as connection:
+            if connection.execute(self._sql_delete, (key,)).rowcount == 0:
+                raise KeyError(key)
+
+    def __iter__(self):
+        with self.pool.connection() as connection:
+            return iter([row[0] for row in connection.execute(self._sql_keys)])
+
+    def __len__(self):
+        with self.pool.connection() as connection:
+            return connection.execute(self._sql_count).fetchone()[0]
+
+    def values(self):
+        with self.pool.connection() as connection:
+            return [json.loads(doc) for _, doc in connection.execute(self._sql_items)]
+
+    def items(self):
+        with self.pool.connection() as connection:
+            return [(key, json.loads(doc)) for key, doc in connection.execute(self._sql_items)]
+
+    def clear(self):
+        with self.pool.connection() as connection:
+            connection.execute(self._sql_clear)
+
+    def put_many(self, docs):
+        rows = [(doc[self.key_field], json.dumps(doc)) for doc in docs]
+        with self.pool.transaction() as connection:
+            connection.executemany(self._sql_put, rows)
+
+    def get_many(self, keys, fields=None):
+        keys = list(keys)
+        found = {}
+        with self.pool.connection() as connection:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = connection.execute(f"SELECT key, doc FROM {self.name} WHERE key IN ({placeholders})", chunk)
+                found.update((key, project(json.loads(doc), fields)) for key, doc in rows)
+        return {key: found[key] for key in keys if key in found}
+
+    def insert(self, doc):
+        with self.pool.connection() as connection:
+            return connection.execute(self._sql_insert, (doc[self.key_field], json.dumps(doc))).rowcount == 1
+
+    def update(self, key, set_fields=None, remove_fields=(), expected_version=None):
+        # BEGIN IMMEDIATE holds the write lock from the read, so no other process can write in between
+        with self.pool.transaction() as connection:
+            row = connection.execute(self._sql_get, (key,)).fetchone()
+            updated = updated_document(json.loads(row[0]) if row else None, key, set_fields, remove_fields, expected_version)
+            connection.execute(self._sql_put, (key, json.dumps(updated)))
+        return updated
+
+    def find(self, field, value):
+        sql = self._sql_find.get(field)
+        if sql is None:
+            return super().find(field, value)
+        with self.pool.connection() as connection:
+            return [json.loads(row[0]) for row in connection.execute(sql, (value,))]
+
+    def find_many(self, field, values):
+        if field not in self._sql_find:
+            return super().find_many(field, values)
+        values = list(dict.fromkeys(values))
+        docs = []
+        with self.pool.connection() as connection:
+            for start in range(0, len(values), 500):
+                chunk = values[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                sql = f"SELECT doc FROM {self.name} WHERE json_extract(doc, '$.{field}') IN ({placeholders})"
+                docs.extend(json.loads(row[0]) for row in connection.execute(sql, chunk))
+        return docs
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def pool_for(path, size=8):
+    """One shared pool per database file, however many tables are opened on it."""
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = _pools[path] = ConnectionPool(path, size=size)
+        return pool
@@ -0,0 +1,428 @@
+"""Tests for the storage backends."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, UTC
+
+import pytest
+from pynamodb.attributes import NumberAttribute, UnicodeAttribute, UTCDateTimeAttribute
+from pynamodb.indexes import AllProjection, GlobalSecondaryIndex
+from pynamodb.models import Model
+
+from storage import VersionConflict, open_table, sqlite_path, SQLITE_SHARED_MEMORY
+from storage.cache import CachedTable
+from storage.dynamo import PynamoTable
+from storage.dynamo_batch import BatchIncomplete, batch_get, batch_write
+from storage.memory import MemoryTable
+from storage.sqlite import ConnectionPool, SQLiteTable
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def table(request, tmp_path):
+    if request.param == "memory":
+        yield MemoryTable("events", "eventId", indexes=("organizerId",))
+        return
+    pool = ConnectionPool(str(tmp_path / "test.db"), size=2)
+    yield SQLiteTable(pool, "events", "eventId", indexes=("organizerId",))
+    pool.close()
+
+
+def _event(event_id, organizer="org-1", **extra):
+    return {"eventId": event_id, "organizerId": organizer, "title": f"Cleanup {event_id}", **extra}
+
+
+def test_crud(table):
+    table["e1"] = _event("e1", capacity=10)
+    assert "e1" in table
+    assert table["e1"]["capacity"] == 10
+    assert table.get("missing") is None
+    assert len(table) == 1
+
+    table["e1"] = _event("e1", capacity=20)
+    assert table["e1"]["capacity"] == 20
+    assert len(table) == 1
+
+    del table["e1"]
+    assert "e1" not in table
+    with pytest.raises(KeyError):
+        del table["e1"]
+    with pytest.raises(KeyError):
+        table["e1"]
+
+
+def test_put_many_and_get_many(table):
+    table.put_many(_event(f"e{i}") for i in range(5))
+    assert len(table) == 5
+    assert sorted(table) == [f"e{i}" for i in range(5)]
+
+    found = table.get_many(["e3", "missing", "e0", "e4"])
+    assert list(found) == ["e3", "e0", "e4"]  # Request order, missing keys skipped
+    assert found["e0"]["title"] == "Cleanup e0"
+
+    projected = table.get_many(["e1", "missing"], fields=["eventId", "title", "notAField"])
+    assert projected == {"e1": {"eventId": "e1", "title": "Cleanup e1"}}
+
+
+def test_update_is_conditional_on_version(table):
+    table["e1"] = _event("e1", city="LA")
+    updated = table.update("e1", {"title": "Beach cleanup"}, remove_fields=("city",))
+    assert updated["version"] == 1 and "city" not in updated
+    assert table.load("e1") == updated
+    assert table.update("e1", {"capacity": 5}, expected_version=1)["version"] == 2
+    with pytest.raises(VersionConflict):
+        table.update("e1", {"capacity": 6}, expected_version=1)
+    assert table["e1"]["capacity"] == 5
+    with pytest.raises(KeyError):
+        table.update("missing", {"title": "x"})
+
+
+def test_insert_only_writes_free_keys(table):
+    assert table.insert(_event("e1", capacity=1))
+    assert not table.insert(_event("e1", capacity=2))
+    assert table["e1"]["capacity"] == 1
+    assert [doc["eventId"] for doc in table.find("organizerId", "org-1")] == ["e1"]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        won = list(pool.map(lambda i: table.insert(_event("e2", claimant=i)), range(16)))
+    assert won.count(True) == 1
+    assert table["e2"]["claimant"] == won.index(True)
+
+
+def test_find_by_indexed_and_unindexed_field(table):
+    table.put_many([_event("e1", "org-1", city="LA"), _event("e2", "org-2", city="LA"), _event("e3", "org-1")])
+    assert sorted(doc["eventId"] for doc in table.find("organizerId", "org-1")) == ["e1", "e3"]
+    assert sorted(doc["eventId"] for doc in table.find("city", "LA")) == ["e1", "e2"]
+
+
+def test_index_follows_updates_and_deletes(table):
+    table.put_many([_event("e1", "org-1"), _event("e2", "org-1"), _event("e3", "org-2")])
+    moved = table["e1"]
+    moved["organizerId"] = "org-2"  # Mutated in place (memory) and written back
+    table["e1"] = moved
+    del table["e2"]
+
+    assert table.find("organizerId", "org-1") == []
+    assert sorted(doc["eventId"] for doc in table.find("organizerId", "org-2")) == ["e1", "e3"]
+    found = table.find_many("organizerId", ["org-2", "org-9", "org-2"])
+    assert sorted(doc["eventId"] for doc in found) == ["e1", "e3"]
+    assert sorted(doc["eventId"] for doc in table.find_many("title", ["Cleanup e3"])) == ["e3"]
+
+
+def test_clear(table):
+    table.put_many(_event(f"e{i}") for i in range(3))
+    table.clear()
+    assert len(table) == 0
+    assert table.values() == []
+
+
+def test_sqlite_pools_on_one_file_share_writes(tmp_path):
+    path = str(tmp_path / "shared.db")
+    writer_pool, reader_pool = ConnectionPool(path, size=1), ConnectionPool(path, size=1)
+    writer = SQLiteTable(writer_pool, "events", "eventId")
+    reader = SQLiteTable(reader_pool, "events", "eventId")
+
+    writer.put_many([_event("e1"), _event("e2")])
+    assert sorted(reader) == ["e1", "e2"]
+    del reader["e1"]
+    assert "e1" not in writer
+
+    writer_pool.close()
+    reader_pool.close()
+
+
+def test_sqlite_rejects_unsafe_identifiers(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "test.db"), size=1)
+    with pytest.raises(ValueError):
+        SQLiteTable(pool, "events; DROP TABLE x", "eventId")
+    with pytest.raises(ValueError):
+        SQLiteTable(pool, "events", "eventId", indexes=("bad-field",))
+    pool.close()
+
+
+def test_open_table_dispatches_on_url(tmp_path):
+    assert isinstance(open_table("events", "eventId", url="memory://"), MemoryTable)
+    assert isinstance(open_table("events", "eventId", url=f"sqlite:///{tmp_path}/x.db"), SQLiteTable)
+    with pytest.raises(ValueError):
+        open_table("events", "eventId", url="postgres://localhost/db")
+
+
+def test_sqlite_path():
+    assert sqlite_path("sqlite:///default.db") == "default.db"
+    assert sqlite_path("sqlite:////var/lib/app.db") == "/var/lib/app.db"
+    assert sqlite_path("sqlite:///:memory:") == SQLITE_SHARED_MEMORY
+
+
+class _ReportModel(Model):
+    class Meta:
+        table_name = "test-reports"
+        region = "us-east-1"
+
+    reportId = UnicodeAttribute(hash_key=True)
+    bagsCollected = NumberAttribute()
+    submittedAt = UTCDateTimeAttribute()
+
+
+def test_pynamo_table_maps_documents_onto_typed_model():
+    table = PynamoTable("reports", "reportId", model=_ReportModel)
+    item = table.to_item({"reportId": "r1", "bagsCollected": 4, "submittedAt": "2025-07-16T10:00:00Z", "notes": None})
+
+    assert item.reportId == "r1"
+    assert item.bagsCollected == 4
+    assert item.submittedAt == datetime(2025, 7, 16, 10, 0, tzinfo=UTC)
+    doc = table.to_doc(item)
+    assert doc["reportId"] == "r1"
+    assert datetime.fromisoformat(doc["submittedAt"].replace("Z", "+00:00")) == item.submittedAt
+
+
+def test_pynamo_table_stores_untyped_documents_as_json():
+    table = PynamoTable("users", "email")
+    doc = {"email": "a@example.com", "role": "volunteer", "tags": ["x"]}
+    item = table.to_item(doc)
+    assert item.key == "a@example.com"
+    assert table.to_doc(item) == doc
+
+
+class _ReportsByEventIndex(GlobalSecondaryIndex):
+    class Meta:
+        index_name = "eventId-index"
+        projection = AllProjection()
+
+    eventId = UnicodeAttribute(hash_key=True)
+
+
+class _IndexedReportModel(Model):
+    class Meta:
+        table_name = "test-indexed-reports"
+        region = "us-east-1"
+
+    reportId = UnicodeAttribute(hash_key=True)
+    eventId = UnicodeAttribute()
+    by_event = _ReportsByEventIndex()
+
+
+def test_pynamo_table_finds_through_a_global_secondary_index(monkeypatch):
+    table = PynamoTable("reports", "reportId", indexes=("eventId",), model=_IndexedReportModel)
+    queried = []
+
+    def query(hash_key):
+        queried.append(hash_key)
+        return [_IndexedReportModel(reportId=f"{hash_key}-r", eventId=hash_key)]
+
+    monkeypatch.setattr(_IndexedReportModel.by_event, "query", query)
+    monkeypatch.setattr(_IndexedReportModel, "scan", lambda *args, **kwargs: pytest.fail("find scanned the table"))
+    assert table.find("eventId", "e1") == [{"reportId": "e1-r", "eventId": "e1"}]
+    assert [doc["reportId"] for doc in table.find_many("eventId", ["e2", "e3", "e2"])] == ["e2-r", "e3-r"]
+    assert queried == ["e1", "e2", "e3"]
+
+
+def test_pynamo_table_refuses_indexes_its_model_does_not_declare():
+    with pytest.raises(ValueError, match="eventId-index"):
+        PynamoTable("reports", "reportId", indexes=("eventId",), model=_ReportModel)
+
+
+def test_pynamo_generic_table_indexes_fields_as_strings(monkeypatch):
+    table = PynamoTable("reminders", "reminderId", indexes=("dueBucket",))
+    assert "dueBucket-index" in table.model._indexes
+    stored = [table.to_item({"reminderId": "r1", "dueBucket": 5}), table.to_item({"reminderId": "r2", "dueBucket": "5"})]
+    assert stored[0].dueBucket == "5"
+
+    monkeypatch.setattr(table.model._indexes["dueBucket-index"], "query", lambda hash_key: stored)
+    assert [doc["reminderId"] for doc in table.find("dueBucket", 5)] == ["r1"]
+
+
+class _FakeDynamoDB:
+    """Just enough of the low-level DynamoDB client for the batch helpers, with simulated throttling."""
+
+    def __init__(self, unprocessed_rounds=0):
+        self.tables = {}
+        self.calls = []
+        self.unprocessed_rounds = unprocessed_rounds
+
+    def _throttle(self, requests):
+        # While throttling, only the first request of each call is processed
+        if self.unprocessed_rounds:
+            self.unprocessed_rounds -= 1
+            return requests[:1], requests[1:]
+        return requests, []
+
+    def batch_get_item(self, RequestItems):
+        (table_name, request), = RequestItems.items()
+        assert len(request["Keys"]) <= 100
+        self.calls.append(("get", request))
+        table = self.tables.setdefault(table_name, {})
+        processed, unprocessed = self._throttle(request["Keys"])
+        items = [table[key["reportId"]["S"]] for key in processed if key["reportId"]["S"] in table]
+        if "ProjectionExpression" in request:
+            names = [request["ExpressionAttributeNames"][p] for p in request["ProjectionExpression"].split(", ")]
+            items = [{name: item[name] for name in names if name in item} for item in items]
+        response = {"Responses": {table_name: items}, "UnprocessedKeys": {}}
+        if unprocessed:
+            response["UnprocessedKeys"][table_name] = {"Keys": unprocessed}
+        return response
+
+    def batch_write_item(self, RequestItems):
+        (table_name, requests), = RequestItems.items()
+        assert len(requests) <= 25
+        self.calls.append(("write", requests))
+        table = self.tables.setdefault(table_name, {})
+        processed, unprocessed = self._throttle(requests)
+        for request in processed:
+            if "PutRequest" in request:
+                item = request["PutRequest"]["Item"]
+                table[item["reportId"]["S"]] = item
+            else:
+                table.pop(request["DeleteRequest"]["Key"]["reportId"]["S"], None)
+        return {"UnprocessedItems": {table_name: unprocessed} if unprocessed else {}}
+
+
+def _report(i):
+    return _ReportModel(reportId=f"r{i}", bagsCollected=i, submittedAt=datetime(2025, 7, 16, tzinfo=UTC))
+
+
+def test_batch_write_chunks_and_keeps_last_operation_per_key():
+    client = _FakeDynamoDB()
+    batch_write(_ReportModel, puts=[_report(i) for i in range(60)], client=client)
+    assert [len(requests) for _, requests in client.calls] == [25, 25, 10]
+
+    client.calls.clear()
+    batch_write(_ReportModel, puts=[_report(0)], deletes=["r0", "r1"], client=client)
+    assert len(client.calls) == 1 and len(client.calls[0][1]) == 2  # r0 sent once, as the put
+    assert "r0" in client.tables["test-reports"] and "r1" not in client.tables["test-reports"]
+
+
+def test_batch_get_chunks_dedupes_and_keeps_request_order():
+    client = _FakeDynamoDB()
+    batch_write(_ReportModel, puts=[_report(i) for i in range(250)], client=client)
+    client.calls.clear()
+
+    keys = [f"r{i}" for i in range(249, -1, -1)] + ["r5", "missing"]
+    found = batch_get(_ReportModel, keys, client=client)
+    assert [len(request["Keys"]) for _, request in client.calls] == [100, 100, 51]
+    assert list(found) == [f"r{i}" for i in range(249, -1, -1)]
+    assert found["r7"].bagsCollected == 7
+
+
+def test_batch_get_projection_always_includes_the_key():
+    client = _FakeDynamoDB()
+    batch_write(_ReportModel, puts=[_report(1)], client=client)
+    found = batch_get(_ReportModel, ["r1"], attributes=["bagsCollected"], client=client)
+    assert found["r1"].bagsCollected == 1
+    assert found["r1"].submittedAt is None
+
+
+def test_unprocessed_keys_and_items_are_retried():
+    client = _FakeDynamoDB(unprocessed_rounds=3)
+    batch_write(_ReportModel, puts=[_report(i) for i in range(10)], client=client, base_backoff=0)
+    assert len(client.tables["test-reports"]) == 10
+    assert [len(requests) for _, requests in client.calls] == [10, 9, 8, 7]  # Only the leftovers are resent
+
+    client.unprocessed_rounds = 2
+    found = batch_get(_ReportModel, [f"r{i}" for i in range(10)], client=client, base_backoff=0)
+    assert len(found) == 10
+
+
+def test_batch_gives_up_after_max_attempts():
+    client = _FakeDynamoDB(unprocessed_rounds=100)
+    with pytest.raises(BatchIncomplete) as error:
+        batch_write(_ReportModel, puts=[_report(i) for i in range(5)], client=client, max_attempts=3, base_backoff=0)
+    assert len(error.value.unprocessed) == 2
+
+
+class _Clock:
+    def __init__(self, now=1_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class _CountingTable(MemoryTable):
+    """A MemoryTable that counts reads and can hold them until released."""
+
+    def __init__(self):
+        super().__init__("profiles", "userId")
+        self.reads = 0
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def get(self, key, default=None):
+        self.reads += 1
+        self.gate.wait()
+        return super().get(key, default)
+
+
+def test_cache_serves_repeat_reads_until_ttl():
+    clock, backing = _Clock(), _CountingTable()
+    backing["u1"] = {"userId": "u1", "name": "Ann"}
+    cache = CachedTable(backing, ttl=60, negative_ttl=5, clock=clock)
+    assert cache.get("u1")["name"] == "Ann"
+    cache.get("u1")["name"] = "changed by caller"
+    assert cache["u1"]["name"] == "Ann"  # Callers get copies
+    assert backing.reads == 1
+    assert "nobody" not in cache and "nobody" not in cache
+    assert backing.reads == 2  # Missing keys are cached too
+
+    clock.now += 60
+    assert cache.get("u1")["name"] == "Ann"
+    assert backing.reads == 3
+    assert cache.stats() == {"entries": 2, "hits": 3, "misses": 3, "loads": 3,
+                             "evictions": 0, "expirations": 1, "hitRatio": 0.5}
+
+
+def test_cache_writes_invalidate_and_capacity_evicts():
+    backing = _CountingTable()
+    cache = CachedTable(backing, max_entries=2, clock=_Clock())
+    cache["u1"] = {"userId": "u1", "name": "Ann"}
+    assert cache["u1"]["name"] == "Ann"
+    cache["u1"] = {"userId": "u1", "name": "Anna"}
+    assert cache["u1"]["name"] == "Anna"
+    cache.put_many([{"userId": "u2"}, {"userId": "u3"}])
+    cache.get("u2"), cache.get("u3")
+    assert cache.evictions == 1 and "u1" not in cache._entries
+    del cache["u3"]
+    assert cache.get("u3") is None
+
+
+def test_concurrent_misses_load_once():
+    backing = _CountingTable()
+    backing["u1"] = {"userId": "u1", "name": "Ann"}
+    cache = CachedTable(backing)
+    backing.gate.clear()
+    results = []
+    readers = [threading.Thread(target=lambda: results.append(cache.get("u1"))) for _ in range(8)]
+    for reader in readers:
+        reader.start()
+    while not cache._flights:
+        pass
+    backing.gate.set()
+    for reader in readers:
+        reader.join()
+    assert backing.reads == 1 and cache.loads == 1
+    assert [doc["name"] for doc in results] == ["Ann"] * 8
+
+
+def test_load_overlapping_a_write_is_not_cached():
+    backing = _CountingTable()
+    backing["u1"] = {"userId": "u1", "name": "Ann"}
+    cache = CachedTable(backing)
+    backing.gate.clear()
+    reader = threading.Thread(target=cache.get, args=("u1",))
+    reader.start()
+    while not cache._flights:
+        pass
+    cache["u1"] = {"userId": "u1", "name": "Anna"}  # Lands while the read is in flight
+    backing.gate.set()
+    reader.join()
+    assert cache["u1"]["name"] == "Anna"
+
+
+def test_cached_get_many_reads_only_misses():
+    backing = _CountingTable()
+    backing.put_many([{"userId": f"u{i}", "name": f"User {i}", "email": "x"} for i in range(3)])
+    cache = CachedTable(backing)
+    cache.get("u0")
+    found = cache.get_many(["u2", "missing", "u0"], fields=["userId", "name"])
+    assert found == {"u2": {"userId": "u2", "name": "User 2"}, "u0": {"userId": "u0", "name": "User 0"}}
+    assert cache.loads == 3  # u0 came from the cache
+    assert cache.get_many(["u2", "missing"]) == {"u2": {"userId": "u2", "name": "User 2", "email": "x"}}
+    assert cache.loads == 3
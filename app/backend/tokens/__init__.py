@@ -0,0 +1,69 @@
+"""
+JWT setup shared by the gateway and every service.
+
+``init_jwt(app)`` configures the signing key and installs a JWTManager that
+remembers verified tokens, so a client making many requests with one bearer
+token pays for signature verification once rather than on every request.
+
+When Cognito is configured (``COGNITO_USER_POOL_ID`` or ``COGNITO_JWKS_URL``),
+RS256 access tokens from the user pool are accepted as well as our own HS256
+tokens, verified locally against the pool's cached JWKS (see ``jwks.py``).
+"""
+
+import os
+from datetime import timedelta
+
+from flask_jwt_extended import JWTManager
+
+from .decode_cache import DecodeCache
+from .jwks import JWKSUnavailable, cognito_resolver_from_env
+
+
+class CachingJWTManager(JWTManager):
+    """A JWTManager whose decoded-token lookups go through a DecodeCache first."""
+
+    def __init__(self, app=None, decode_cache=None, **kwargs):
+        self.decode_cache = decode_cache if decode_cache is not None else DecodeCache()
+        super().__init__(app, **kwargs)
+
+    def _decode_jwt_from_config(self, encoded_token, csrf_value=None, allow_expired=False):
+        # CSRF checks and expired-token decodes need the full path; they are rare
+        if csrf_value is not None or allow_expired:
+            return super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+        claims = self.decode_cache.get(encoded_token)
+        if claims is None:
+            claims = super()._decode_jwt_from_config(encoded_token)
+            self.decode_cache.put(encoded_token, claims)
+        return claims
+
+
+def init_jwt(app, key_resolver=None):
+    """
+    Sets the app's JWT signing key from the environment and attaches a CachingJWTManager.
+
+    ``key_resolver`` picks the verification key per token (a flask_jwt_extended
+    decode_key_loader); by default it is the Cognito resolver, if Cognito is configured.
+    """
+    app.config.setdefault("JWT_SECRET_KEY", os.environ.get("JWT_SECRET_KEY", "super-secret-key-for-dev-only"))
+    # Tokens can be minted through the gateway or the auth service, so lifetimes come from one place.
+    # Access tokens don't expire unless JWT_ACCESS_TOKEN_MINUTES is set; refresh tokens last 30 days.
+    access_minutes = os.environ.get("JWT_ACCESS_TOKEN_MINUTES")
+    app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(minutes=float(access_minutes)) if access_minutes else False
+    app.config["JWT_REFRESH_TOKEN_EXPIRES"] = timedelta(days=float(os.environ.get("JWT_REFRESH_TOKEN_DAYS", "30")))
+    # flask-restful turns exceptions raised inside resources into 500s unless they propagate,
+    # which would hide the 401/422 responses JWTManager's error handlers give for bad tokens
+    app.config["PROPAGATE_EXCEPTIONS"] = True
+    manager = CachingJWTManager(app, decode_cache=DecodeCache(
+        max_entries=int(os.environ.get("JWT_DECODE_CACHE_SIZE", "10000")),
+        max_age=float(os.environ.get("JWT_DECODE_CACHE_MAX_AGE", "300")),
+    ))
+    key_resolver = key_resolver or cognito_resolver_from_env()
+    if key_resolver is not None:
+        manager.decode_key_loader(key_resolver)
+        app.config["JWT_DECODE_ALGORITHMS"] = [app.config["JWT_ALGORITHM"], "RS256"]
+
+        @app.errorhandler(JWKSUnavailable)
+        def jwks_unavailable(error):
+            return {"msg": "Token verification is temporarily unavailable"}, 503
+
+    return manager
@@ -0,0 +1,63 @@
+"""Bounded LRU cache of verified JWT claims, so a token's signature is checked once rather than per request."""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+def token_digest(encoded_token):
+    # Keyed by digest so the cache never holds bearer tokens themselves
+    return hashlib.blake2b(encoded_token.encode(), digest_size=16).digest()
+
+
+class DecodeCache:
+    """
+    Maps token digests to the claims they verified to.
+
+    An entry is only served while the token is unexpired (``exp`` in the past
+    means a miss, so expiry is enforced by a full decode) and for at most
+    ``max_age`` seconds after it was verified, which bounds how long a changed
+    signing key or decode setting can go unnoticed. Only successful decodes are
+    stored; invalid tokens are re-verified, and rejected, every time.
+    """
+
+    def __init__(self, max_entries=10_000, max_age=300.0, clock=time.time):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # digest -> (claims, valid_until)
+        self._lock = threading.Lock()
+
+    def get(self, encoded_token):
+        digest = token_digest(encoded_token)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None or entry[1] <= self.clock():
+                if entry is not None:
+                    del self._entries[digest]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return dict(entry[0])  # Callers may modify the claims; the cached copy stays intact
+
+    def put(self, encoded_token, claims):
+        valid_until = self.clock() + self.max_age
+        if "exp" in claims:
+            valid_until = min(valid_until, claims["exp"])
+        digest = token_digest(encoded_token)
+        with self._lock:
+            self._entries[digest] = (dict(claims), valid_until)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
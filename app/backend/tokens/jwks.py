@@ -0,0 +1,147 @@
+"""Offline verification of Cognito-issued RS256 tokens against a locally cached JWKS."""
+
+import os
+import threading
+import time
+
+import jwt
+import requests
+import structlog
+from flask import current_app
+
+logger = structlog.get_logger()
+
+
+class JWKSUnavailable(Exception):
+    """Raised when no signing keys can be obtained, so tokens can't be verified at all."""
+
+
+class UnknownKeyId(jwt.InvalidTokenError):
+    """The token names a signing key the issuer's key set doesn't contain."""
+
+
+def fetch_jwks(url, timeout=3.0):
+    response = requests.get(url, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+class JWKSCache:
+    """
+    Public signing keys from a JWKS endpoint, refreshed every ``ttl`` seconds.
+
+    A token signed with a ``kid`` the cache hasn't seen triggers a refetch (the
+    issuer may have rotated keys), but at most once per ``min_refetch_interval``
+    so tokens with made-up kids can't turn into a stream of fetches. Refetches are
+    single-flight: threads that need keys while a fetch is running wait for it and
+    share its result. If a refetch fails, the keys already held keep being used.
+    """
+
+    def __init__(self, url, ttl=3600.0, min_refetch_interval=30.0, fetch=fetch_jwks, clock=time.monotonic):
+        self.url = url
+        self.ttl = ttl
+        self.min_refetch_interval = min_refetch_interval
+        self.fetch = fetch
+        self.clock = clock
+        self.fetches = 0
+        self._keys = {}  # kid -> public key object
+        self._fetched_at = None  # Last successful fetch, for the TTL
+        self._attempted_at = None  # Last fetch attempt, for the refetch rate limit
+        self._generation = 0  # Bumped after every fetch attempt, so waiters can tell one happened
+        self._fetch_lock = threading.Lock()
+
+    def get_key(self, kid):
+        key = self._keys.get(kid)
+        if key is not None and not self._stale():
+            return key
+        self._refresh(self._generation, unknown_kid=key is None)
+        key = self._keys.get(kid)
+        if key is None:
+            if not self._keys:
+                raise JWKSUnavailable(f"No signing keys available from {self.url}")
+            raise UnknownKeyId(f"Unknown signing key id: {kid}")
+        return key
+
+    def _stale(self):
+        return self._fetched_at is None or self.clock() - self._fetched_at >= self.ttl
+
+    def _refresh(self, seen_generation, unknown_kid):
+        with self._fetch_lock:
+            if self._generation != seen_generation:
+                return  # Another thread fetched while this one waited for the lock
+            if self._attempted_at is not None and self.clock() - self._attempted_at < self.min_refetch_interval:
+                return
+            self._attempted_at = self.clock()
+            self.fetches += 1
+            try:
+                document = self.fetch(self.url)
+                keys = {jwk["kid"]: jwt.PyJWK(jwk).key for jwk in document["keys"] if jwk.get("use", "sig") == "sig"}
+            except Exception as e:
+                logger.error("jwks.fetch.failed", url=self.url, error=str(e), keys_held=len(self._keys))
+            else:
+                self._keys = keys
+                self._fetched_at = self._attempted_at
+                logger.info("jwks.fetch.success", url=self.url, kids=sorted(keys), unknown_kid=unknown_kid)
+            finally:
+                self._generation += 1
+
+
+class CognitoKeyResolver:
+    """
+    A flask_jwt_extended ``decode_key_loader`` that accepts both kinds of token.
+
+    Tokens whose (unverified) ``iss`` is the Cognito user pool must be RS256
+    access tokens for our app client, and get the pool's public key for their
+    ``kid``. Every other token is one of our own and gets the HMAC secret. The
+    claims are only trusted because the chosen key then has to verify the signature.
+    Our own tokens must use the app's JWT_ALGORITHM, so neither kind of token can
+    be verified with the other's key.
+    """
+
+    def __init__(self, jwks, issuer, client_id=None):
+        self.jwks = jwks
+        self.issuer = issuer
+        self.client_id = client_id
+
+    def __call__(self, headers, claims):
+        if claims.get("iss") != self.issuer:
+            if headers.get("alg") != current_app.config["JWT_ALGORITHM"]:
+                raise jwt.InvalidAlgorithmError("Unexpected signing algorithm")
+            return current_app.config["JWT_SECRET_KEY"]
+        if headers.get("alg") != "RS256":
+            raise jwt.InvalidAlgorithmError("Cognito tokens must be signed with RS256")
+        if claims.get("token_use") != "access":
+            raise jwt.InvalidTokenError("Only Cognito access tokens are accepted")
+        if self.client_id and claims.get("client_id") != self.client_id:
+            raise jwt.InvalidAudienceError("Token was issued to a different app client")
+        return self.jwks.get_key(headers.get("kid"))
+
+
+def cognito_issuer(region, user_pool_id):
+    return f"https://cognito-idp.{region}.amazonaws.com/{user_pool_id}"
+
+
+_resolvers = {}
+_resolvers_lock = threading.Lock()
+
+
+def cognito_resolver_from_env():
+    """
+    The process-wide CognitoKeyResolver, or None when Cognito isn't configured.
+
+    One JWKS cache is shared by every app in the process (the gateway and the
+    services it mounts), so keys are fetched once per process, not once per app.
+    """
+    user_pool_id = os.environ.get("COGNITO_USER_POOL_ID")
+    jwks_url = os.environ.get("COGNITO_JWKS_URL")
+    if not user_pool_id and not jwks_url:
+        return None
+    issuer = os.environ.get("COGNITO_ISSUER") or cognito_issuer(os.environ.get("AWS_REGION", "us-east-1"), user_pool_id)
+    jwks_url = jwks_url or f"{issuer}/.well-known/jwks.json"
+    with _resolvers_lock:
+        resolver = _resolvers.get((issuer, jwks_url))
+        if resolver is None:
+            jwks = JWKSCache(jwks_url, ttl=float(os.environ.get("JWKS_CACHE_TTL", "3600")))
+            resolver = _resolvers[(issuer, jwks_url)] = CognitoKeyResolver(
+                jwks, issuer, client_id=os.environ.get("COGNITO_APP_CLIENT_ID"))
+        return resolver
@@ -0,0 +1,177 @@
+"""Revoked-token list with a Bloom filter in front, so the "not revoked" check never touches storage."""
+
+import hashlib
+import math
+import threading
+import time
+
+import structlog
+
+logger = structlog.get_logger()
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings.
+
+    Sized for ``capacity`` items at a false-positive rate of ``error_rate``. The
+    ``num_hashes`` bit positions come from one blake2b digest split into two
+    64-bit halves (Kirsch-Mitzenmacher double hashing). Items can't be removed.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.num_bits = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def expected_error_rate(self):
+        """False-positive rate to expect at the current fill."""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+
+# Entries carry the time bucket they were revoked in, an indexed field, so a sync reads only recent entries
+SYNC_BUCKET_SECONDS = 60
+# How far before the last sync a sync looks again, for writes that landed late or came from a skewed clock
+SYNC_MARGIN_SECONDS = 60
+
+
+def revocation_bucket(timestamp):
+    return int(timestamp // SYNC_BUCKET_SECONDS)
+
+
+class RevocationList:
+    """
+    Revoked token ids (``jti``), stored in a table and mirrored in a Bloom filter.
+
+    ``is_revoked`` answers from the filter alone when it says "definitely not"; only
+    filter hits (real revocations and the rare false positive) read the table. The
+    table is the source of truth: the filter is rebuilt from it at startup. After
+    that, ``start`` runs a background thread that calls ``sync`` every
+    ``sync_interval`` seconds, picking up revocations made by other worker
+    processes sharing the table; a sync reads only the entries revoked since the
+    last one, through the ``revokedBucket`` index. Every ``prune_interval``
+    seconds the thread calls ``maintain`` instead, which deletes entries whose
+    token has expired and rebuilds the filter without them, so neither grows
+    without bound. Requests never wait for either.
+    """
+
+    def __init__(self, table, capacity=1_000_000, error_rate=0.001, sync_interval=30.0, prune_interval=3600.0,
+                 clock=time.time):
+        self.table = table
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.prune_interval = prune_interval
+        self.clock = clock
+        self.filter = BloomFilter(capacity, error_rate)
+        self.store_reads = 0
+        self._synced_at = clock()
+        self._sync_lock = threading.Lock()
+        self._filter_lock = threading.Lock()  # Bloom filter adds are read-modify-writes of its bytes
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _live_entries(self):
+        now = self.clock()
+        return [entry for entry in self.table.values() if not entry.get("expiresAt") or entry["expiresAt"] > now]
+
+    def rebuild(self):
+        """Replaces the filter with one built from the table's unexpired entries."""
+        with self._sync_lock:
+            started = self.clock()
+            entries = self._live_entries()
+            # Leave headroom so the false-positive rate holds as revocations keep coming in
+            rebuilt = BloomFilter(max(self.capacity, 2 * len(entries)), self.error_rate)
+            for entry in entries:
+                rebuilt.add(entry["jti"])
+            with self._filter_lock:
+                self.filter = rebuilt
+            self._synced_at = started
+        # Revocations that reached the old filter while the table was being read are in the table by now
+        self.sync()
+        logger.info("auth.revocation.rebuilt", entries=len(entries), bits=rebuilt.num_bits, hashes=rebuilt.num_hashes)
+
+    def sync(self):
+        """Adds entries revoked since the last sync (here or by other workers) to the filter; returns how many."""
+        with self._sync_lock:
+            now = self.clock()
+            buckets = range(revocation_bucket(self._synced_at - SYNC_MARGIN_SECONDS), revocation_bucket(now) + 1)
+            added = 0
+            with self._filter_lock:
+                for entry in self.table.find_many("revokedBucket", buckets):
+                    if entry.get("expiresAt") and entry["expiresAt"] <= now:
+                        continue
+                    if entry["jti"] not in self.filter:
+                        self.filter.add(entry["jti"])
+                        added += 1
+            self._synced_at = now
+        return added
+
+    def revoke(self, jti, expires_at=None, reason=None):
+        now = self.clock()
+        entry = {"jti": jti, "revokedAt": now, "revokedBucket": revocation_bucket(now), "expiresAt": expires_at,
+                 "reason": reason}
+        self.table[jti] = entry  # Store first: a crash in between must not leave a filter-only revocation
+        with self._filter_lock:
+            self.filter.add(jti)
+
+    def is_revoked(self, jti):
+        if jti not in self.filter:
+            return False
+        self.store_reads += 1
+        return jti in self.table
+
+    def prune_expired(self):
+        """Deletes entries for tokens that have expired anyway; returns how many were removed."""
+        now = self.clock()
+        expired = [entry["jti"] for entry in self.table.values() if entry.get("expiresAt") and entry["expiresAt"] <= now]
+        for jti in expired:
+            self.table.pop(jti, None)
+        return len(expired)
+
+    def maintain(self):
+        """Prunes expired entries, then rebuilds the filter so it forgets them too; returns how many were pruned."""
+        pruned = self.prune_expired()
+        self.rebuild()
+        logger.info("auth.revocation.pruned", entries=pruned)
+        return pruned
+
+    def start(self):
+        """Syncs (and now and then maintains) on a background thread, until ``stop``."""
+        def run():
+            maintain_at = self.clock() + self.prune_interval
+            while not self._stop.wait(self.sync_interval):
+                try:
+                    if self.clock() >= maintain_at:
+                        maintain_at = self.clock() + self.prune_interval
+                        self.maintain()
+                    else:
+                        self.sync()
+                except Exception as e:
+                    logger.error("auth.revocation.sync_failed", error=str(e))
+
+        self._thread = threading.Thread(target=run, name="revocation-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
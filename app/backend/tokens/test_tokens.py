@@ -0,0 +1,338 @@
+"""Tests for the shared JWT setup."""
+
+from datetime import timedelta
+
+import pytest
+from flask import Flask
+from flask_jwt_extended import create_access_token, get_jwt, jwt_required
+
+from tokens import CachingJWTManager, init_jwt
+from tokens.decode_cache import DecodeCache
+
+
+class _Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_decode_cache_respects_exp_and_max_age():
+    clock = _Clock()
+    cache = DecodeCache(max_age=60, clock=clock)
+    cache.put("short", {"sub": "a", "exp": clock.now + 10})
+    cache.put("long", {"sub": "b", "exp": clock.now + 3600})
+    cache.put("no-exp", {"sub": "c"})
+    assert cache.get("short")["sub"] == "a"
+
+    clock.now += 10
+    assert cache.get("short") is None  # Expired
+    assert cache.get("long")["sub"] == "b"
+    clock.now += 50
+    assert cache.get("long") is None  # Older than max_age
+    assert cache.get("no-exp") is None
+    assert len(cache) == 0
+
+
+def test_decode_cache_is_bounded_lru_and_returns_copies():
+    cache = DecodeCache(max_entries=2)
+    cache.put("a", {"sub": "a"})
+    cache.put("b", {"sub": "b"})
+    cache.get("a")["sub"] = "changed"
+    cache.put("c", {"sub": "c"})  # Evicts b, the least recently used
+    assert cache.get("a") == {"sub": "a"}
+    assert cache.get("b") is None
+    assert cache.get("c") == {"sub": "c"}
+
+
+@pytest.fixture
+def jwt_app():
+    app = Flask(__name__)
+    app.config["JWT_SECRET_KEY"] = "test-secret-key-that-is-long-enough"
+    jwt = init_jwt(app)
+
+    @app.route("/protected")
+    @jwt_required()
+    def protected():
+        return {"sub": get_jwt()["sub"]}
+
+    return app, jwt
+
+
+def _token(app, **kwargs):
+    with app.app_context():
+        return create_access_token(identity="user-1", **kwargs)
+
+
+def test_repeated_requests_verify_token_once(jwt_app):
+    app, jwt = jwt_app
+    assert isinstance(jwt, CachingJWTManager)
+    headers = {"Authorization": f"Bearer {_token(app)}"}
+    with app.test_client() as client:
+        for _ in range(3):
+            response = client.get("/protected", headers=headers)
+            assert response.status_code == 200
+            assert response.json["sub"] == "user-1"
+    assert (jwt.decode_cache.misses, jwt.decode_cache.hits) == (1, 2)
+
+
+def test_invalid_and_expired_tokens_are_rejected_and_not_cached(jwt_app):
+    app, jwt = jwt_app
+    token = _token(app)
+    tampered = token[:-2] + ("AA" if not token.endswith("AA") else "BB")
+    expired = _token(app, expires_delta=timedelta(seconds=-10))
+    with app.test_client() as client:
+        assert client.get("/protected", headers={"Authorization": f"Bearer {tampered}"}).status_code == 422
+        assert client.get("/protected", headers={"Authorization": f"Bearer {expired}"}).status_code == 401
+        assert client.get("/protected").status_code == 401
+    assert len(jwt.decode_cache) == 0
+
+
+def test_gateway_mounts_service_resources_behind_one_jwt_manager():
+    import app as gateway
+
+    rules = {rule.rule for rule in gateway.app.url_map.iter_rules()}
+    assert {"/api/auth/login", "/api/events", "/api/events/<string:event_id>", "/api/reports/<string:report_id>"} <= rules
+    headers = {"Authorization": f"Bearer {_token(gateway.app)}"}
+    with gateway.app.test_client() as client:
+        assert client.get("/api/events?limit=1", headers=headers).status_code == 200
+        assert client.get("/api/events?limit=1", headers=headers).status_code == 200
+        assert client.get("/api/events").status_code == 401
+    assert gateway.jwt.decode_cache.hits >= 1
+
+
+# --- Cognito RS256 tokens verified against a local JWKS stand-in ---
+
+import json
+import threading
+import time
+
+import jwt as pyjwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from werkzeug.serving import make_server
+from werkzeug.wrappers import Response
+
+from tokens.jwks import CognitoKeyResolver, JWKSCache, UnknownKeyId
+
+ISSUER = "https://cognito-idp.us-east-1.amazonaws.com/us-east-1_test"
+CLIENT_ID = "test-client"
+
+
+def _rsa_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def _jwk(private_key, kid):
+    jwk = json.loads(pyjwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key()))
+    return {**jwk, "kid": kid, "use": "sig", "alg": "RS256"}
+
+
+def _cognito_token(private_key, kid, **claims):
+    now = int(time.time())
+    payload = {"sub": "cognito-user", "iss": ISSUER, "token_use": "access", "client_id": CLIENT_ID,
+               "iat": now, "exp": now + 3600, **claims}
+    return pyjwt.encode(payload, private_key, algorithm="RS256", headers={"kid": kid})
+
+
+@pytest.fixture
+def jwks_server():
+    """Serves whatever key set is in ``state["keys"]`` at /.well-known/jwks.json."""
+    state = {"keys": [], "requests": 0}
+
+    def application(environ, start_response):
+        state["requests"] += 1
+        return Response(json.dumps({"keys": state["keys"]}), mimetype="application/json")(environ, start_response)
+
+    server = make_server("127.0.0.1", 0, application, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    state["url"] = f"http://127.0.0.1:{server.server_port}/.well-known/jwks.json"
+    yield state
+    server.shutdown()
+
+
+@pytest.fixture
+def cognito_app(jwks_server):
+    app = Flask(__name__)
+    app.config["JWT_SECRET_KEY"] = "test-secret-key-that-is-long-enough"
+    jwks = JWKSCache(jwks_server["url"], min_refetch_interval=0)
+    init_jwt(app, key_resolver=CognitoKeyResolver(jwks, ISSUER, client_id=CLIENT_ID))
+
+    @app.route("/protected")
+    @jwt_required()
+    def protected():
+        return {"sub": get_jwt()["sub"]}
+
+    return app, jwks
+
+
+def _get(app, token):
+    with app.test_client() as client:
+        return client.get("/protected", headers={"Authorization": f"Bearer {token}"})
+
+
+def test_cognito_tokens_verify_offline_with_one_jwks_fetch(jwks_server, cognito_app):
+    app, jwks = cognito_app
+    key = _rsa_key()
+    jwks_server["keys"] = [_jwk(key, "k1")]
+    for _ in range(3):
+        response = _get(app, _cognito_token(key, "k1"))
+        assert response.status_code == 200
+        assert response.json["sub"] == "cognito-user"
+    assert jwks_server["requests"] == 1
+
+    # Our own HS256 tokens are still accepted alongside Cognito's
+    assert _get(app, _token(app)).status_code == 200
+
+
+def test_rotated_key_is_fetched_on_unknown_kid(jwks_server, cognito_app):
+    app, jwks = cognito_app
+    old, new = _rsa_key(), _rsa_key()
+    jwks_server["keys"] = [_jwk(old, "old")]
+    assert _get(app, _cognito_token(old, "old")).status_code == 200
+
+    jwks_server["keys"] = [_jwk(old, "old"), _jwk(new, "new")]
+    assert _get(app, _cognito_token(new, "new")).status_code == 200
+    assert jwks_server["requests"] == 2
+
+
+def test_rejects_forged_and_foreign_cognito_tokens(jwks_server, cognito_app):
+    app, _ = cognito_app
+    key, attacker = _rsa_key(), _rsa_key()
+    jwks_server["keys"] = [_jwk(key, "k1")]
+
+    assert _get(app, _cognito_token(attacker, "k1")).status_code == 422  # Wrong signature
+    assert _get(app, _cognito_token(key, "k1", client_id="other-client")).status_code == 422
+    assert _get(app, _cognito_token(key, "k1", token_use="id")).status_code == 422
+    assert _get(app, _cognito_token(key, "unknown-kid")).status_code == 422
+    with app.app_context():
+        hs256 = pyjwt.encode({"sub": "x", "iss": ISSUER, "token_use": "access", "client_id": CLIENT_ID},
+                             app.config["JWT_SECRET_KEY"], algorithm="HS256")
+    assert _get(app, hs256).status_code == 422  # Cognito issuer, but not RS256
+
+
+def test_unreachable_jwks_gives_503(cognito_app):
+    app, jwks = cognito_app
+    jwks.url = "http://127.0.0.1:9/unreachable"
+    assert _get(app, _cognito_token(_rsa_key(), "k1")).status_code == 503
+
+
+def test_jwks_refetch_is_single_flight_and_rate_limited():
+    key = _rsa_key()
+    document = {"keys": [_jwk(key, "k1")]}
+
+    def slow_fetch(url):
+        time.sleep(0.2)
+        return document
+
+    jwks = JWKSCache("stand-in", fetch=slow_fetch, min_refetch_interval=60)
+    threads = [threading.Thread(target=jwks.get_key, args=("k1",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert jwks.fetches == 1
+
+    for _ in range(5):
+        with pytest.raises(UnknownKeyId):
+            jwks.get_key("made-up")
+    assert jwks.fetches == 1  # Unknown kids don't refetch inside min_refetch_interval
+
+
+def test_jwks_keeps_serving_keys_when_refresh_fails():
+    key = _rsa_key()
+    clock = _Clock()
+    responses = [{"keys": [_jwk(key, "k1")]}]
+
+    def fetch(url):
+        if not responses:
+            raise ConnectionError("JWKS endpoint down")
+        return responses.pop()
+
+    jwks = JWKSCache("stand-in", ttl=60, min_refetch_interval=10, fetch=fetch, clock=clock)
+    first = jwks.get_key("k1")
+    clock.now += 61  # Stale: refetch, which fails
+    assert jwks.get_key("k1") is first
+    assert jwks.fetches == 2
+
+
+
+# --- Refresh-token revocation ---
+
+from storage.memory import MemoryTable
+from tokens.revocation import BloomFilter, RevocationList
+
+
+def test_bloom_filter_has_no_false_negatives_and_bounded_false_positives():
+    bloom = BloomFilter(capacity=10_000, error_rate=0.01)
+    for i in range(10_000):
+        bloom.add(f"jti-{i}")
+    assert all(f"jti-{i}" in bloom for i in range(10_000))
+    false_positives = sum(f"other-{i}" in bloom for i in range(20_000))
+    assert false_positives / 20_000 < 0.02
+
+
+def test_revocation_list_reads_store_only_on_filter_hits():
+    clock = _Clock()
+    revocations = RevocationList(MemoryTable("revoked_tokens", "jti"), capacity=1000, clock=clock)
+    revocations.revoke("bad", expires_at=clock.now + 60)
+    assert revocations.is_revoked("bad")
+    assert revocations.store_reads == 1
+    assert not any(revocations.is_revoked(f"good-{i}") for i in range(500))
+    assert revocations.store_reads < 5  # Only false positives reach the table
+
+
+def test_revocation_list_rebuilds_and_syncs_from_the_table():
+    clock = _Clock()
+    table = MemoryTable("revoked_tokens", "jti")
+    writer = RevocationList(table, capacity=1000, clock=clock)
+    writer.revoke("expired", expires_at=clock.now - 1)
+    writer.revoke("live", expires_at=clock.now + 3600)
+    writer.revoke("forever")
+
+    # Another process starting up against the same table
+    reader = RevocationList(table, capacity=1000, sync_interval=30, clock=clock)
+    reader.rebuild()
+    assert reader.is_revoked("live") and reader.is_revoked("forever")
+    assert "expired" not in reader.filter
+
+    writer.revoke("later", expires_at=clock.now + 3600)
+    assert not reader.is_revoked("later")  # Not synced yet
+    clock.now += 31
+    assert reader.sync() == 1
+    assert reader.is_revoked("later")
+
+    assert writer.prune_expired() == 1
+    assert "expired" not in table
+
+
+def test_revocation_sync_reads_only_recent_entries_and_maintain_forgets_expired_ones():
+    clock = _Clock()
+    table = MemoryTable("revoked_tokens", "jti", indexes=("revokedBucket",))
+    writer = RevocationList(table, capacity=1000, clock=clock)
+    for i in range(50):
+        writer.revoke(f"old-{i}", expires_at=clock.now + 600)
+    reader = RevocationList(table, capacity=1000, clock=clock)
+    reader.rebuild()
+
+    clock.now += 200
+    assert reader.sync() == 0
+    clock.now += 10
+    writer.revoke("new", expires_at=clock.now + 3600)
+    clock.now += 30
+    scanned = []
+    find_many = table.find_many
+
+    def recording_find_many(field, values):
+        found = find_many(field, values)
+        scanned.extend(found)
+        return found
+
+    table.find_many = recording_find_many
+    assert reader.sync() == 1
+    assert [entry["jti"] for entry in scanned] == ["new"]  # Not the ones revoked before the last sync
+
+    clock.now += 600
+    assert reader.maintain() == 50
+    assert len(table) == 1 and reader.filter.count == 1
+    assert reader.is_revoked("new") and not reader.is_revoked("old-0")